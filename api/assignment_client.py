@@ -1,12 +1,57 @@
 # api/assignment_client.py - Assignment API Client
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import requests
 
 from api.base_client import BaseLMSClient
+from api.exercise_catalog import CourseExercises, ExerciseCatalog, exercise_catalog as shared_exercise_catalog
+from api.mirror import SourcedData, live
+
+# Assignment IDs sent per bulk submissions request, to keep URLs short
+SUBMISSION_ASSIGNMENT_CHUNK = 50
+
+# Submission fields kept in a submission matrix
+SUBMISSION_FIELDS = (
+    'score', 'grade', 'workflow_state', 'submitted_at', 'graded_at',
+    'attempt', 'late', 'missing', 'excused'
+)
+
+def normalize_assignment(assignment: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a Canvas assignment into our exercise format
+    
+    Args:
+        assignment: Assignment object returned by Canvas
+        
+    Returns:
+        Exercise object in a standardized format
+    """
+    return {
+        'id': assignment.get('id'),
+        'title': assignment.get('name'),
+        'type': 'Assignment',
+        'due_date': assignment.get('due_at'),
+        'status': 'Active' if assignment.get('published') else 'Draft',
+        'description': assignment.get('description'),
+        'points_possible': assignment.get('points_possible'),
+        'submission_types': assignment.get('submission_types')
+    }
 
 class AssignmentClient(BaseLMSClient):
     """Client for assignment-related API endpoints"""
     
+    def __init__(self, base_url: str, api_key: str, exercise_catalog: Optional[ExerciseCatalog] = None, **options: Any):
+        """
+        Initialize the assignment client
+        
+        Args:
+            base_url: Base URL for the LMS API
+            api_key: API key for authentication
+            exercise_catalog: Exercise catalog to use (defaults to the shared one)
+            **options: Connection options (see BaseLMSClient)
+        """
+        super().__init__(base_url, api_key, **options)
+        self.exercise_catalog = exercise_catalog or shared_exercise_catalog
+    
     def get_assignments(self, course_id: str) -> List[Dict[str, Any]]:
         """
         Get list of assignments for a specific course
@@ -17,28 +62,116 @@ class AssignmentClient(BaseLMSClient):
         Returns:
             List of assignment objects in a standardized format
         """
+        return self.read_exercises(course_id).data
+    
+    def read_exercises(self, course_id: str) -> SourcedData:
+        """
+        Get the assignments of a course in a standardized format, with their source
+        
+        Args:
+            course_id: ID of the course to get assignments for
+            
+        Returns:
+            List of assignment objects in a standardized format, with their
+            source and sync time (empty from Canvas if the request fails)
+        """
         try:
-            assignments = self.get(f"/courses/{course_id}/assignments")
+            assignments = self.read_assignments(course_id)
             
             # Process assignments to match our expected format
-            exercises = []
-            for assignment in assignments:
-                exercises.append({
-                    'id': assignment.get('id'),
-                    'title': assignment.get('name'),
-                    'type': 'Assignment',
-                    'due_date': assignment.get('due_at'),
-                    'status': 'Active' if assignment.get('published') else 'Draft',
-                    'description': assignment.get('description'),
-                    'points_possible': assignment.get('points_possible'),
-                    'submission_types': assignment.get('submission_types')
-                })
-            
-            return exercises
+            return assignments._replace(data=[normalize_assignment(assignment) for assignment in assignments.data])
         except requests.exceptions.RequestException as e:
             print(f"Error fetching assignments for course {course_id}: {e}")
+            return live([])
+    
+    def read_assignments(self, course_id: str) -> SourcedData:
+        """
+        Get the Canvas assignments of a course, from the local mirror if it has them
+        
+        Args:
+            course_id: ID of the course
+            
+        Returns:
+            List of Canvas assignment objects, with their source and sync time
+            
+        Raises:
+            requests.exceptions.RequestException: If the assignments cannot be fetched from Canvas
+        """
+        if self.mirror is not None:
+            assignments = self.mirror.assignments(self.base_url, course_id)
+            if assignments is not None:
+                return assignments
+        return live(self.list_assignments(course_id))
+    
+    def list_assignments(self, course_id: str) -> List[Dict[str, Any]]:
+        """
+        Fetch the assignments of a course from Canvas
+        
+        Args:
+            course_id: ID of the course
+            
+        Returns:
+            List of Canvas assignment objects
+            
+        Raises:
+            requests.exceptions.RequestException: If a request fails
+        """
+        return list(self.iter_items(f"/courses/{course_id}/assignments"))
+    
+    def get_course_exercises(self, course_id: str) -> CourseExercises:
+        """
+        Get the cached catalog of published exercises for a course
+        
+        Args:
+            course_id: ID of the course
+            
+        Returns:
+            Published exercises and the set of their IDs
+            
+        Raises:
+            requests.exceptions.RequestException: If the assignments cannot be fetched
+        """
+        return self.exercise_catalog.get_course(
+            self.base_url, course_id,
+            lambda: [normalize_assignment(assignment)
+                     for assignment in self.read_assignments(course_id).data]
+        )
+    
+    def get_student_exercises(self, course_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the published exercises students can open in a course
+        
+        Args:
+            course_id: ID of the course
+            
+        Returns:
+            List of published exercise objects in a standardized format
+        """
+        try:
+            return self.get_course_exercises(course_id).exercises
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching exercises for course {course_id}: {e}")
             return []
     
+    def has_exercise(self, course_id: str, exercise_id: str) -> bool:
+        """
+        Check if an exercise is published in a course
+        
+        Costs no Canvas call while the course's catalog is cached.
+        
+        Args:
+            course_id: ID of the course
+            exercise_id: ID of the exercise
+            
+        Returns:
+            bool: True if the exercise exists and is published
+        """
+        try:
+            return str(exercise_id) in self.get_course_exercises(course_id).ids
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching exercises for course {course_id}: {e}")
+            return False
+    
     def get_assignment(self, course_id: str, assignment_id: str) -> Dict[str, Any]:
         """
         Get details for a specific assignment
@@ -83,11 +216,68 @@ class AssignmentClient(BaseLMSClient):
             List of submission objects
         """
         try:
-            return self.get(f"/courses/{course_id}/assignments/{assignment_id}/submissions")
+            return list(self.iter_items(f"/courses/{course_id}/assignments/{assignment_id}/submissions"))
         except requests.exceptions.RequestException as e:
             print(f"Error fetching submissions for assignment {assignment_id} in course {course_id}: {e}")
             return []
             
+    def iter_course_submissions(self, course_id: str, assignment_ids: Optional[Iterable[Any]] = None,
+                                student_ids: Optional[Iterable[Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily iterate over the submissions of many students and assignments
+        
+        Uses the multiple submissions endpoint, so a whole gradebook takes
+        one paginated request instead of one per assignment.
+        
+        Args:
+            course_id: ID of the course
+            assignment_ids: Assignments to include (all if None)
+            student_ids: Canvas user IDs of the students to include (all if None)
+            
+        Yields:
+            Each submission object, with user_id and assignment_id
+            
+        Raises:
+            requests.exceptions.RequestException: If a request fails
+        """
+        endpoint = f"/courses/{course_id}/students/submissions"
+        students = [str(student_id) for student_id in student_ids] if student_ids else "all"
+        
+        if not assignment_ids:
+            yield from self.iter_items(endpoint, {"student_ids[]": students})
+            return
+        
+        ids = [str(assignment_id) for assignment_id in assignment_ids]
+        for start in range(0, len(ids), SUBMISSION_ASSIGNMENT_CHUNK):
+            yield from self.iter_items(endpoint, {
+                "student_ids[]": students,
+                "assignment_ids[]": ids[start:start + SUBMISSION_ASSIGNMENT_CHUNK]
+            })
+    
+    def get_submission_matrix(self, course_id: str, assignment_ids: Optional[Iterable[Any]] = None,
+                              student_ids: Optional[Iterable[Any]] = None) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Get the submissions of a course keyed by student and assignment
+        
+        Args:
+            course_id: ID of the course
+            assignment_ids: Assignments to include (all if None)
+            student_ids: Canvas user IDs of the students to include (all if None)
+            
+        Returns:
+            Dictionary of (user ID, assignment ID), both as strings, to the
+            submission's grading fields (see SUBMISSION_FIELDS)
+        """
+        try:
+            return {
+                (str(submission['user_id']), str(submission['assignment_id'])):
+                    {field: submission.get(field) for field in SUBMISSION_FIELDS}
+                for submission in self.iter_course_submissions(course_id, assignment_ids, student_ids)
+            }
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching submissions for course {course_id}: {e}")
+            return {}
+            
     def create_assignment(self, course_id: str, assignment_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new assignment
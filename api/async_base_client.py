@@ -0,0 +1,380 @@
+# api/async_base_client.py - Base asyncio API Client
+import asyncio
+import atexit
+import json
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, Any, AsyncIterator, Awaitable, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+import aiohttp
+from yarl import URL
+
+from api.base_client import DEFAULT_POOL_SIZE, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from api.circuit_breaker import CircuitBreaker, CircuitOpenError
+from api.client_policy import (
+    ClientPolicy, GetPlan, DEFAULT_PAGE_SIZE,
+    USE_CACHED, SERVE_STALE, REFRESH_STALE, FETCH
+)
+from api.mirror import CanvasMirror
+from api.rate_limit import RateLimiter, DEFAULT_MAX_RETRIES
+from api.response_cache import ResponseCache
+
+# Default number of requests in flight at once
+DEFAULT_MAX_CONCURRENCY = 10
+
+# Errors raised by the async transport (the async counterpart of RequestException);
+# CircuitOpenError is raised instead of calling Canvas while a circuit is open
+ASYNC_REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError)
+
+
+def is_async_outage(error: Exception) -> bool:
+    """Check if an async request failed because Canvas is unhealthy, rather than refusing it"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500
+    return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError, CircuitOpenError))
+
+
+class AsyncTransport:
+    """
+    Long-lived event loop thread owning the pooled aiohttp session
+
+    The loop and session are created on first use and kept for the life of
+    the process, so connections stay open across Flask requests. Synchronous
+    code submits coroutines with run(); all of them share the connection
+    pool and one limit on the number of requests in flight.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 keep_alive: bool = True,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Initialize the transport
+
+        Args:
+            pool_size: Maximum number of pooled connections
+            timeout: (connect, read) timeouts in seconds
+            keep_alive: Keep connections open between requests
+            max_concurrency: Maximum number of requests in flight at once
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the transport's event loop, starting its thread on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="lms-async", daemon=True).start()
+                atexit.register(self.close)
+            return self._loop
+
+    def run(self, coroutine: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the transport's loop and wait for its result
+
+        Args:
+            coroutine: Coroutine to run
+            timeout: Seconds to wait before cancelling it (no limit if None)
+
+        Returns:
+            Result of the coroutine
+
+        Raises:
+            concurrent.futures.TimeoutError: If the timeout passes first
+            Exception: Whatever the coroutine raised
+        """
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Pooled session; only use it from coroutines running on the transport's loop"""
+        if self._session is None or self._session.closed:
+            connect_timeout, read_timeout = self.timeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keep_alive),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+                # Sessions are shared between users, so never persist cookies
+                cookie_jar=aiohttp.DummyCookieJar()
+            )
+        return self._session
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Limit on requests in flight; only use it from coroutines running on the transport's loop"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def close(self) -> None:
+        """Close the session and stop the loop thread"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        self._semaphore = None
+        loop.call_soon_threadsafe(loop.stop)
+
+
+class _Reply(NamedTuple):
+    """A response read in full, so it can be inspected after the connection is released"""
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    next_url: Optional[str]
+    error: Optional[aiohttp.ClientResponseError]
+
+    @classmethod
+    async def read(cls, response: aiohttp.ClientResponse) -> "_Reply":
+        body = await response.read()
+        next_link = response.links.get("next")
+        error = None
+        if response.status >= 400:
+            error = aiohttp.ClientResponseError(
+                response.request_info, response.history,
+                status=response.status, message=response.reason or "", headers=response.headers
+            )
+        return cls(response.status, response.headers, body, str(next_link["url"]) if next_link else None, error)
+
+    def raise_for_status(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+
+class AsyncBaseLMSClient(ClientPolicy):
+    """Base client for interacting with LMS API from asyncio code"""
+
+    def __init__(self, base_url: str, api_key: str, transport: AsyncTransport,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 response_cache: Optional[ResponseCache] = None,
+                 mirror: Optional[CanvasMirror] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        """
+        Initialize the async LMS API client
+
+        Takes the same rate limiter, response cache, circuit breaker and
+        mirror as BaseLMSClient, so sync and async calls share them.
+
+        Args:
+            base_url: Base URL for the LMS API
+            api_key: API key for authentication
+            transport: Shared event loop and connection pool
+            page_size: Number of items requested per page from list endpoints
+            response_cache: Cache for GET responses (disabled if None)
+            mirror: Local mirror answering reads before Canvas (disabled if None)
+            rate_limiter: Rate limiter tracking the token's Canvas budget (defaults to the shared one)
+            max_retries: Retries of GET requests that fail with a connection
+                error, a rate limit or a 502/503/504
+            circuit_breaker: Circuit breaker failing calls fast while Canvas
+                is unhealthy (disabled if None)
+        """
+        super().__init__(base_url, api_key, page_size, response_cache, mirror,
+                         rate_limiter, max_retries, circuit_breaker)
+        self.transport = transport
+
+    async def _send(self, method: str, url: Union[str, URL], headers: Optional[Dict[str, str]] = None,
+                    **kwargs) -> _Reply:
+        """
+        Send a request to an absolute URL and read the whole response
+
+        Follows the same ClientPolicy as BaseLMSClient._send: requests made
+        with the client's token go through the rate limiter, idempotent
+        requests are retried with jittered backoff, and every attempt goes
+        through the circuit breaker.
+
+        Raises:
+            aiohttp.ClientError: If the request fails
+            CircuitOpenError: If the endpoint family's circuit is open
+        """
+        headers, limited, retries = self._send_policy(method, headers)
+        family = self.endpoint_family(url)
+
+        attempt = 0
+        while True:
+            if limited:
+                # The limiter sleeps while the budget is low; keep that off the loop
+                await asyncio.get_running_loop().run_in_executor(None, self.rate_limiter.acquire, self.token_key)
+
+            try:
+                reply = await self._attempt(method, url, family, headers, **kwargs)
+            except ASYNC_REQUEST_ERRORS as e:
+                delay = self._error_retry_delay(attempt, retries, e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._response_retry_delay(attempt, retries, limited, reply.status, reply.headers, reply.body)
+                if delay is None:
+                    reply.raise_for_status()
+                    return reply
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, method: str, url: Union[str, URL], family: str, headers: Dict[str, str],
+                       **kwargs) -> _Reply:
+        """Send one attempt of a request, reporting its outcome to the circuit breaker and metrics"""
+        self._before_attempt(method, family)
+        started = time.perf_counter()
+        try:
+            async with self.transport.semaphore:
+                async with self.transport.session.request(method, url, headers=headers, **kwargs) as response:
+                    reply = await _Reply.read(response)
+        except asyncio.CancelledError:
+            # Abandoned (e.g. a deadline passed), not a Canvas failure
+            self._abandon_attempt(family)
+            raise
+        except Exception:
+            self._record_attempt(method, family, started, None)
+            raise
+        self._record_attempt(method, family, started, reply.status)
+        return reply
+
+    async def request(self, method: str, endpoint: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> Any:
+        """
+        Send a request to the API
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint (without base URL)
+            headers: Headers to use instead of the client's default headers
+            **kwargs: Extra arguments passed to aiohttp (params, json, ...)
+
+        Returns:
+            Response data
+
+        Raises:
+            aiohttp.ClientError: If the request fails
+        """
+        reply = await self._send(method, f"{self.base_url}{endpoint}", headers, **kwargs)
+        return reply.json()
+
+    async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Make a GET request to the API"""
+        data, _ = await self._get_json(f"{self.base_url}{endpoint}", params)
+        return data
+
+    async def post(self, endpoint: str, data: Dict[str, Any]) -> Any:
+        """Make a POST request to the API"""
+        return await self.request("POST", endpoint, json=data)
+
+    async def put(self, endpoint: str, data: Dict[str, Any]) -> Any:
+        """Make a PUT request to the API"""
+        return await self.request("PUT", endpoint, json=data)
+
+    async def delete(self, endpoint: str) -> Any:
+        """Make a DELETE request to the API"""
+        return await self.request("DELETE", endpoint)
+
+    async def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Optional[str]]:
+        """
+        GET an absolute URL and parse the JSON body, using the response cache if enabled
+
+        Planned by ClientPolicy._plan_get like BaseLMSClient._get_json, so
+        sync and async clients share cache entries, including the last good
+        responses served (marked stale) while Canvas is down.
+
+        Returns:
+            Tuple of (parsed body, URL of the next page or None)
+
+        Raises:
+            aiohttp.ClientError: If the request fails
+        """
+        plan = self._plan_get(url, params)
+        if plan.action == USE_CACHED:
+            return plan.cached()
+        if plan.action == SERVE_STALE:
+            return self._serve_stale(plan)
+        if plan.action == REFRESH_STALE:
+            asyncio.ensure_future(self._refresh(plan))
+            return self._serve_stale(plan)
+        if plan.action == FETCH:
+            return await self._fetch_json(plan)
+
+        # FETCH_OR_STALE: the last good response covers an outage
+        try:
+            return await self._fetch_json(plan)
+        except ASYNC_REQUEST_ERRORS as e:
+            if not is_async_outage(e):
+                raise
+            return self._serve_stale(plan, e)
+
+    async def _refresh(self, plan: GetPlan) -> None:
+        """Refresh a cache entry in the background; the request doubles as the half-open probe"""
+        try:
+            await self._fetch_json(plan)
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error refreshing {plan.url}: {e}")
+
+    async def _fetch_json(self, plan: GetPlan) -> Tuple[Any, Optional[str]]:
+        """GET a planned, already encoded URL, revalidating and storing the cache entry if cached"""
+        reply = await self._send("GET", URL(plan.url, encoded=True), self._conditional_headers(plan))
+        return self._cache_response(plan, reply.status, reply.headers, reply.next_url, len(reply.body), reply.json)
+
+    async def iter_pages(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                         per_page: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Lazily iterate over the pages of a paginated list endpoint
+
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Query parameters for the first page
+            per_page: Number of items per page (defaults to the client's page size)
+
+        Yields:
+            The list of items on each page
+
+        Raises:
+            aiohttp.ClientError: If a request fails
+        """
+        params = self._page_params(params, per_page)
+        url = f"{self.base_url}{endpoint}"
+
+        while url:
+            page, url = await self._get_json(url, params)
+            yield page
+
+            # The next link already carries the full query string
+            params = None
+
+    async def get_all(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                      max_items: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Collect the items of a paginated list endpoint
+
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Query parameters for the first page
+            max_items: Stop after this many items
+
+        Returns:
+            List of items across all pages
+
+        Raises:
+            aiohttp.ClientError: If a request fails
+        """
+        items = []
+        async for page in self.iter_pages(endpoint, params):
+            items.extend(page)
+            if max_items is not None and len(items) >= max_items:
+                return items[:max_items]
+        return items
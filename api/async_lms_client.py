@@ -0,0 +1,264 @@
+# api/async_lms_client.py - asyncio LMS Client mirroring LMSClient
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from api.async_base_client import (
+    AsyncBaseLMSClient, AsyncTransport, ASYNC_REQUEST_ERRORS
+)
+from api.assignment_client import normalize_assignment
+from api.course_client import is_teacher_course, ROSTER_PARAMS, DEFAULT_RESOLVE_DEADLINE
+from api.enrollment_index import EnrollmentIndex, enrollment_index as shared_enrollment_index
+
+
+class AsyncCourseClient(AsyncBaseLMSClient):
+    """Async client for course-related API endpoints"""
+
+    enrollment_index: EnrollmentIndex = shared_enrollment_index
+
+    async def get_courses(self) -> List[Dict[str, Any]]:
+        """Get list of courses where the user is enrolled as a teacher"""
+        try:
+            courses = await self.get_all("/users/self/favorites/courses")
+            return [course for course in courses if is_teacher_course(course)]
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error fetching courses: {e}")
+            return []
+
+    async def get_course(self, course_id: str) -> Dict[str, Any]:
+        """Get details for a specific course"""
+        try:
+            return await self.get(f"/courses/{course_id}")
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error fetching course {course_id}: {e}")
+            return {}
+
+    async def get_course_modules(self, course_id: str) -> List[Dict[str, Any]]:
+        """Get modules for a specific course"""
+        try:
+            return await self.get_all(f"/courses/{course_id}/modules")
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error fetching modules for course {course_id}: {e}")
+            return []
+
+    async def get_course_sections(self, course_id: str) -> List[Dict[str, Any]]:
+        """Get sections for a specific course"""
+        try:
+            return await self.get_all(f"/courses/{course_id}/sections")
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error fetching sections for course {course_id}: {e}")
+            return []
+
+    async def read_course_roster(self, course_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the student roster of a course, from the local mirror if it has it
+
+        Raises:
+            aiohttp.ClientError: If the roster cannot be fetched from Canvas
+        """
+        if self.mirror is not None:
+            # Mirror reads hit the database, so keep them off the loop
+            roster = await asyncio.get_running_loop().run_in_executor(
+                None, self.mirror.roster, self.base_url, course_id)
+            if roster is not None:
+                return roster.data
+        return await self.get_all(f"/courses/{course_id}/users", ROSTER_PARAMS)
+
+    async def is_student_in_course_by_id(self, course_id: str, student_email: str) -> bool:
+        """
+        Check if a student with the given email is enrolled in the specified course
+
+        Shares the enrollment index with the sync client, so a roster
+        fetched by either one serves both.
+        """
+        try:
+            roster = self.enrollment_index.peek(self.base_url, course_id)
+            if roster is None:
+                users = await self.read_course_roster(course_id)
+                roster = self.enrollment_index.put(self.base_url, course_id, users)
+            return student_email.lower() in roster
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error fetching students for course {course_id}: {e}")
+            return False
+
+    async def find_student_courses(self, student_email: str, courses: List[Dict[str, Any]],
+                                   first_match: bool = False,
+                                   deadline: float = DEFAULT_RESOLVE_DEADLINE) -> List[Dict[str, Any]]:
+        """
+        Find the courses a student is actively enrolled in, checking all rosters at once
+
+        The async counterpart of CourseClient.find_student_courses: checks
+        still running when the deadline passes (or once a match is found,
+        with first_match) are cancelled and count as not enrolled.
+
+        Args:
+            student_email: Email address of the student
+            courses: Courses to check
+            first_match: Stop as soon as one enrolled course is found
+            deadline: Overall time limit in seconds
+
+        Returns:
+            List of course objects the student is enrolled in, in the original order
+        """
+        if not courses:
+            return []
+
+        tasks = {
+            asyncio.ensure_future(self.is_student_in_course_by_id(course['id'], student_email)): index
+            for index, course in enumerate(courses)
+        }
+        matches = set()
+        pending = set(tasks)
+        stop_at = asyncio.get_running_loop().time() + deadline
+        try:
+            while pending:
+                remaining = stop_at - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    print(f"Timed out resolving courses for {student_email}, {len(pending)} not checked")
+                    break
+
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result():
+                        matches.add(tasks[task])
+
+                if first_match and matches:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return [courses[index] for index in sorted(matches)]
+
+
+class AsyncAssignmentClient(AsyncBaseLMSClient):
+    """Async client for assignment-related API endpoints"""
+
+    async def get_assignments(self, course_id: str) -> List[Dict[str, Any]]:
+        """Get list of assignments for a specific course in a standardized format"""
+        try:
+            assignments = await self.get_all(f"/courses/{course_id}/assignments")
+            return [normalize_assignment(assignment) for assignment in assignments]
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error fetching assignments for course {course_id}: {e}")
+            return []
+
+    async def get_assignment_submissions(self, course_id: str, assignment_id: str) -> List[Dict[str, Any]]:
+        """Get submissions for a specific assignment"""
+        try:
+            return await self.get_all(f"/courses/{course_id}/assignments/{assignment_id}/submissions")
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error fetching submissions for assignment {assignment_id} in course {course_id}: {e}")
+            return []
+
+
+class AsyncStudentClient(AsyncBaseLMSClient):
+    """Async client for student-related API endpoints"""
+
+    async def get_course_students(self, course_id: str, enrollment_type: str = None) -> List[Dict[str, Any]]:
+        """Get students enrolled in a specific course"""
+        try:
+            params = {}
+            if enrollment_type:
+                params["enrollment_type"] = enrollment_type
+
+            return await self.get_all(f"/courses/{course_id}/students", params)
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error fetching students for course {course_id}: {e}")
+            return []
+
+    async def get_student_enrollments(self, student_id: str) -> List[Dict[str, Any]]:
+        """Get enrollments for a specific student"""
+        try:
+            return await self.get_all(f"/students/{student_id}/enrollments")
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error fetching enrollments for student {student_id}: {e}")
+            return []
+
+
+class AsyncAuthClient(AsyncBaseLMSClient):
+    """Async client for authentication-related API endpoints"""
+
+    async def validate_token(self, token: str) -> Dict[str, Any]:
+        """Validate an authentication token"""
+        try:
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json"
+            }
+            user_data = await self.request("GET", "/users/self", headers=headers)
+            return {
+                "success": True,
+                "user": user_data
+            }
+        except ASYNC_REQUEST_ERRORS as e:
+            print(f"Error validating token: {e}")
+            return {"success": False, "error": str(e)}
+
+
+class AsyncLMSClient:
+    """
+    asyncio client for interacting with LMS API
+
+    All sub-clients run on the given AsyncTransport, so they share its
+    long-lived event loop, connection pool and concurrency limit with every
+    other async client in the process. Synchronous code runs a batch of
+    calls in one event loop pass with run_batch:
+
+        statuses = client.run_batch(lambda client: [
+            client.courses.is_student_in_course_by_id(course['id'], email)
+            for course in courses
+        ])
+    """
+
+    def __init__(self, base_url: str, api_key: str, transport: AsyncTransport,
+                 enrollment_index: Optional[EnrollmentIndex] = None, **options: Any):
+        """
+        Initialize the async LMS API client
+
+        Args:
+            base_url: Base URL for the LMS API
+            api_key: API key for authentication
+            transport: Shared event loop and connection pool
+            enrollment_index: Enrollment index used for student membership checks
+            **options: Options shared by all clients (page_size, response_cache,
+                mirror, rate_limiter, max_retries, circuit_breaker)
+        """
+        self.base_url = base_url
+        self.transport = transport
+
+        self.courses = AsyncCourseClient(base_url, api_key, transport, **options)
+        if enrollment_index is not None:
+            self.courses.enrollment_index = enrollment_index
+        self.assignments = AsyncAssignmentClient(base_url, api_key, transport, **options)
+        self.users = AsyncStudentClient(base_url, api_key, transport, **options)
+        self.auth = AsyncAuthClient(base_url, api_key, transport, **options)
+
+    def run(self, coroutine: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run one coroutine of this client from synchronous code
+
+        Args:
+            coroutine: Coroutine to run
+            timeout: Seconds to wait before cancelling it (no limit if None)
+
+        Returns:
+            Result of the coroutine
+        """
+        return self.transport.run(coroutine, timeout)
+
+    def run_batch(self, batch: Callable[["AsyncLMSClient"], Iterable[Awaitable[Any]]],
+                  timeout: Optional[float] = None) -> List[Any]:
+        """
+        Run a batch of calls from synchronous code in one event loop pass
+
+        Args:
+            batch: Function receiving the client and returning the awaitables to run
+            timeout: Seconds to wait before cancelling the batch (no limit if None)
+
+        Returns:
+            Results of the awaitables, in order
+        """
+        async def gather():
+            return await asyncio.gather(*batch(self))
+
+        return self.transport.run(gather(), timeout)
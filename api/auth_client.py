@@ -50,8 +50,7 @@ class AuthClient(BaseLMSClient):
                 "Content-Type": "application/json"
             }
             
-            response = requests.get(f"{self.base_url}/users/self", headers=headers)
-            response.raise_for_status()
+            response = self.request("GET", "/users/self", headers=headers)
             
             user_data = response.json()
             return {
@@ -1,96 +1,362 @@
 # api/base_client.py - Base API Client
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+
+from api.circuit_breaker import CircuitBreaker, is_outage
+from api.client_policy import (
+    ClientPolicy, GetPlan, DEFAULT_PAGE_SIZE,
+    USE_CACHED, SERVE_STALE, REFRESH_STALE, FETCH
+)
+from api.mirror import CanvasMirror
+from api.rate_limit import RateLimiter, DEFAULT_MAX_RETRIES
+from api.response_cache import ResponseCache
+from api.single_flight import SingleFlight
+
+# Default connection pool settings
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30
+
+# Shared sessions, one connection pool per API base URL
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(base_url: str, pool_size: int = DEFAULT_POOL_SIZE, keep_alive: bool = True) -> requests.Session:
+    """
+    Get the shared, pooled HTTP session for an API base URL
+
+    The first caller for a base URL decides the pool settings; later callers
+    reuse the same session so connections stay open between requests.
 
-class BaseLMSClient:
+    Args:
+        base_url: Base URL for the LMS API
+        pool_size: Maximum number of pooled connections to the host
+        keep_alive: Keep connections open between requests
+
+    Returns:
+        Pooled requests session
+    """
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+            # Sessions are shared between users, so never persist cookies
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            _sessions[base_url] = session
+        return session
+
+
+def close_sessions() -> None:
+    """Close all shared sessions and their pooled connections"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class BaseLMSClient(ClientPolicy):
     """Base client for interacting with LMS API"""
-    
-    def __init__(self, base_url: str, api_key: str):
+
+    def __init__(self, base_url: str, api_key: str,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 keep_alive: bool = True,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 response_cache: Optional[ResponseCache] = None,
+                 mirror: Optional[CanvasMirror] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 single_flight: Optional[SingleFlight] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
         """
         Initialize the LMS API client
-        
+
         Args:
             base_url: Base URL for the LMS API
             api_key: API key for authentication
+            pool_size: Maximum number of pooled connections to the API host
+            timeout: (connect, read) timeouts in seconds
+            keep_alive: Keep connections open between requests
+            page_size: Number of items requested per page from list endpoints
+            response_cache: Cache for GET responses (disabled if None)
+            mirror: Local mirror answering reads before Canvas (disabled if None)
+            rate_limiter: Rate limiter tracking the token's Canvas budget (defaults to the shared one)
+            max_retries: Retries of GET requests that fail with a connection
+                error, a rate limit or a 502/503/504
+            single_flight: Coalescer sharing one GET between concurrent
+                identical requests of the same token (disabled if None)
+            circuit_breaker: Circuit breaker failing calls fast while Canvas
+                is unhealthy (disabled if None)
+        """
+        super().__init__(base_url, api_key, page_size, response_cache, mirror,
+                         rate_limiter, max_retries, circuit_breaker)
+        self.timeout = timeout
+        self.single_flight = single_flight
+        self.session = get_session(base_url, pool_size, keep_alive)
+
+    def request(self, method: str, endpoint: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the shared connection pool
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint (without base URL)
+            headers: Headers to use instead of the client's default headers
+            **kwargs: Extra arguments passed to requests (params, json, ...)
+
+        Returns:
+            Response object
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
         """
-        self.base_url = base_url
-        self.api_key = api_key
-        self.headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-    
+        return self._send(method, f"{self.base_url}{endpoint}", headers, **kwargs)
+
+    def _send(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        """
+        Send a request to an absolute URL through the shared connection pool
+
+        Requests made with the client's token go through the rate limiter.
+        Idempotent requests are retried with jittered exponential backoff
+        when they fail with a connection error, a rate limit or a 502/503/504.
+        Every attempt goes through the circuit breaker, if enabled.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        headers, limited, retries = self._send_policy(method, headers)
+        family = self.endpoint_family(url)
+
+        attempt = 0
+        while True:
+            if limited:
+                self.rate_limiter.acquire(self.token_key)
+
+            try:
+                response = self._attempt(method, url, family, headers, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                delay = self._error_retry_delay(attempt, retries, e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._response_retry_delay(attempt, retries, limited, response.status_code,
+                                                   response.headers, response.content)
+                if delay is None:
+                    response.raise_for_status()
+                    return response
+
+            attempt += 1
+            time.sleep(delay)
+
+    def _attempt(self, method: str, url: str, family: str, headers: Dict[str, str], **kwargs) -> requests.Response:
+        """Send one attempt of a request, reporting its outcome to the circuit breaker and metrics"""
+        self._before_attempt(method, family)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, headers=headers, **kwargs)
+        except Exception:
+            self._record_attempt(method, family, started, None)
+            raise
+        self._record_attempt(method, family, started, response.status_code)
+        return response
+
     def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Make a GET request to the API
-        
+
         Args:
             endpoint: API endpoint (without base URL)
             params: Query parameters
-            
+
         Returns:
             Response data as dictionary
-        
+
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
+        data, _ = self._get_json(f"{self.base_url}{endpoint}", params)
+        return data
+
+    def iter_pages(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                   per_page: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Lazily iterate over the pages of a paginated list endpoint
+
+        Follows the Canvas `Link: rel="next"` header; the next page is only
+        requested once the caller asks for it.
+
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Query parameters for the first page
+            per_page: Number of items per page (defaults to the client's page size)
+
+        Yields:
+            The list of items on each page
+
+        Raises:
+            requests.exceptions.RequestException: If a request fails
+        """
+        params = self._page_params(params, per_page)
         url = f"{self.base_url}{endpoint}"
-        response = requests.get(url, headers=self.headers, params=params)
-        response.raise_for_status()
-        return response.json()
-        
+
+        while url:
+            page, url = self._get_json(url, params)
+            yield page
+
+            # The next link already carries the full query string
+            params = None
+
+    def iter_items(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                   per_page: Optional[int] = None, max_items: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily iterate over the items of a paginated list endpoint
+
+        Stopping the iteration early (or reaching max_items) means the
+        remaining pages are never fetched.
+
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Query parameters for the first page
+            per_page: Number of items per page (defaults to the client's page size)
+            max_items: Stop after this many items
+
+        Yields:
+            Each item across all pages
+
+        Raises:
+            requests.exceptions.RequestException: If a request fails
+        """
+        if max_items is not None and max_items <= 0:
+            return
+
+        count = 0
+        for page in self.iter_pages(endpoint, params, per_page):
+            for item in page:
+                yield item
+                count += 1
+                if max_items is not None and count >= max_items:
+                    return
+
+    def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Optional[str]]:
+        """
+        GET an absolute URL and parse the JSON body, using the response cache if enabled
+
+        Concurrent identical GETs made with the same token share one upstream
+        request when single-flight coalescing is enabled. With both the cache
+        and the circuit breaker enabled, the last good response of every
+        endpoint is kept, and served (marked stale) when Canvas is down; while
+        the circuit is open, a background probe refreshes it.
+
+        Args:
+            url: Absolute URL
+            params: Query parameters
+
+        Returns:
+            Tuple of (parsed body, URL of the next page or None)
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        plan = self._plan_get(url, params)
+        if plan.action == USE_CACHED:
+            return plan.cached()
+        if plan.action == SERVE_STALE:
+            return self._serve_stale(plan)
+        if plan.action == REFRESH_STALE:
+            threading.Thread(target=self._refresh, args=(plan,), name="canvas-refresh", daemon=True).start()
+            return self._serve_stale(plan)
+        if plan.action == FETCH:
+            return self._coalesced_fetch(plan)
+
+        # FETCH_OR_STALE: the last good response covers an outage
+        try:
+            return self._coalesced_fetch(plan)
+        except requests.exceptions.RequestException as e:
+            if not is_outage(e):
+                raise
+            return self._serve_stale(plan, e)
+
+    def _coalesced_fetch(self, plan: GetPlan) -> Tuple[Any, Optional[str]]:
+        """Fetch a URL, sharing the call with concurrent identical GETs if enabled"""
+        if self.single_flight is None:
+            return self._fetch_json(plan)
+        return self.single_flight.do(plan.key, lambda: self._fetch_json(plan))
+
+    def _refresh(self, plan: GetPlan) -> None:
+        """Refresh a cache entry in the background; the request doubles as the half-open probe"""
+        try:
+            self._coalesced_fetch(plan)
+        except requests.exceptions.RequestException as e:
+            print(f"Error refreshing {plan.url}: {e}")
+
+    def _fetch_json(self, plan: GetPlan) -> Tuple[Any, Optional[str]]:
+        """
+        GET an absolute URL from Canvas, revalidating and storing the cache entry if cached
+
+        Args:
+            plan: Plan of the GET, with the full URL, cache key, TTL and expired entry
+
+        Returns:
+            Tuple of (parsed body, URL of the next page or None)
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        response = self._send("GET", plan.url, headers=self._conditional_headers(plan))
+        return self._cache_response(plan, response.status_code, response.headers,
+                                    response.links.get("next", {}).get("url"), len(response.content), response.json)
+
     def post(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make a POST request to the API
-        
+
         Args:
             endpoint: API endpoint (without base URL)
             data: Request body data
-            
+
         Returns:
             Response data as dictionary
-            
+
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        url = f"{self.base_url}{endpoint}"
-        response = requests.post(url, headers=self.headers, json=data)
-        response.raise_for_status()
-        return response.json()
-        
+        return self.request("POST", endpoint, json=data).json()
+
     def put(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make a PUT request to the API
-        
+
         Args:
             endpoint: API endpoint (without base URL)
             data: Request body data
-            
+
         Returns:
             Response data as dictionary
-            
+
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        url = f"{self.base_url}{endpoint}"
-        response = requests.put(url, headers=self.headers, json=data)
-        response.raise_for_status()
-        return response.json()
-        
+        return self.request("PUT", endpoint, json=data).json()
+
     def delete(self, endpoint: str) -> Dict[str, Any]:
         """
         Make a DELETE request to the API
-        
+
         Args:
             endpoint: API endpoint (without base URL)
-            
+
         Returns:
             Response data as dictionary
-            
+
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        url = f"{self.base_url}{endpoint}"
-        response = requests.delete(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
\ No newline at end of file
+        return self.request("DELETE", endpoint).json()
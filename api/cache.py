@@ -0,0 +1,111 @@
+# api/cache.py - Small in-process caches shared by the API clients
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of entries before the least recently used is evicted
+            ttl: Default time to live of an entry in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries if full
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Time to live in seconds (defaults to the cache TTL)
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Get a cached value, loading and storing it on a miss
+
+        Concurrent misses for the same key wait for a single load instead of
+        each calling the loader. Exceptions from the loader are not cached.
+
+        Args:
+            key: Cache key
+            loader: Function returning the value to cache
+            ttl: Time to live in seconds (defaults to the cache TTL)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                # Another thread may have loaded it while we waited
+                value = self.get(key)
+                if value is None:
+                    value = loader()
+                    self.set(key, value, ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove an entry and return its value"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[1] if entry else None
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,185 @@
+# api/circuit_breaker.py - Per-endpoint circuit breaker for Canvas outages
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Set
+
+import requests
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Consecutive failures that open a circuit
+DEFAULT_FAILURE_THRESHOLD = 5
+# Seconds an open circuit waits before letting a probe through
+DEFAULT_RESET_TIMEOUT = 30.0
+# Memory bound of the last good responses kept when the response cache is off
+DEFAULT_STALE_MAX_BYTES = 8 * 1024 * 1024
+
+# Endpoint families answered with stale data during the current request
+_stale_reads: ContextVar[Optional[Set[str]]] = ContextVar("stale_reads", default=None)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling Canvas while an endpoint family's circuit is open"""
+
+
+def is_outage(error: requests.exceptions.RequestException) -> bool:
+    """Check if a request failed because Canvas is unhealthy, rather than refusing it"""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def begin_stale_tracking() -> None:
+    """Start recording stale reads for the current request"""
+    _stale_reads.set(set())
+
+
+def note_stale_read(family: str) -> None:
+    """Record that an endpoint family was answered with stale data"""
+    families = _stale_reads.get()
+    if families is not None:
+        families.add(family)
+
+
+def stale_reads() -> Set[str]:
+    """Get the endpoint families answered with stale data during the current request"""
+    return set(_stale_reads.get() or ())
+
+
+class Circuit:
+    """Health of one endpoint family"""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.last_failure_at: Optional[float] = None
+        self.rejected = 0
+        self.stale_served = 0
+
+
+class CircuitBreaker:
+    """
+    Fails Canvas calls fast while an endpoint family is unhealthy
+
+    Each endpoint family (endpoint template, see endpoint_template) has its
+    own circuit. After `failure_threshold` consecutive failures (connection
+    errors, timeouts or 5xx responses) the circuit opens and calls are
+    rejected with CircuitOpenError. After `reset_timeout` seconds it turns
+    half-open and lets a single probe through: success closes it, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open a circuit
+            reset_timeout: Seconds an open circuit waits before a probe
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._circuits: Dict[str, Circuit] = {}
+        self._lock = threading.Lock()
+
+    def before_call(self, family: str) -> None:
+        """
+        Check that a call may go to Canvas
+
+        Args:
+            family: Endpoint family of the call
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a probe in flight
+        """
+        with self._lock:
+            circuit = self._circuits.setdefault(family, Circuit())
+            if circuit.state == OPEN and time.monotonic() - circuit.opened_at >= self.reset_timeout:
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                # This call is the probe
+                circuit.probing = True
+                return
+            if circuit.state != CLOSED:
+                circuit.rejected += 1
+                raise CircuitOpenError(f"Canvas circuit open for {family}")
+
+    def record_success(self, family: str) -> None:
+        """Record a call that reached a healthy Canvas, closing the circuit"""
+        with self._lock:
+            circuit = self._circuits.setdefault(family, Circuit())
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.probing = False
+
+    def record_failure(self, family: str) -> None:
+        """Record a failed call, opening the circuit past the threshold or after a failed probe"""
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.setdefault(family, Circuit())
+            circuit.failures += 1
+            circuit.last_failure_at = now
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                circuit.state = OPEN
+                circuit.opened_at = now
+            circuit.probing = False
+
+    def release(self, family: str) -> None:
+        """Forget a call that was abandoned before its outcome was known, freeing the probe slot"""
+        with self._lock:
+            circuit = self._circuits.get(family)
+            if circuit is not None:
+                circuit.probing = False
+
+    def is_open(self, family: str) -> bool:
+        """Check if calls of an endpoint family are currently failing fast"""
+        with self._lock:
+            circuit = self._circuits.get(family)
+            return circuit is not None and circuit.state != CLOSED
+
+    def probe_due(self, family: str) -> bool:
+        """Check if an open circuit is ready for its half-open probe"""
+        with self._lock:
+            circuit = self._circuits.get(family)
+            if circuit is None or circuit.probing:
+                return False
+            if circuit.state == OPEN:
+                return time.monotonic() - circuit.opened_at >= self.reset_timeout
+            return circuit.state == HALF_OPEN
+
+    def record_stale(self, family: str) -> None:
+        """Count a read of an endpoint family answered with stale data"""
+        with self._lock:
+            self._circuits.setdefault(family, Circuit()).stale_served += 1
+        note_stale_read(family)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the state of every circuit seen
+
+        Returns:
+            Dictionary of endpoint family to its state, consecutive failures,
+            seconds since the last failure and since it opened, and counters
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                family: {
+                    "state": circuit.state,
+                    "failures": circuit.failures,
+                    "seconds_since_failure": (
+                        None if circuit.last_failure_at is None else round(now - circuit.last_failure_at, 1)
+                    ),
+                    "open_for": round(now - circuit.opened_at, 1) if circuit.state != CLOSED else None,
+                    "rejected": circuit.rejected,
+                    "stale_served": circuit.stale_served,
+                }
+                for family, circuit in sorted(self._circuits.items())
+            }
@@ -0,0 +1,260 @@
+# api/client_policy.py - Request policy shared by the sync and async LMS clients
+import hashlib
+import time
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from api.circuit_breaker import CircuitBreaker, CircuitOpenError
+from api.mirror import CanvasMirror
+from api.rate_limit import (
+    RateLimiter, rate_limiter as shared_rate_limiter,
+    DEFAULT_MAX_RETRIES, IDEMPOTENT_METHODS, backoff_delay, should_retry_status
+)
+from api.response_cache import CachedResponse, ResponseCache, endpoint_template
+from monitoring.metrics import observe_canvas_call
+
+# Default number of items requested per page from list endpoints
+DEFAULT_PAGE_SIZE = 100
+
+# What a GET does, decided by ClientPolicy._plan_get
+USE_CACHED = "cached"              # serve the fresh cache entry
+SERVE_STALE = "stale"              # circuit open: serve the last good entry
+REFRESH_STALE = "refresh"          # circuit open, probe due: serve it and refresh it in the background
+FETCH = "fetch"                    # fetch from Canvas
+FETCH_OR_STALE = "fetch_or_stale"  # fetch, serving the last good entry if Canvas is down
+
+
+class GetPlan(NamedTuple):
+    """A GET resolved against the response cache and circuit breaker"""
+    url: str
+    key: Tuple[str, str]
+    family: str
+    ttl: Optional[float]
+    entry: Optional[CachedResponse]
+    action: str
+
+    def cached(self) -> Tuple[Any, Optional[str]]:
+        """Get the cache entry as (parsed body, URL of the next page or None)"""
+        return self.entry.data, self.entry.next_url
+
+
+def token_hash(api_key: str) -> str:
+    """Hash an API token so it can be used as a key without keeping it in plain text"""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+
+
+class ClientPolicy:
+    """
+    Caching, retry, rate limit and circuit breaker rules of the LMS clients
+
+    BaseLMSClient and AsyncBaseLMSClient both inherit these decisions, so
+    they only differ in how they send requests and read responses.
+    """
+
+    def __init__(self, base_url: str, api_key: str,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 response_cache: Optional[ResponseCache] = None,
+                 mirror: Optional[CanvasMirror] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        """
+        Initialize the policy
+
+        Args:
+            base_url: Base URL for the LMS API
+            api_key: API key for authentication
+            page_size: Number of items requested per page from list endpoints
+            response_cache: Cache for GET responses (disabled if None)
+            mirror: Local mirror answering reads before Canvas (disabled if None)
+            rate_limiter: Rate limiter tracking the token's Canvas budget (defaults to the shared one)
+            max_retries: Retries of GET requests that fail with a connection
+                error, a rate limit or a 502/503/504
+            circuit_breaker: Circuit breaker failing calls fast while Canvas
+                is unhealthy (disabled if None)
+        """
+        self.base_url = base_url
+        self.api_key = api_key
+        self.page_size = page_size
+        self.response_cache = response_cache
+        self.mirror = mirror
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.max_retries = max_retries
+        self.circuit_breaker = circuit_breaker
+        self.token_key = token_hash(api_key)
+        self._base_path = urlparse(base_url or "").path.rstrip("/")
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def endpoint_family(self, url: Any) -> str:
+        """
+        Get the endpoint family of a URL, i.e. its endpoint template
+
+        Args:
+            url: Absolute URL
+
+        Returns:
+            Endpoint template relative to the API base URL, e.g. /courses/:id/users
+        """
+        return endpoint_template(urlparse(str(url)).path[len(self._base_path):])
+
+    def _page_params(self, params: Optional[Dict[str, Any]], per_page: Optional[int]) -> Dict[str, Any]:
+        """Get the query parameters of the first page of a list endpoint"""
+        params = dict(params or {})
+        params.setdefault("per_page", per_page or self.page_size)
+        return params
+
+    def _send_policy(self, method: str, headers: Optional[Dict[str, str]]) -> Tuple[Dict[str, str], bool, int]:
+        """
+        Get how a request is sent
+
+        Returns:
+            Tuple of (headers, whether it goes through the rate limiter, retries allowed)
+        """
+        headers = headers or self.headers
+        limited = headers.get("Authorization") == self.headers["Authorization"]
+        retries = self.max_retries if method.upper() in IDEMPOTENT_METHODS else 0
+        return headers, limited, retries
+
+    def _error_retry_delay(self, attempt: int, retries: int, error: Exception) -> Optional[float]:
+        """Get the delay before retrying an attempt that raised, or None to give up"""
+        if attempt >= retries or isinstance(error, CircuitOpenError):
+            return None
+        return backoff_delay(attempt)
+
+    def _response_retry_delay(self, attempt: int, retries: int, limited: bool,
+                              status: int, headers: Mapping[str, str], body: bytes) -> Optional[float]:
+        """
+        Record a response in the token's budget and get the delay before retrying it
+
+        Returns:
+            Seconds to wait before the next attempt, or None to keep this response
+        """
+        if limited:
+            self.rate_limiter.update(self.token_key, status, headers, body)
+        if attempt >= retries or not should_retry_status(status, body):
+            return None
+        return backoff_delay(attempt, headers.get("Retry-After"))
+
+    def _before_attempt(self, method: str, family: str) -> None:
+        """
+        Let the circuit breaker refuse an attempt, counting refusals in the metrics
+
+        Raises:
+            CircuitOpenError: If the endpoint family's circuit is open
+        """
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return
+        try:
+            breaker.before_call(family)
+        except CircuitOpenError:
+            observe_canvas_call(method, family, "circuit_open", None)
+            raise
+
+    def _record_attempt(self, method: str, family: str, started: float, status: Optional[int]) -> None:
+        """
+        Report the outcome of an attempt to the metrics and circuit breaker
+
+        Args:
+            method: HTTP method
+            family: Endpoint family of the request
+            started: time.perf_counter() when the attempt started
+            status: Status code of the response, or None if the attempt raised
+        """
+        observe_canvas_call(method, family, "error" if status is None else str(status), time.perf_counter() - started)
+        breaker = self.circuit_breaker
+        if breaker is not None:
+            if status is None or status >= 500:
+                breaker.record_failure(family)
+            else:
+                breaker.record_success(family)
+
+    def _abandon_attempt(self, family: str) -> None:
+        """Forget an attempt cancelled before its outcome was known"""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.release(family)
+
+    def _plan_get(self, url: str, params: Optional[Dict[str, Any]] = None) -> GetPlan:
+        """
+        Decide how to answer a GET from the response cache and circuit breaker
+
+        Entries are keyed by token and full URL, since responses depend on
+        what the token is allowed to see. With both the cache and the
+        circuit breaker enabled, the last good response of every endpoint is
+        kept (with a TTL of zero if it isn't cached for reuse) and served,
+        marked stale, while Canvas is down.
+
+        Args:
+            url: Absolute URL
+            params: Query parameters
+
+        Returns:
+            The request's cache key, TTL, cache entry and what to do with them
+        """
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        key = (self.token_key, full_url)
+        family = self.endpoint_family(url)
+
+        cache = self.response_cache
+        breaker = self.circuit_breaker
+        ttl = cache.ttl_for(urlparse(url).path[len(self._base_path):]) if cache is not None else None
+        if ttl is None and cache is not None and breaker is not None:
+            # Not cached for reuse, but kept as the outage fallback
+            ttl = 0
+        entry = cache.lookup(key) if ttl is not None else None
+
+        if entry is not None and entry.is_fresh:
+            action = USE_CACHED
+        elif entry is None or breaker is None:
+            action = FETCH
+        elif breaker.is_open(family):
+            action = REFRESH_STALE if breaker.probe_due(family) else SERVE_STALE
+        else:
+            action = FETCH_OR_STALE
+        return GetPlan(full_url, key, family, ttl, entry, action)
+
+    def _serve_stale(self, plan: GetPlan, error: Optional[Exception] = None) -> Tuple[Any, Optional[str]]:
+        """Answer a GET with its last good response, recording the stale read"""
+        if error is not None:
+            print(f"Serving stale {plan.family} after Canvas error: {error}")
+        self.circuit_breaker.record_stale(plan.family)
+        return plan.cached()
+
+    def _conditional_headers(self, plan: GetPlan) -> Dict[str, str]:
+        """Get the headers of a GET, revalidating its cache entry if it has validators"""
+        if plan.entry is not None and plan.entry.has_validators:
+            return dict(self.headers, **plan.entry.conditional_headers())
+        return self.headers
+
+    def _cache_response(self, plan: GetPlan, status: int, headers: Mapping[str, str], next_url: Optional[str],
+                        size: int, parse: Callable[[], Any]) -> Tuple[Any, Optional[str]]:
+        """
+        Turn a GET response into its result, revalidating or storing the cache entry
+
+        Args:
+            plan: Plan of the GET
+            status: Status code of the response
+            headers: Response headers
+            next_url: URL of the next page, if any
+            size: Size of the body in bytes
+            parse: Function parsing the JSON body
+
+        Returns:
+            Tuple of (parsed body, URL of the next page or None)
+        """
+        if plan.ttl is None:
+            return parse(), next_url
+
+        if status == 304 and plan.entry is not None:
+            self.response_cache.mark_not_modified(plan.key, plan.ttl)
+            return plan.cached()
+
+        data = parse()
+        self.response_cache.store(plan.key, data, next_url, headers.get("ETag"),
+                                  headers.get("Last-Modified"), plan.ttl, size)
+        return data, next_url
@@ -0,0 +1,70 @@
+# api/client_registry.py - Cache of LMS clients keyed by API token
+import threading
+from collections import OrderedDict
+from typing import Any, Tuple
+
+from api.client_policy import token_hash
+from api.lms_client import LMSClient
+
+# Default number of clients kept alive
+DEFAULT_MAX_CLIENTS = 64
+
+
+class ClientRegistry:
+    """Bounded LRU registry of LMSClient instances keyed by (base_url, token hash)"""
+
+    def __init__(self, max_clients: int = DEFAULT_MAX_CLIENTS, **options: Any):
+        """
+        Initialize the registry
+
+        Args:
+            max_clients: Maximum number of clients kept before the least recently used is dropped
+            **options: Options passed to every LMSClient created by the registry
+        """
+        self.max_clients = max_clients
+        self.options = options
+        self._clients: "OrderedDict[Tuple[str, str], LMSClient]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, base_url: str, api_key: str) -> LMSClient:
+        """
+        Get the client for a token, creating it on first use
+
+        Args:
+            base_url: Base URL for the LMS API
+            api_key: API token of the user
+
+        Returns:
+            LMS client for this token
+        """
+        key = (base_url, token_hash(api_key))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = LMSClient(base_url=base_url, api_key=api_key, **self.options)
+                self._clients[key] = client
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(key)
+            return client
+
+    def evict(self, base_url: str, api_key: str) -> None:
+        """
+        Drop the client of a token, e.g. after the token was changed
+
+        Args:
+            base_url: Base URL for the LMS API
+            api_key: API token whose client should be dropped
+        """
+        with self._lock:
+            self._clients.pop((base_url, token_hash(api_key)), None)
+
+    def clear(self) -> None:
+        """Drop all clients"""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
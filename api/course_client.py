@@ -1,12 +1,41 @@
 # api/course_client.py - Course API Client
-from typing import List, Dict, Any
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional
+import time
 import requests
 
 from api.base_client import BaseLMSClient
+from api.enrollment_index import EnrollmentIndex, enrollment_index as shared_enrollment_index
+from api.mirror import SourcedData, live
+
+# Default limits for checking many courses at once
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RESOLVE_DEADLINE = 10
+
+# Query parameters for listing a course roster with enrollments
+ROSTER_PARAMS = {"include[]": "enrollments", "enrollment_type[]": "student"}
+
+def is_teacher_course(course: Dict[str, Any]) -> bool:
+    """Check if the token's user is enrolled as a teacher in a course"""
+    return any(enrollment.get('type') == 'teacher' for enrollment in course.get('enrollments', []))
 
 class CourseClient(BaseLMSClient):
     """Client for course-related API endpoints"""
     
+    def __init__(self, base_url: str, api_key: str, enrollment_index: Optional[EnrollmentIndex] = None, **options: Any):
+        """
+        Initialize the course client
+        
+        Args:
+            base_url: Base URL for the LMS API
+            api_key: API key for authentication
+            enrollment_index: Enrollment index to use (defaults to the shared one)
+            **options: Connection options (see BaseLMSClient)
+        """
+        super().__init__(base_url, api_key, **options)
+        self.enrollment_index = enrollment_index or shared_enrollment_index
+    
     def get_courses(self) -> List[Dict[str, Any]]:
         """
         Get list of courses where the user is enrolled as a teacher
@@ -14,24 +43,41 @@ class CourseClient(BaseLMSClient):
         Returns:
             List of course objects
         """
+        return self.read_courses().data
+    
+    def read_courses(self) -> SourcedData:
+        """
+        Get the teacher's courses, from the local mirror if it has them
+        
+        Returns:
+            List of course objects, with their source and sync time
+        """
+        if self.mirror is not None:
+            courses = self.mirror.courses(self.base_url, self.token_key)
+            if courses is not None:
+                return courses
         
         try:
-            # Canvas LMS API endpoint for courses where the user is a teacher
-            courses = self.get("/users/self/favorites/courses")
-            
-            # Filter courses where the user is enrolled as a teacher
-            teacher_courses = []
-            for course in courses:
-                enrollments = course.get('enrollments', [])
-                for enrollment in enrollments:
-                    if enrollment.get('type') == 'teacher':
-                        teacher_courses.append(course)
-                        break
-            
-            return teacher_courses
+            return live(self.list_teacher_courses())
         except requests.exceptions.RequestException as e:
             print(f"Error fetching courses: {e}")
-            return []
+            return live([])
+    
+    def list_teacher_courses(self) -> List[Dict[str, Any]]:
+        """
+        Fetch the courses where the user is enrolled as a teacher from Canvas
+        
+        Returns:
+            List of course objects
+            
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        # Canvas LMS API endpoint for courses where the user is a teacher
+        courses = self.iter_items("/users/self/favorites/courses")
+        
+        # Filter courses where the user is enrolled as a teacher
+        return [course for course in courses if is_teacher_course(course)]
     
     def get_course(self, course_id: str) -> Dict[str, Any]:
         """
@@ -60,7 +106,7 @@ class CourseClient(BaseLMSClient):
             List of module objects
         """
         try:
-            return self.get(f"/courses/{course_id}/modules")
+            return list(self.iter_items(f"/courses/{course_id}/modules"))
         except requests.exceptions.RequestException as e:
             print(f"Error fetching modules for course {course_id}: {e}")
             return []
@@ -76,12 +122,68 @@ class CourseClient(BaseLMSClient):
             List of section objects
         """
         try:
-            return self.get(f"/courses/{course_id}/sections")
+            return list(self.iter_items(f"/courses/{course_id}/sections"))
         except requests.exceptions.RequestException as e:
             print(f"Error fetching sections for course {course_id}: {e}")
             return []
         
-    # Updated method for CourseClient class
+    def get_course_roster(self, course_id: str) -> List[Dict[str, Any]]:
+        """
+        Get all users of a course together with their enrollments
+        
+        Args:
+            course_id: ID of the course
+            
+        Returns:
+            List of user objects including enrollments
+            
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        return list(self.iter_items(f"/courses/{course_id}/users", ROSTER_PARAMS))
+    
+    def get_student_enrollment(self, course_id: str, student_email: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the active StudentEnrollment of an email in a course
+        
+        Uses the shared enrollment index, so the roster is only loaded once
+        per course until it expires. It is loaded from the local mirror when
+        that has the course, from Canvas otherwise.
+        
+        Args:
+            course_id: ID of the course
+            student_email: Email address of the student
+            
+        Returns:
+            Enrollment object, or None if the email is not an active student
+            
+        Raises:
+            requests.exceptions.RequestException: If the roster cannot be fetched
+        """
+        return self.enrollment_index.lookup(
+            self.base_url, course_id, student_email,
+            lambda: self.read_course_roster(course_id).data
+        )
+    
+    def read_course_roster(self, course_id: str) -> SourcedData:
+        """
+        Get the student roster of a course, from the local mirror if it has it
+        
+        Args:
+            course_id: ID of the course
+            
+        Returns:
+            List of user objects including enrollments, with their source and sync time
+            
+        Raises:
+            requests.exceptions.RequestException: If the roster cannot be fetched from Canvas
+        """
+        if self.mirror is not None:
+            roster = self.mirror.roster(self.base_url, course_id)
+            if roster is not None:
+                return roster
+        return live(self.get_course_roster(course_id))
+    
     def is_student_in_course_by_id(self, course_id: str, student_email: str) -> bool:
         """
         Check if a student with the given email is enrolled in the specified course
@@ -94,20 +196,65 @@ class CourseClient(BaseLMSClient):
             bool: True if the student is enrolled, False otherwise
         """
         try:
-            # The get method already returns the parsed JSON data
-            users = self.get(f"/courses/{course_id}/users?include[]=enrollments&per_page=200")
-            
-            # users is already a list of user objects
-            for user in users:
-                # Check the email field
-                if user.get("email") and user["email"].lower() == student_email.lower():
-                    # Verify they have a StudentEnrollment
-                    for enrollment in user.get("enrollments", []):
-                        if enrollment.get("type") == "StudentEnrollment" and enrollment.get("enrollment_state") == "active":
-                            return True
-                        
-            # If we get here, the student wasn't found or isn't actively enrolled
-            return False
+            return self.get_student_enrollment(course_id, student_email) is not None
         except requests.exceptions.RequestException as e:
             print(f"Error fetching students for course {course_id}: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def find_student_courses(self, student_email: str, courses: Optional[List[Dict[str, Any]]] = None,
+                             first_match: bool = False, max_workers: int = DEFAULT_MAX_WORKERS,
+                             deadline: float = DEFAULT_RESOLVE_DEADLINE) -> List[Dict[str, Any]]:
+        """
+        Find the courses a student is actively enrolled in
+        
+        Courses are checked in parallel on a bounded thread pool. Courses
+        whose check has not finished when the deadline passes are treated as
+        not enrolled.
+        
+        Args:
+            student_email: Email address of the student
+            courses: Courses to check (defaults to the teacher's courses)
+            first_match: Stop as soon as one enrolled course is found
+            max_workers: Maximum number of courses checked concurrently
+            deadline: Overall time limit in seconds
+            
+        Returns:
+            List of course objects the student is enrolled in, in the original order
+        """
+        if courses is None:
+            courses = self.get_courses()
+        if not courses:
+            return []
+        
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(courses)))
+        # Checks run in the caller's context, so stale reads are reported on its request
+        futures = {
+            executor.submit(contextvars.copy_context().run, self.is_student_in_course_by_id,
+                            course['id'], student_email): index
+            for index, course in enumerate(courses)
+        }
+        
+        matches = set()
+        pending = set(futures)
+        stop_at = time.monotonic() + deadline
+        try:
+            while pending:
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0:
+                    print(f"Timed out resolving courses for {student_email}, {len(pending)} not checked")
+                    break
+                
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.result():
+                        matches.add(futures[future])
+                
+                if first_match and matches:
+                    break
+        finally:
+            # Don't wait for checks nobody needs any more
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+        
+        return [courses[index] for index in sorted(matches)]
@@ -0,0 +1,115 @@
+# api/enrollment_index.py - In-process index of active student enrollments per course
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from api.cache import TTLCache
+
+# Default index settings
+DEFAULT_ENROLLMENT_TTL = 300
+DEFAULT_MAX_COURSES = 256
+
+
+class EnrollmentIndex:
+    """Maps lowercased student emails to their active StudentEnrollment, per course"""
+
+    def __init__(self, ttl: float = DEFAULT_ENROLLMENT_TTL, max_courses: int = DEFAULT_MAX_COURSES):
+        """
+        Initialize the enrollment index
+
+        Args:
+            ttl: Seconds before a course roster is fetched again
+            max_courses: Maximum number of course rosters kept in memory
+        """
+        self._rosters = TTLCache(max_entries=max_courses, ttl=ttl)
+
+    @staticmethod
+    def build(users: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Build an email index from a course roster
+
+        Args:
+            users: User objects including their enrollments
+
+        Returns:
+            Dictionary of lowercased email to active StudentEnrollment
+        """
+        index = {}
+        for user in users:
+            email = user.get("email")
+            if not email:
+                continue
+
+            for enrollment in user.get("enrollments", []):
+                if enrollment.get("type") == "StudentEnrollment" and enrollment.get("enrollment_state") == "active":
+                    index[email.lower()] = enrollment
+                    break
+
+        return index
+
+    def get_roster(self, base_url: str, course_id: str,
+                   loader: Callable[[], Iterable[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the email index for a course, building it from the roster if needed
+
+        Args:
+            base_url: Base URL of the LMS the course belongs to
+            course_id: ID of the course
+            loader: Function returning the course roster with enrollments
+
+        Returns:
+            Dictionary of lowercased email to active StudentEnrollment
+
+        Raises:
+            requests.exceptions.RequestException: If the roster cannot be fetched
+        """
+        return self._rosters.get_or_load((base_url, str(course_id)), lambda: self.build(loader()))
+
+    def lookup(self, base_url: str, course_id: str, email: str,
+               loader: Callable[[], Iterable[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """
+        Find the active StudentEnrollment for an email in a course
+
+        Args:
+            base_url: Base URL of the LMS the course belongs to
+            course_id: ID of the course
+            email: Student email address (case-insensitive)
+            loader: Function returning the course roster with enrollments
+
+        Returns:
+            The enrollment object, or None if the email is not an active student
+
+        Raises:
+            requests.exceptions.RequestException: If the roster cannot be fetched
+        """
+        return self.get_roster(base_url, course_id, loader).get(email.lower())
+
+    def peek(self, base_url: str, course_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Get the email index of a course without fetching the roster
+
+        Returns:
+            Dictionary of lowercased email to active StudentEnrollment, or None if not cached
+        """
+        return self._rosters.get((base_url, str(course_id)))
+
+    def put(self, base_url: str, course_id: str, users: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Index a roster fetched elsewhere (e.g. by the async client)
+
+        Returns:
+            Dictionary of lowercased email to active StudentEnrollment
+        """
+        index = self.build(users)
+        self._rosters.set((base_url, str(course_id)), index)
+        return index
+
+    def invalidate(self, base_url: str, course_id: str) -> None:
+        """Drop the cached roster of a course so the next lookup rebuilds it"""
+        self._rosters.pop((base_url, str(course_id)))
+
+    def clear(self) -> None:
+        """Drop all cached rosters"""
+        self._rosters.clear()
+
+
+# Index shared by all course clients in the process
+enrollment_index = EnrollmentIndex()
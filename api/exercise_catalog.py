@@ -0,0 +1,72 @@
+# api/exercise_catalog.py - In-process catalog of the exercises students can open, per course
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple
+
+from api.cache import TTLCache
+
+# Default catalog settings
+DEFAULT_EXERCISE_TTL = 300
+DEFAULT_MAX_COURSES = 256
+
+
+class CourseExercises(NamedTuple):
+    """Published exercises of a course and the set of their IDs"""
+    exercises: List[Dict[str, Any]]
+    ids: FrozenSet[str]
+
+
+class ExerciseCatalog:
+    """Caches the normalized, published exercises of each course"""
+
+    def __init__(self, ttl: float = DEFAULT_EXERCISE_TTL, max_courses: int = DEFAULT_MAX_COURSES):
+        """
+        Initialize the exercise catalog
+
+        Args:
+            ttl: Seconds before a course's exercises are fetched again
+            max_courses: Maximum number of courses kept in memory
+        """
+        self._courses = TTLCache(max_entries=max_courses, ttl=ttl)
+
+    @staticmethod
+    def build(exercises: Iterable[Dict[str, Any]]) -> CourseExercises:
+        """
+        Build a catalog entry from normalized exercises, keeping published ones only
+
+        Args:
+            exercises: Normalized exercise objects
+
+        Returns:
+            Published exercises and the set of their IDs (as strings)
+        """
+        published = [exercise for exercise in exercises if exercise.get('status') == 'Active']
+        return CourseExercises(published, frozenset(str(exercise['id']) for exercise in published))
+
+    def get_course(self, base_url: str, course_id: str,
+                   loader: Callable[[], Iterable[Dict[str, Any]]]) -> CourseExercises:
+        """
+        Get the catalog entry of a course, loading it if needed
+
+        Args:
+            base_url: Base URL of the LMS the course belongs to
+            course_id: ID of the course
+            loader: Function returning the course's normalized exercises
+
+        Returns:
+            Published exercises and the set of their IDs
+
+        Raises:
+            requests.exceptions.RequestException: If the exercises cannot be fetched
+        """
+        return self._courses.get_or_load((base_url, str(course_id)), lambda: self.build(loader()))
+
+    def invalidate(self, base_url: str, course_id: str) -> None:
+        """Drop the cached exercises of a course so the next lookup reloads them"""
+        self._courses.pop((base_url, str(course_id)))
+
+    def clear(self) -> None:
+        """Drop all cached exercises"""
+        self._courses.clear()
+
+
+# Catalog shared by all assignment clients in the process
+exercise_catalog = ExerciseCatalog()
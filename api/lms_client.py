@@ -1,31 +1,86 @@
 # api/lms_client.py - Main LMS Client that combines all specific clients
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 from api.base_client import BaseLMSClient
+from api.enrollment_index import EnrollmentIndex
+from api.exercise_catalog import ExerciseCatalog
 from api.course_client import CourseClient
 from api.assignment_client import AssignmentClient
-from api.student_client import StudentClient
+from api.student_client import StudentClient, DEFAULT_LOOKUP_DENIED_TTL
 from api.auth_client import AuthClient
+from api.async_base_client import AsyncTransport
+from api.async_lms_client import AsyncLMSClient
+
+# Options of the sync clients that the async client shares
+ASYNC_CLIENT_OPTIONS = ('page_size', 'response_cache', 'mirror', 'rate_limiter', 'max_retries', 'circuit_breaker')
 
 class LMSClient:
     """Main client for interacting with LMS API"""
     
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(self, base_url: str, api_key: str, enrollment_index: Optional[EnrollmentIndex] = None,
+                 exercise_catalog: Optional[ExerciseCatalog] = None,
+                 async_transport: Optional[AsyncTransport] = None,
+                 lookup_denied_ttl: float = DEFAULT_LOOKUP_DENIED_TTL, **options: Any):
         """
         Initialize the LMS API client
         
         Args:
             base_url: Base URL for the LMS API
             api_key: API key for authentication
+            enrollment_index: Enrollment index used for student membership checks
+            exercise_catalog: Catalog of the published exercises per course
+            async_transport: Event loop and connection pool of an AsyncLMSClient
+                that checks course rosters concurrently (threads if None)
+            lookup_denied_ttl: Seconds a user lookup refused to this token is
+                skipped, going straight to the roster check
+            **options: Connection options shared by all clients
+                (pool_size, timeout, keep_alive, page_size)
         """
         # Initialize base client
-        self.base_client = BaseLMSClient(base_url, api_key)
+        self.base_client = BaseLMSClient(base_url, api_key, **options)
+        
+        # Initialize specific clients (all share the same connection pool)
+        self.courses = CourseClient(base_url, api_key, enrollment_index, **options)
+        self.assignments = AssignmentClient(base_url, api_key, exercise_catalog, **options)
+        self.users = StudentClient(base_url, api_key, lookup_denied_ttl, **options)
+        self.auth = AuthClient(base_url, api_key, **options)
+        
+        self.async_client = None
+        if async_transport is not None:
+            self.async_client = AsyncLMSClient(
+                base_url, api_key, async_transport, self.courses.enrollment_index,
+                **{name: options[name] for name in ASYNC_CLIENT_OPTIONS if name in options}
+            )
+        
+    def find_student_courses(self, student_email: str, first_match: bool = False) -> List[Dict[str, Any]]:
+        """
+        Find the teacher's courses a student is actively enrolled in
+        
+        Looks the student's enrollments up directly and intersects them with
+        the teacher's courses. Falls back to checking each course roster when
+        the token is not allowed to look users up, in one pass of the async
+        client if it is enabled.
+        
+        Args:
+            student_email: Email address of the student
+            first_match: Only the roster fallback: stop at the first enrolled course
+            
+        Returns:
+            List of course objects the student is enrolled in
+        """
+        courses = self.courses.get_courses()
+        if not courses:
+            return []
+        
+        course_ids = self.users.find_student_course_ids(student_email)
+        if course_ids is None:
+            if self.async_client is not None:
+                return self.async_client.run(
+                    self.async_client.courses.find_student_courses(student_email, courses, first_match=first_match)
+                )
+            return self.courses.find_student_courses(student_email, courses, first_match=first_match)
         
-        # Initialize specific clients
-        self.courses = CourseClient(base_url, api_key)
-        self.assignments = AssignmentClient(base_url, api_key)
-        self.users = StudentClient(base_url, api_key)
-        self.auth = AuthClient(base_url, api_key)
+        return [course for course in courses if str(course['id']) in course_ids]
         
     # Legacy methods for backward compatibility
     def get_courses(self):
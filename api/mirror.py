@@ -0,0 +1,67 @@
+# api/mirror.py - Interface between the clients and a local mirror of Canvas data
+from datetime import datetime
+from typing import Any, List, Dict, NamedTuple, Optional
+
+# Where data returned by a local-first read came from
+SOURCE_MIRROR = "mirror"
+SOURCE_CANVAS = "canvas"
+
+
+class SourcedData(NamedTuple):
+    """Data returned by a local-first read, with where it came from and how fresh it is"""
+    data: Any
+    source: str
+    synced_at: Optional[datetime] = None
+
+
+class CanvasMirror:
+    """
+    Read side of a local mirror of Canvas data
+
+    Clients given a mirror answer from it first ("local-first") and only
+    call Canvas when it returns None, i.e. when it has not synced the data
+    recently enough. models/canvas_mirror.py provides the database-backed
+    implementation; this base class mirrors nothing.
+    """
+
+    def courses(self, base_url: str, token_key: str) -> Optional[SourcedData]:
+        """
+        Get the mirrored teacher courses of a token
+
+        Args:
+            base_url: Base URL of the LMS
+            token_key: Hash of the token the courses were listed with
+
+        Returns:
+            List of course objects, or None on a miss
+        """
+        return None
+
+    def assignments(self, base_url: str, course_id: str) -> Optional[SourcedData]:
+        """
+        Get the mirrored assignments of a course
+
+        Returns:
+            List of Canvas assignment objects, or None on a miss
+        """
+        return None
+
+    def roster(self, base_url: str, course_id: str) -> Optional[SourcedData]:
+        """
+        Get the mirrored student roster of a course
+
+        Returns:
+            List of user objects including their active StudentEnrollment,
+            or None on a miss
+        """
+        return None
+
+
+def live(data: Any) -> SourcedData:
+    """Wrap data fetched from Canvas"""
+    return SourcedData(data, SOURCE_CANVAS)
+
+
+def mirrored(data: List[Dict[str, Any]], synced_at: datetime) -> SourcedData:
+    """Wrap data read from the mirror"""
+    return SourcedData(data, SOURCE_MIRROR, synced_at)
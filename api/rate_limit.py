@@ -0,0 +1,239 @@
+# api/rate_limit.py - Adaptive throttle driven by the Canvas rate limit headers
+import random
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+import requests
+
+# Canvas meters each token with a leaky bucket (700 units by default)
+DEFAULT_BUCKET_SIZE = 700.0
+# Budget below which requests are slowed down
+DEFAULT_LOW_WATER = 200.0
+# Units per second assumed to flow back into the bucket
+DEFAULT_REFILL_RATE = 10.0
+# Longest a request is slowed down while budget is left
+DEFAULT_MAX_DELAY = 5.0
+# Longest a request waits for an empty bucket to refill
+DEFAULT_MAX_WAIT = 30.0
+
+# Default retry settings for idempotent requests
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 8.0
+
+# Methods that are retried, and the statuses worth retrying them on
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def is_rate_limited(response: requests.Response) -> bool:
+    """Check if Canvas refused a request because the token's bucket is empty"""
+    return is_rate_limited_status(response.status_code, response.content)
+
+
+def is_rate_limited_status(status: int, body: bytes) -> bool:
+    """Check a response given as status code and body (see is_rate_limited)"""
+    if status == 429:
+        return True
+    return status == 403 and b"Rate Limit Exceeded" in body
+
+
+def should_retry(response: requests.Response) -> bool:
+    """Check if a response to an idempotent request is worth retrying"""
+    return should_retry_status(response.status_code, response.content)
+
+
+def should_retry_status(status: int, body: bytes) -> bool:
+    """Check a response given as status code and body (see should_retry)"""
+    return status in RETRY_STATUSES or is_rate_limited_status(status, body)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None,
+                  base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_CAP) -> float:
+    """
+    Get how long to wait before retrying
+
+    Uses exponential backoff with full jitter, so clients throttled at the
+    same moment don't retry in lockstep. A numeric Retry-After header wins.
+
+    Args:
+        attempt: Number of retries already made (0 for the first retry)
+        retry_after: Retry-After header of the response, if any
+        base: Delay ceiling of the first retry in seconds
+        cap: Largest delay ceiling in seconds
+
+    Returns:
+        Seconds to wait
+    """
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), cap)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBudget:
+    """What is known about one token's rate limit bucket"""
+
+    def __init__(self):
+        self.remaining: Optional[float] = None
+        self.request_cost: Optional[float] = None
+        self.updated_at = time.monotonic()
+        self.requests = 0
+        self.rate_limited = 0
+        self.delayed_seconds = 0.0
+
+
+class RateLimiter:
+    """
+    Tracks the remaining Canvas budget of each token across threads
+
+    Every response updates the token's budget from X-Rate-Limit-Remaining
+    and X-Request-Cost. Before a request, the budget is estimated (refilling
+    since the last response, minus the expected cost of requests in flight).
+    Below `low_water` the request is delayed in proportion to the shortfall,
+    so the bucket is not drained by a burst of logins; once the budget can't
+    cover the request, it waits for the bucket to refill.
+    """
+
+    def __init__(self, low_water: float = DEFAULT_LOW_WATER, refill_rate: float = DEFAULT_REFILL_RATE,
+                 max_delay: float = DEFAULT_MAX_DELAY, max_wait: float = DEFAULT_MAX_WAIT,
+                 bucket_size: float = DEFAULT_BUCKET_SIZE):
+        """
+        Initialize the rate limiter
+
+        Args:
+            low_water: Budget below which requests are slowed down
+            refill_rate: Units per second assumed to flow back into the bucket
+            max_delay: Longest a request is slowed down while budget is left, in seconds
+            max_wait: Longest a request waits for an empty bucket, in seconds
+            bucket_size: Size of a full bucket
+        """
+        self.low_water = low_water
+        self.refill_rate = refill_rate
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.bucket_size = bucket_size
+        self._budgets: Dict[str, TokenBudget] = {}
+        self._lock = threading.Lock()
+
+    def _estimate(self, budget: TokenBudget, now: float) -> Optional[float]:
+        """Estimate the current budget; the caller holds the lock"""
+        if budget.remaining is None:
+            return None
+        refilled = budget.remaining + (now - budget.updated_at) * self.refill_rate
+        return min(self.bucket_size, refilled)
+
+    def acquire(self, token_key: str) -> float:
+        """
+        Wait until a token may send a request, and reserve its expected cost
+
+        Args:
+            token_key: Hash of the token
+
+        Returns:
+            Seconds the request was delayed
+        """
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                budget = self._budgets.setdefault(token_key, TokenBudget())
+                estimate = self._estimate(budget, now)
+                cost = budget.request_cost or 0.0
+
+                if estimate is not None and estimate < cost and waited < self.max_wait:
+                    # Not enough budget for this request: wait for the bucket to refill
+                    delay = min(self.max_wait - waited, (cost - estimate) / self.refill_rate)
+                    ready = False
+                else:
+                    delay = 0.0
+                    if estimate is not None and estimate < self.low_water and not waited:
+                        delay = min(self.max_delay, (self.low_water - estimate) / self.refill_rate)
+                    if estimate is not None:
+                        # Count the request against the budget until its response tells the real cost
+                        budget.remaining = estimate - cost
+                        budget.updated_at = now
+                    budget.requests += 1
+                    ready = True
+                budget.delayed_seconds += delay
+
+            if delay > 0:
+                time.sleep(delay)
+                waited += delay
+            if ready:
+                return waited
+
+    def record(self, token_key: str, response: requests.Response) -> None:
+        """
+        Update a token's budget from a Canvas response
+
+        Args:
+            token_key: Hash of the token
+            response: Response to a request made with the token
+        """
+        self.update(token_key, response.status_code, response.headers, response.content)
+
+    def update(self, token_key: str, status: int, headers: Mapping[str, str], body: bytes) -> None:
+        """
+        Update a token's budget from a Canvas response given as its parts
+
+        Args:
+            token_key: Hash of the token
+            status: Status code of the response
+            headers: Response headers
+            body: Response body
+        """
+        remaining = _float_header(headers, "X-Rate-Limit-Remaining")
+        cost = _float_header(headers, "X-Request-Cost")
+        limited = is_rate_limited_status(status, body)
+
+        with self._lock:
+            budget = self._budgets.setdefault(token_key, TokenBudget())
+            if cost is not None:
+                # Smooth the cost so one expensive request doesn't dominate
+                budget.request_cost = cost if budget.request_cost is None else 0.8 * budget.request_cost + 0.2 * cost
+            if limited:
+                budget.rate_limited += 1
+                remaining = 0.0
+            if remaining is not None:
+                budget.remaining = remaining
+                budget.updated_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the current budget of every token seen
+
+        Returns:
+            Dictionary of token hash prefix to its estimated remaining budget,
+            smoothed request cost and counters
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                token_key[:12]: {
+                    "remaining": None if (estimate := self._estimate(budget, now)) is None else round(estimate, 1),
+                    "request_cost": None if budget.request_cost is None else round(budget.request_cost, 2),
+                    "requests": budget.requests,
+                    "rate_limited": budget.rate_limited,
+                    "delayed_seconds": round(budget.delayed_seconds, 2),
+                }
+                for token_key, budget in self._budgets.items()
+            }
+
+
+def _float_header(headers: Mapping[str, str], name: str) -> Optional[float]:
+    """Read a numeric response header"""
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+# Rate limiter shared by all clients in the process
+rate_limiter = RateLimiter()
@@ -0,0 +1,190 @@
+# api/response_cache.py - Conditional-request cache for Canvas GET responses
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Default TTLs (seconds) of endpoints that rarely change; other endpoints are not cached
+DEFAULT_TTLS = {
+    "/users/self/favorites/courses": 120,
+    "/courses/:id": 600,
+    "/courses/:id/assignments": 300,
+    "/courses/:id/assignments/:id": 300,
+    "/courses/:id/sections": 600,
+    "/courses/:id/modules": 600,
+}
+
+# Default memory bound of the cached response bodies
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+_ID_SEGMENT = re.compile(r"/(\d+|sis_[a-z_]+:[^/]+)(?=/|$)")
+
+
+def endpoint_template(path: str) -> str:
+    """
+    Normalize an endpoint path by replacing object IDs with ':id'
+
+    Args:
+        path: Endpoint path, e.g. /courses/42/assignments
+
+    Returns:
+        Endpoint template, e.g. /courses/:id/assignments
+    """
+    return _ID_SEGMENT.sub("/:id", path)
+
+
+class CachedResponse:
+    """A cached response body with its validators"""
+
+    __slots__ = ("data", "next_url", "etag", "last_modified", "expires_at", "size")
+
+    def __init__(self, data: Any, next_url: Optional[str], etag: Optional[str],
+                 last_modified: Optional[str], expires_at: float, size: int):
+        self.data = data
+        self.next_url = next_url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.size = size
+
+    @property
+    def is_fresh(self) -> bool:
+        """Whether the entry can be served without asking Canvas"""
+        return self.expires_at > time.monotonic()
+
+    @property
+    def has_validators(self) -> bool:
+        """Whether the entry can be revalidated with a conditional request"""
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers that turn a GET into a conditional request for this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of parsed GET responses with per-endpoint TTLs
+
+    Fresh entries are served directly. Expired entries that carry an ETag or
+    Last-Modified validator are revalidated, so an unchanged resource only
+    costs a 304. Cached data is shared between callers and must not be
+    modified.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache
+
+        Args:
+            ttls: Mapping of endpoint template (see endpoint_template) to TTL in seconds
+            max_bytes: Maximum total size of the cached response bodies
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "revalidations": 0, "not_modified": 0, "evictions": 0}
+
+    def ttl_for(self, path: str) -> Optional[float]:
+        """
+        Get the TTL of an endpoint
+
+        Args:
+            path: Endpoint path (without base URL or query string)
+
+        Returns:
+            TTL in seconds, or None if the endpoint is not cached
+        """
+        return self.ttls.get(endpoint_template(path))
+
+    def lookup(self, key: Hashable) -> Optional[CachedResponse]:
+        """
+        Get an entry, fresh or not, and count a hit or miss
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The entry, or None if the key is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if entry.is_fresh:
+                self._stats["hits"] += 1
+            else:
+                self._stats["revalidations"] += 1
+            return entry
+
+    def store(self, key: Hashable, data: Any, next_url: Optional[str], etag: Optional[str],
+              last_modified: Optional[str], ttl: float, size: int) -> None:
+        """
+        Store a response, evicting least recently used entries to stay in bounds
+
+        Args:
+            key: Cache key
+            data: Parsed response body
+            next_url: URL of the next page, if any
+            etag: ETag validator of the response
+            last_modified: Last-Modified validator of the response
+            ttl: Time to live in seconds
+            size: Size of the response body in bytes
+        """
+        if size > self.max_bytes:
+            return
+
+        entry = CachedResponse(data, next_url, etag, last_modified, time.monotonic() + ttl, size)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._stats["evictions"] += 1
+
+    def mark_not_modified(self, key: Hashable, ttl: float) -> None:
+        """
+        Extend the lifetime of an entry after Canvas answered 304 Not Modified
+
+        Args:
+            key: Cache key
+            ttl: Time to live in seconds
+        """
+        with self._lock:
+            self._stats["not_modified"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = time.monotonic() + ttl
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics for tuning TTLs
+
+        Returns:
+            Hit, miss, revalidation, 304 and eviction counts plus current size
+        """
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes,
+                        max_bytes=self.max_bytes, ttls=dict(self.ttls))
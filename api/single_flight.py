@@ -0,0 +1,82 @@
+# api/single_flight.py - Coalescing of identical concurrent Canvas GETs
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """An in-flight call and the outcome its waiters receive"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time and shares its outcome
+
+    A thread asking for a key that is already in flight waits for that call
+    instead of starting its own, then receives the same result (or the same
+    exception). Nothing is kept once the call finishes, so this only
+    deduplicates bursts; caching is left to ResponseCache. Shared results
+    must not be modified.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "shared": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Call fn, or wait for the in-flight call with the same key
+
+        Args:
+            key: Identity of the call
+            fn: Function making the call
+
+        Returns:
+            The result of fn, possibly from another thread's call
+
+        Raises:
+            Exception: Whatever fn raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["calls"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing statistics
+
+        Returns:
+            Dictionary with the number of calls made, calls answered by
+            another thread's call, and calls currently in flight
+        """
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
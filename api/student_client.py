@@ -1,12 +1,61 @@
 # api/student_client.py - Student API Client
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
+from urllib.parse import quote
+import time
 import requests
 
 from api.base_client import BaseLMSClient
+from api.rate_limit import is_rate_limited
+
+# Seconds a token refused a user lookup goes straight to the roster fallback
+DEFAULT_LOOKUP_DENIED_TTL = 600
+
+# User lookups a token may be refused, remembered separately
+LOGIN_ID_LOOKUP = "login_id"
+USER_SEARCH = "user_search"
+USER_ENROLLMENTS = "user_enrollments"
+
+def is_permission_denied(error: requests.exceptions.RequestException) -> bool:
+    """Check if Canvas refused a request because the token lacks the permission"""
+    response = getattr(error, "response", None)
+    return (response is not None and response.status_code in (401, 403)
+            and not is_rate_limited(response))
 
 class StudentClient(BaseLMSClient):
     """Client for student-related API endpoints"""
     
+    def __init__(self, base_url: str, api_key: str, lookup_denied_ttl: float = DEFAULT_LOOKUP_DENIED_TTL,
+                 **options: Any):
+        """
+        Initialize the student client
+        
+        Args:
+            base_url: Base URL for the LMS API
+            api_key: API key for authentication
+            lookup_denied_ttl: Seconds before a user lookup refused to this
+                token is tried again (never remembered if 0)
+            **options: Connection options (see BaseLMSClient)
+        """
+        super().__init__(base_url, api_key, **options)
+        self.lookup_denied_ttl = lookup_denied_ttl
+        # Monotonic time until which each refused lookup is skipped
+        self._denied_until: Dict[str, float] = {}
+    
+    def is_lookup_denied(self, lookup: str) -> bool:
+        """Check if a user lookup was recently refused to this token"""
+        return self._denied_until.get(lookup, 0.0) > time.monotonic()
+    
+    def deny_lookup(self, lookup: str) -> None:
+        """Remember that a user lookup was refused to this token"""
+        if self.lookup_denied_ttl > 0:
+            self._denied_until[lookup] = time.monotonic() + self.lookup_denied_ttl
+    
+    def can_find_student_courses(self) -> bool:
+        """Check if find_student_course_ids is worth trying with this token"""
+        if self.is_lookup_denied(USER_ENROLLMENTS):
+            return False
+        return not (self.is_lookup_denied(LOGIN_ID_LOOKUP) and self.is_lookup_denied(USER_SEARCH))
+    
     def get_self(self) -> Dict[str, Any]:
         """
         Get information about the current student
@@ -52,7 +101,7 @@ class StudentClient(BaseLMSClient):
             if enrollment_type:
                 params["enrollment_type"] = enrollment_type
                 
-            return self.get(f"/courses/{course_id}/students", params)
+            return list(self.iter_items(f"/courses/{course_id}/students", params))
         except requests.exceptions.RequestException as e:
             print(f"Error fetching students for course {course_id}: {e}")
             return []
@@ -68,7 +117,101 @@ class StudentClient(BaseLMSClient):
             List of enrollment objects
         """
         try:
-            return self.get(f"/students/{student_id}/enrollments")
+            return list(self.iter_items(f"/students/{student_id}/enrollments"))
         except requests.exceptions.RequestException as e:
             print(f"Error fetching enrollments for student {student_id}: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    def find_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve an email address to a Canvas user
+        
+        Tries a direct login ID lookup first and falls back to searching
+        the account's users. A lookup the token is refused is skipped for
+        the next lookup_denied_ttl seconds.
+        
+        Args:
+            email: Email address (or login ID) of the user
+            
+        Returns:
+            User object, or None if no user has this email
+            
+        Raises:
+            requests.exceptions.RequestException: If neither lookup is permitted or the request fails
+        """
+        email = email.strip().lower()
+        
+        if not self.is_lookup_denied(LOGIN_ID_LOOKUP):
+            try:
+                return self.get(f"/users/sis_login_id:{quote(email, safe='@')}")
+            except requests.exceptions.HTTPError as e:
+                # Not found, or the token may not look users up by login ID
+                if is_permission_denied(e):
+                    self.deny_lookup(LOGIN_ID_LOOKUP)
+                elif e.response is None or e.response.status_code != 404:
+                    raise
+        
+        try:
+            # Account users only carry their email when it is asked for
+            for user in self.iter_items("/accounts/self/users", {"search_term": email, "include[]": "email"}):
+                candidates = (user.get("email"), user.get("login_id"))
+                if any(value and value.lower() == email for value in candidates):
+                    return user
+        except requests.exceptions.HTTPError as e:
+            if is_permission_denied(e):
+                self.deny_lookup(USER_SEARCH)
+            raise
+        return None
+    
+    def get_user_course_ids(self, user_id: str) -> Set[str]:
+        """
+        Get the IDs of the courses a user is actively enrolled in as a student
+        
+        Args:
+            user_id: ID of the user
+            
+        Returns:
+            Set of course IDs (as strings)
+            
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        enrollments = self.iter_items(
+            f"/users/{user_id}/enrollments",
+            {"type[]": "StudentEnrollment", "state[]": "active"}
+        )
+        try:
+            return {str(enrollment.get("course_id")) for enrollment in enrollments}
+        except requests.exceptions.HTTPError as e:
+            if is_permission_denied(e):
+                self.deny_lookup(USER_ENROLLMENTS)
+            raise
+    
+    def find_student_course_ids(self, email: str) -> Optional[Set[str]]:
+        """
+        Get the IDs of the courses a student email is actively enrolled in
+        
+        Costs a constant number of paginated calls regardless of how many
+        courses or students there are, and none while the token's lookups
+        are known to be refused.
+        
+        Args:
+            email: Email address of the student
+            
+        Returns:
+            Set of course IDs (as strings), or None if the lookup is not
+            available to this token or does not resolve the email, and
+            rosters must be checked instead
+        """
+        if not self.can_find_student_courses():
+            return None
+        
+        try:
+            user = self.find_user_by_email(email)
+            if user is None:
+                # The roster check matches emails Canvas did not resolve
+                return None
+            return self.get_user_course_ids(user["id"])
+        except requests.exceptions.RequestException as e:
+            print(f"Error looking up courses for student {email}: {e}")
+            return None
@@ -1,20 +1,80 @@
 # app.py - Flask application entry point
 import base64
-from urllib.parse import urljoin
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, Response, make_response
+import hmac
+import math
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, Response, make_response, stream_with_context, g
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 import os
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from functools import wraps
+from werkzeug.utils import secure_filename
+import json
+import click
 import requests
+from sqlalchemy.exc import SQLAlchemyError
 
 # Import our modules
 from api.lms_client import LMSClient
+from api.base_client import DEFAULT_POOL_SIZE, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, DEFAULT_PAGE_SIZE
+from api.enrollment_index import EnrollmentIndex, DEFAULT_ENROLLMENT_TTL, DEFAULT_MAX_COURSES
+from api.exercise_catalog import ExerciseCatalog, DEFAULT_EXERCISE_TTL
+from api.client_registry import ClientRegistry, DEFAULT_MAX_CLIENTS
+from api.student_client import DEFAULT_LOOKUP_DENIED_TTL
+from api.response_cache import ResponseCache, DEFAULT_TTLS, DEFAULT_MAX_BYTES
+from api.single_flight import SingleFlight
+from api.async_base_client import AsyncTransport, DEFAULT_MAX_CONCURRENCY
+from api.circuit_breaker import (
+    CircuitBreaker, OPEN, DEFAULT_FAILURE_THRESHOLD, DEFAULT_RESET_TIMEOUT, DEFAULT_STALE_MAX_BYTES,
+    begin_stale_tracking, stale_reads
+)
+from api.rate_limit import (
+    RateLimiter, DEFAULT_LOW_WATER, DEFAULT_REFILL_RATE, DEFAULT_MAX_DELAY, DEFAULT_MAX_WAIT, DEFAULT_MAX_RETRIES
+)
 from models.user import db, User, initialize_db
+from monitoring.metrics import (
+    registry as metrics_registry, CONTENT_TYPE as METRICS_CONTENT_TYPE, HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+)
 from config.settings import load_config
 from api.course_client import CourseClient
-from models.exercise import log_exercise_attempt, complete_exercise_attempt, get_student_exercise_attempts
+from models.exercise import (
+    log_exercise_attempt,
+    complete_exercise_attempt,
+    complete_exercise_attempts,
+    get_student_exercise_attempts,
+    get_course_attempts,
+    get_course_progress_summary,
+    ATTEMPT_PAGE_SIZE,
+    MAX_ATTEMPT_PAGE_SIZE,
+    get_student_exercise_summaries,
+    get_course_exercise_summaries,
+    find_summary_mismatches,
+    rebuild_exercise_summaries,
+    PROGRESS_GROUPINGS
+)
+from models.export import EXPORT_FORMATS, stream_export
+from models.canvas_mirror import (
+    DatabaseMirror,
+    MirrorSync,
+    DEFAULT_SYNC_INTERVAL as MIRROR_SYNC_INTERVAL,
+    DEFAULT_MAX_AGE as MIRROR_MAX_AGE
+)
+from models.migrations import run_migrations
+from models.query_plans import print_query_plans
+from proxy.reverse_proxy import (
+    ReverseProxy,
+    DEFAULT_POOL_SIZE as PROXY_POOL_SIZE,
+    DEFAULT_CHUNK_SIZE as PROXY_CHUNK_SIZE,
+    DEFAULT_CONNECT_TIMEOUT as PROXY_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT as PROXY_READ_TIMEOUT
+)
+from proxy.asset_cache import (
+    AssetCache,
+    DEFAULT_MEMORY_BYTES as PROXY_CACHE_MEMORY_BYTES,
+    DEFAULT_MAX_OBJECT_BYTES as PROXY_CACHE_MAX_OBJECT_BYTES,
+    DEFAULT_DISK_BYTES as PROXY_CACHE_DISK_BYTES
+)
 
 # Load environment variables
 load_dotenv()
@@ -38,10 +98,138 @@ login_manager.login_view = 'login'
 # Load configuration
 config = load_config()
 
+# Shared cache for Juice Shop static assets (memory, optionally also on disk)
+proxy_cache = None
+if os.getenv('PROXY_CACHE_ENABLED', 'true').lower() == 'true':
+    proxy_cache = AssetCache(
+        max_memory_bytes=int(os.getenv('PROXY_CACHE_MEMORY_BYTES', PROXY_CACHE_MEMORY_BYTES)),
+        max_object_bytes=int(os.getenv('PROXY_CACHE_MAX_OBJECT_BYTES', PROXY_CACHE_MAX_OBJECT_BYTES)),
+        disk_dir=os.getenv('PROXY_CACHE_DIR') or None,
+        max_disk_bytes=int(os.getenv('PROXY_CACHE_DISK_BYTES', PROXY_CACHE_DISK_BYTES))
+    )
+
+# Streaming reverse proxy to Juice Shop with a persistent connection pool
+PROXY_METHODS = ['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS']
+juice_shop_proxy = ReverseProxy(
+    target_url=os.getenv('JUICE_SHOP_URL'),
+    pool_size=int(os.getenv('PROXY_POOL_SIZE', PROXY_POOL_SIZE)),
+    chunk_size=int(os.getenv('PROXY_CHUNK_SIZE', PROXY_CHUNK_SIZE)),
+    timeout=(
+        float(os.getenv('PROXY_CONNECT_TIMEOUT', PROXY_CONNECT_TIMEOUT)),
+        float(os.getenv('PROXY_READ_TIMEOUT', PROXY_READ_TIMEOUT))
+    ),
+    cache=proxy_cache
+)
+
+# Connection pool settings shared by every LMS client
+api_config = config.get('api', {})
+
+# Optional cache of Canvas GET responses, revalidated with ETags
+cache_config = api_config.get('response_cache', {})
+response_cache = None
+if cache_config.get('enabled'):
+    response_cache = ResponseCache(
+        ttls=dict(DEFAULT_TTLS, **cache_config.get('ttls', {})),
+        max_bytes=int(cache_config.get('max_bytes', DEFAULT_MAX_BYTES))
+    )
+
+# Canvas budget of each token, shared by all clients so concurrent
+# requests slow down together before Canvas starts refusing them
+rate_limit_config = api_config.get('rate_limit', {})
+rate_limiter = RateLimiter(
+    low_water=float(rate_limit_config.get('low_water', DEFAULT_LOW_WATER)),
+    refill_rate=float(rate_limit_config.get('refill_rate', DEFAULT_REFILL_RATE)),
+    max_delay=float(rate_limit_config.get('max_delay', DEFAULT_MAX_DELAY)),
+    max_wait=float(rate_limit_config.get('max_wait', DEFAULT_MAX_WAIT))
+)
+
+# Concurrent identical GETs of a token share one upstream request
+single_flight = SingleFlight() if api_config.get('coalesce_requests', True) else None
+
+# Fails Canvas calls fast per endpoint family while Canvas is unhealthy,
+# serving the last good responses instead
+breaker_config = api_config.get('circuit_breaker', {})
+circuit_breaker = None
+stale_cache = None
+if breaker_config.get('enabled', True):
+    circuit_breaker = CircuitBreaker(
+        failure_threshold=int(breaker_config.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD)),
+        reset_timeout=float(breaker_config.get('reset_timeout', DEFAULT_RESET_TIMEOUT))
+    )
+    if response_cache is None:
+        # No endpoint has a TTL, so responses are only kept as the outage fallback
+        stale_cache = ResponseCache(
+            ttls={},
+            max_bytes=int(breaker_config.get('stale_max_bytes', DEFAULT_STALE_MAX_BYTES))
+        )
+
+# Event loop thread and aiohttp pool shared by all async clients; they
+# check course rosters concurrently when a student can't be looked up
+async_config = api_config.get('async_client', {})
+async_transport = None
+if async_config.get('enabled', True):
+    async_transport = AsyncTransport(
+        pool_size=int(api_config.get('pool_size', DEFAULT_POOL_SIZE)),
+        timeout=(
+            float(api_config.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT)),
+            float(api_config.get('read_timeout', DEFAULT_READ_TIMEOUT))
+        ),
+        keep_alive=bool(api_config.get('keep_alive', True)),
+        max_concurrency=int(async_config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY))
+    )
+
+client_options = {
+    'pool_size': int(api_config.get('pool_size', DEFAULT_POOL_SIZE)),
+    'timeout': (
+        float(api_config.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT)),
+        float(api_config.get('read_timeout', DEFAULT_READ_TIMEOUT))
+    ),
+    'keep_alive': bool(api_config.get('keep_alive', True)),
+    'async_transport': async_transport,
+    'lookup_denied_ttl': float(api_config.get('user_lookup_denied_ttl', DEFAULT_LOOKUP_DENIED_TTL)),
+    'page_size': int(api_config.get('page_size', DEFAULT_PAGE_SIZE)),
+    'response_cache': response_cache or stale_cache,
+    'rate_limiter': rate_limiter,
+    'max_retries': int(rate_limit_config.get('max_retries', DEFAULT_MAX_RETRIES)),
+    'single_flight': single_flight,
+    'circuit_breaker': circuit_breaker,
+    # Course rosters indexed by student email, shared by all clients
+    'enrollment_index': EnrollmentIndex(
+        ttl=float(api_config.get('enrollment_ttl', DEFAULT_ENROLLMENT_TTL)),
+        max_courses=int(api_config.get('enrollment_max_courses', DEFAULT_MAX_COURSES))
+    ),
+    # Published exercises per course, shared by all clients
+    'exercise_catalog': ExerciseCatalog(
+        ttl=float(api_config.get('exercise_ttl', DEFAULT_EXERCISE_TTL)),
+        max_courses=int(api_config.get('exercise_max_courses', DEFAULT_MAX_COURSES))
+    )
+}
+
+# Optional local mirror of the default token's courses, assignments and
+# rosters; clients read it first and fall back to Canvas on a miss
+mirror_config = api_config.get('mirror', {})
+canvas_mirror = None
+mirror_sync = None
+if mirror_config.get('enabled'):
+    canvas_mirror = DatabaseMirror(
+        app,
+        api_config.get('base_url'),
+        max_age=float(mirror_config.get('max_age', MIRROR_MAX_AGE))
+    )
+    # The sync client must always read Canvas itself
+    mirror_sync = MirrorSync(
+        app,
+        LMSClient(api_config.get('base_url'), api_config.get('api_key'), **client_options),
+        interval=float(mirror_config.get('interval', MIRROR_SYNC_INTERVAL))
+    )
+    if mirror_config.get('local_first', True):
+        client_options['mirror'] = canvas_mirror
+
 # Initialize API client with default empty token (will be set per user)
 lms_client = LMSClient(
-    base_url=config.get('api', {}).get('base_url'),
-    api_key=config.get('api', {}).get('api_key')  # Will be set on a per-request basis from the user's token
+    base_url=api_config.get('base_url'),
+    api_key=api_config.get('api_key'),  # Will be set on a per-request basis from the user's token
+    **client_options
 )
 
 # User loader for Flask-Login
@@ -59,17 +247,74 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Request hook to set API token for current user
-@app.before_request
-def set_api_token():
+# Bearer token letting a scraper read the monitoring endpoints without a session
+app.config['MONITORING_TOKEN'] = os.getenv('MONITORING_TOKEN')
+
+def monitoring_access_required(f):
+    """Allow administrators, or requests carrying the MONITORING_TOKEN bearer token"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if current_user.is_authenticated and current_user.is_admin:
+            return f(*args, **kwargs)
+
+        token = app.config['MONITORING_TOKEN']
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        if token and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode()):
+            return f(*args, **kwargs)
+        return Response('Unauthorized\n', status=401, content_type='text/plain',
+                        headers={'WWW-Authenticate': 'Bearer'})
+    return decorated_function
+
+# Clients for users with their own Canvas token, reused across requests
+client_registry = ClientRegistry(
+    max_clients=int(api_config.get('max_clients', DEFAULT_MAX_CLIENTS)),
+    **client_options
+)
+
+def get_lms_client():
+    """
+    Get the LMS client for the current user
+    
+    Users with their own Canvas token get a cached client for that token,
+    everyone else uses the default client. Only routes that talk to Canvas
+    call this, so no client is created for other requests.
+    
+    Returns:
+        LMSClient: Client to use for this request
+    """
     if current_user.is_authenticated and current_user.canvas_api_token:
-        # Create a new client instance with user's token
-        app.config['lms_client'] = LMSClient(
-            base_url=config.get('api', {}).get('base_url', ''),
-            api_key=current_user.canvas_api_token
-        )
-    else:
-        app.config['lms_client'] = lms_client
+        return client_registry.get(api_config.get('base_url', ''), current_user.canvas_api_token)
+    return lms_client
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started, for the latency metrics"""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record the request in the per-route metrics"""
+    started = g.get('request_started')
+    if started is not None:
+        # Route templates keep the label set small
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, route)
+        HTTP_REQUESTS.inc(request.method, route, response.status_code)
+    return response
+
+@app.before_request
+def track_stale_reads():
+    """Start recording Canvas reads answered with stale data"""
+    begin_stale_tracking()
+
+@app.after_request
+def mark_stale_response(response):
+    """Flag responses built from stale Canvas data while Canvas is unavailable"""
+    families = stale_reads()
+    if families:
+        response.headers['X-Data-Stale'] = 'true'
+        response.headers['X-Stale-Endpoints'] = ', '.join(sorted(families))
+    return response
 
 # Routes
 @app.route('/')
@@ -96,16 +341,12 @@ def is_student(email, course_id=None):
     Returns:
         bool: True if the user is a student, False otherwise
     """
-    client = app.config['lms_client']
+    client = get_lms_client()
     if course_id:
         return client.courses.is_student_in_course_by_id(course_id, email)
     
     # Check if they're a student in any course
-    courses = client.courses.get_courses()
-    for course in courses:
-        if client.courses.is_student_in_course_by_id(course['id'], email):
-            return True
-    return False
+    return bool(client.find_student_courses(email, first_match=True))
 
 # Update the student_portal route to ensure proper authorization
 @app.route('/student')
@@ -124,16 +365,10 @@ def get_student_courses():
         return jsonify({'error': 'Not logged in'}), 401
     
     email = session['student_email']
-    lms_client = app.config['lms_client']
-    
-    # Get all courses
-    all_courses = lms_client.courses.get_courses()
-    enrolled_courses = []
+    lms_client = get_lms_client()
     
-    # Filter courses where the student is enrolled
-    for course in all_courses:
-        if lms_client.courses.is_student_in_course_by_id(course['id'], email):
-            enrolled_courses.append(course)
+    # Get all courses where the student is enrolled
+    enrolled_courses = lms_client.find_student_courses(email)
     
     # Update the enrolled courses in session
     session['enrolled_courses'] = [course['id'] for course in enrolled_courses]
@@ -147,7 +382,7 @@ def get_student_exercises(course_id):
         return jsonify({'error': 'Not logged in'}), 401
     
     # Verify the student is enrolled in this course
-    lms_client = app.config['lms_client']
+    lms_client = get_lms_client()
     if not lms_client.courses.is_student_in_course_by_id(course_id, session['student_email']):
         return jsonify({'error': 'Not enrolled in this course'}), 403
     
@@ -172,7 +407,7 @@ def log_student_exercise_access():
         return jsonify({"error": "Missing required fields"}), 400
     
     # Ensure the student is enrolled in this course
-    lms_client = app.config['lms_client']
+    lms_client = get_lms_client()
     if not lms_client.courses.is_student_in_course_by_id(
         course_id, 
         session['student_email']
@@ -180,15 +415,7 @@ def log_student_exercise_access():
         return jsonify({'error': 'Not enrolled in this course'}), 403
     
     # Verify this exercise exists in the course
-    course_exercises = lms_client.assignments.get_student_exercises(course_id)
-    exercise_exists = False
-    
-    for exercise in course_exercises:
-        if str(exercise['id']) == str(exercise_id):
-            exercise_exists = True
-            break
-    
-    if not exercise_exists:
+    if not lms_client.assignments.has_exercise(course_id, exercise_id):
         return jsonify({'error': 'Exercise not found or not available'}), 404
     
     # All validation passed - log the exercise attempt
@@ -212,12 +439,25 @@ def get_exercise_history():
         return jsonify({'error': 'Not logged in'}), 401
     
     course_id = request.args.get('course_id')
-    attempts = get_student_exercise_attempts(
+    return attempts_page(lambda limit, after: get_student_exercise_attempts(
         student_email=session['student_email'],
-        course_id=course_id
+        course_id=course_id,
+        limit=limit,
+        after=after
+    ))
+
+@app.route('/api/student/exercise-progress')
+def get_exercise_progress():
+    """API endpoint to get a student's progress at each exercise"""
+    if 'student_email' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    summaries = get_student_exercise_summaries(
+        student_email=session['student_email'],
+        course_id=request.args.get('course_id')
     )
     
-    return jsonify([attempt.to_dict() for attempt in attempts])
+    return jsonify([summary.to_dict() for summary in summaries])
 
 @app.route('/student-progress')
 @login_required
@@ -231,7 +471,7 @@ def student_progress():
 @admin_required
 def get_course_students(course_id):
     """API endpoint to get students for a course"""
-    lms_client = app.config['lms_client']
+    lms_client = get_lms_client()
     students = lms_client.users.get_course_students(course_id, "student")
     return jsonify(students)
 
@@ -240,12 +480,248 @@ def get_course_students(course_id):
 @admin_required
 def get_course_progress(course_id):
     """API endpoint to get progress data for all students in a course"""
-    from models.exercise import ExerciseAttempt
+    return attempts_page(lambda limit, after: get_course_attempts(course_id, limit=limit, after=after))
+
+def encode_cursor(key):
+    """Encode the (started_at, id) key of an attempt as an opaque page cursor"""
+    started_at, attempt_id = key
+    payload = json.dumps([started_at.isoformat(), attempt_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a page cursor made by encode_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        started_at, attempt_id = json.loads(payload)
+        return datetime.fromisoformat(started_at), int(attempt_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def attempts_page(load_page):
+    """
+    Serve one page of exercise attempts
+    
+    Reads the `limit` and `cursor` query arguments; the response holds the
+    attempts and the `next_cursor` to request the following page (null on
+    the last page).
+    
+    Args:
+        load_page: Function taking (limit, after) and returning the attempts
+            and the key of the next page, like get_course_attempts
+    """
+    limit = get_int_arg('limit', ATTEMPT_PAGE_SIZE, minimum=1, maximum=MAX_ATTEMPT_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    attempts, next_key = load_page(limit, after)
+    return jsonify({
+        'attempts': [attempt.to_dict() for attempt in attempts],
+        'next_cursor': encode_cursor(next_key) if next_key else None
+    })
+
+def get_int_arg(name, default, minimum=0, maximum=None):
+    """
+    Read an integer query argument, clamped to a range
+    
+    Args:
+        name: Name of the query argument
+        default: Value if the argument is missing or invalid
+        minimum: Smallest allowed value
+        maximum: Largest allowed value (unbounded if None)
+        
+    Returns:
+        int: The argument value
+    """
+    value = request.args.get(name, default, type=int)
+    value = max(value, minimum)
+    return min(value, maximum) if maximum is not None else value
+
+@app.route('/api/courses/<course_id>/progress/summary')
+@login_required
+@admin_required
+def get_course_progress_summary_api(course_id):
+    """
+    API endpoint to get aggregated progress for a course
+    
+    Query args: group_by (student, exercise or student_exercise),
+    student_email, exercise_id, limit and offset. Rows are returned as
+    arrays in the order of `columns` to keep the payload small.
+    """
+    group_by = request.args.get('group_by', 'student_exercise')
+    if group_by not in PROGRESS_GROUPINGS:
+        return jsonify({'error': f"group_by must be one of: {', '.join(PROGRESS_GROUPINGS)}"}), 400
+    
+    limit = get_int_arg('limit', 100, minimum=1, maximum=1000)
+    offset = get_int_arg('offset', 0)
+    
+    columns, rows, has_more = get_course_progress_summary(
+        course_id,
+        group_by=group_by,
+        student_email=request.args.get('student_email'),
+        exercise_id=request.args.get('exercise_id'),
+        limit=limit,
+        offset=offset
+    )
+    
+    def serialize(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, float):
+            return round(value, 1)
+        return value
+    
+    return jsonify({
+        'group_by': group_by,
+        'columns': columns,
+        'rows': [[serialize(value) for value in row] for row in rows],
+        'next_offset': offset + limit if has_more else None
+    })
+
+# Columns of the gradebook rows
+GRADEBOOK_COLUMNS = [
+    'student_id', 'student_email', 'assignment_id',
+    'canvas_score', 'canvas_grade', 'canvas_state', 'submitted_at',
+    'attempts', 'completions', 'best_score', 'first_started_at', 'first_completed_at'
+]
+
+def gradebook_row(student_id, student_email, assignment_id, submission, summary):
+    """Build a gradebook row from a Canvas submission and a local summary (either may be None)"""
+    submission = submission or {}
+    
+    def local(value):
+        return value.isoformat() if isinstance(value, datetime) else value
+    
+    return [
+        student_id, student_email, assignment_id,
+        submission.get('score'), submission.get('grade'), submission.get('workflow_state'), submission.get('submitted_at'),
+        summary.attempts if summary else 0,
+        summary.completions if summary else 0,
+        summary.best_score if summary else None,
+        local(summary.first_started_at) if summary else None,
+        local(summary.first_completed_at) if summary else None
+    ]
+
+def merge_gradebook(students, submissions, summaries):
+    """
+    Merge Canvas submissions with local exercise progress in one pass
+    
+    Args:
+        students: Canvas users of the course (with id and email)
+        submissions: Submission matrix from AssignmentClient.get_submission_matrix
+        summaries: StudentExerciseSummary rows of the course
+        
+    Returns:
+        List[list]: Rows in GRADEBOOK_COLUMNS order, one per student and
+        assignment with a Canvas submission or a local attempt
+    """
+    emails = {str(student['id']): (student.get('email') or '').lower() for student in students}
+    student_ids = {email: student_id for student_id, email in emails.items() if email}
+    local = {(summary.student_email.lower(), summary.exercise_id): summary for summary in summaries}
+    
+    rows = []
+    for (student_id, assignment_id), submission in submissions.items():
+        email = emails.get(student_id)
+        summary = local.pop((email, assignment_id), None) if email else None
+        rows.append(gradebook_row(student_id, email, assignment_id, submission, summary))
     
-    # Get all attempts for the given course
-    attempts = ExerciseAttempt.query.filter_by(course_id=course_id).all()
+    # Local attempts at assignments Canvas returned no submission for
+    for (email, exercise_id), summary in local.items():
+        rows.append(gradebook_row(student_ids.get(email), email, exercise_id, None, summary))
     
-    return jsonify([attempt.to_dict() for attempt in attempts])
+    rows.sort(key=lambda row: (row[1] or '', row[2]))
+    return rows
+
+@app.route('/api/courses/<course_id>/gradebook')
+@login_required
+@admin_required
+def get_course_gradebook(course_id):
+    """
+    API endpoint to get Canvas grades merged with local exercise progress
+    
+    Query args: student_id (Canvas user ID, all students if missing) and
+    assignment_ids (comma-separated, all assignments if missing). Rows are
+    returned as arrays in the order of `columns`.
+    """
+    lms_client = get_lms_client()
+    student_id = request.args.get('student_id')
+    assignment_ids = [part.strip() for part in request.args.get('assignment_ids', '').split(',') if part.strip()]
+    
+    students = lms_client.users.get_course_students(course_id, "student")
+    submissions = lms_client.assignments.get_submission_matrix(
+        course_id,
+        assignment_ids=assignment_ids or None,
+        student_ids=[student_id] if student_id else None
+    )
+    
+    student_email = None
+    if student_id:
+        students = [student for student in students if str(student['id']) == student_id]
+        if not students or not students[0].get('email'):
+            return jsonify({'error': 'Student not found in course'}), 404
+        student_email = students[0]['email']
+    
+    summaries = get_course_exercise_summaries(course_id, student_email)
+    if assignment_ids:
+        summaries = [summary for summary in summaries if summary.exercise_id in assignment_ids]
+    
+    return jsonify({
+        'columns': GRADEBOOK_COLUMNS,
+        'rows': merge_gradebook(students, submissions, summaries)
+    })
+
+# Data that can be joined to an attempt export
+EXPORT_INCLUDES = {'summary', 'roster'}
+
+@app.route('/api/courses/<course_id>/export')
+@login_required
+@admin_required
+def export_course_attempts(course_id):
+    """
+    API endpoint to download all exercise attempts of a course
+    
+    Query args: format (ndjson or csv) and include (comma-separated:
+    summary, roster). The export is streamed from a database cursor, and
+    gzipped on the fly when the client accepts it, so memory use stays
+    flat however many attempts the course has.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    include = {part.strip() for part in request.args.get('include', '').split(',') if part.strip()}
+    if include - EXPORT_INCLUDES:
+        return jsonify({'error': f"include must be a subset of: {', '.join(sorted(EXPORT_INCLUDES))}"}), 400
+    
+    roster = None
+    if 'roster' in include:
+        students = get_lms_client().users.get_course_students(course_id, "student")
+        roster = {student['email'].lower(): student for student in students if student.get('email')}
+    
+    compress = 'gzip' in request.accept_encodings
+    filename = secure_filename(f"course-{course_id}-attempts.{export_format}") or f"attempts.{export_format}"
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Vary': 'Accept-Encoding'
+    }
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    
+    chunks = stream_export(
+        course_id,
+        export_format=export_format,
+        with_summary='summary' in include,
+        roster=roster,
+        compress=compress
+    )
+    return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format], headers=headers)
 
 # Replace the assignment_login route with this corrected version
 @app.route('/assignment-login', methods=['GET', 'POST'])
@@ -267,19 +743,12 @@ def assignment_login():
                                   juice_shop_url=app.config.get('JUICE_SHOP_URL'))
         
         # Initialize LMS client with default token
-        lms_client = app.config['lms_client']
+        lms_client = get_lms_client()
         
         # Check if the email belongs to a student in any course
-        student_enrolled = False
-        enrolled_courses = []
-        courses = lms_client.courses.get_courses()
-        
-        for course in courses:
-            if lms_client.courses.is_student_in_course_by_id(course['id'], email):
-                student_enrolled = True
-                enrolled_courses.append(course)
+        enrolled_courses = lms_client.find_student_courses(email)
         
-        if student_enrolled:
+        if enrolled_courses:
             # Store the student email in session
             session['student_email'] = email
             session['enrolled_courses'] = [course['id'] for course in enrolled_courses]
@@ -313,7 +782,7 @@ def proxy_exercise(exercise_id):
         return redirect(url_for('student_portal'))
     
     # Verify the student is enrolled in the current course
-    lms_client = app.config['lms_client']
+    lms_client = get_lms_client()
     if not lms_client.courses.is_student_in_course_by_id(
         session['current_course'], 
         session['student_email']
@@ -324,15 +793,7 @@ def proxy_exercise(exercise_id):
         return redirect(url_for('assignment_login'))
     
     # Verify this exercise exists in the course
-    course_exercises = lms_client.assignments.get_student_exercises(session['current_course'])
-    exercise_exists = False
-    
-    for exercise in course_exercises:
-        if str(exercise['id']) == str(exercise_id):
-            exercise_exists = True
-            break
-    
-    if not exercise_exists:
+    if not lms_client.assignments.has_exercise(session['current_course'], exercise_id):
         return jsonify({'error': 'Exercise not found or not available'}), 404
     
     # Target Juice Shop URL
@@ -390,6 +851,110 @@ def flag_submission_webhook():
     
     return jsonify({"success": True})
 
+# Largest batch accepted by the batch flag submission webhook
+MAX_FLAG_SUBMISSION_BATCH = 1000
+
+def flag_submission_error(item):
+    """
+    Check the fields of one flag submission in a batch
+    
+    Args:
+        item: Parsed submission
+        
+    Returns:
+        str: Why the submission is invalid, or None if it can be applied
+    """
+    if not isinstance(item, dict):
+        return "Invalid submission"
+    if not all(field in item for field in ('student_email', 'exercise_id', 'course_id', 'is_correct')):
+        return "Missing required fields"
+    for field in ('student_email', 'course_id', 'exercise_id'):
+        if isinstance(item[field], bool) or not isinstance(item[field], (str, int)):
+            return f"{field} must be a string or an integer"
+    score = item.get('score', 100)
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not math.isfinite(score):
+        return "score must be a number"
+    return None
+
+def parse_flag_submission_batch():
+    """
+    Read a batch of flag submissions from the request body
+    
+    Accepts a JSON array, or NDJSON (one submission per line) when the
+    Content-Type is application/x-ndjson.
+    
+    Returns:
+        list: Parsed submissions; lines that aren't valid JSON are returned as None
+        
+    Raises:
+        ValueError: If the body isn't a JSON array
+    """
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)
+        return items
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of submissions")
+    return data
+
+@app.route('/api/webhook/flag-submissions', methods=['POST'])
+def flag_submission_batch_webhook():
+    """
+    Webhook endpoint for receiving a batch of flag submissions from Juice Shop
+    
+    Each item has the same format as /api/webhook/flag-submission. All
+    completions are applied in a single transaction, and the response holds
+    one result per item (in order) so the sender can retry only failures.
+    """
+    try:
+        items = parse_flag_submission_batch()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if len(items) > MAX_FLAG_SUBMISSION_BATCH:
+        return jsonify({"error": f"Batch too large (max {MAX_FLAG_SUBMISSION_BATCH} submissions)"}), 413
+    
+    results = [None] * len(items)
+    correct = []
+    
+    # Validate everything first, then apply the correct flags together, so
+    # one malformed item can't fail the transaction of the valid ones
+    for index, item in enumerate(items):
+        error = flag_submission_error(item)
+        if error is not None:
+            results[index] = {"index": index, "status": "invalid", "error": error, "retry": False}
+        elif not item['is_correct']:
+            results[index] = {"index": index, "status": "ignored"}
+        else:
+            correct.append(index)
+    
+    if correct:
+        try:
+            attempt_ids = complete_exercise_attempts([items[index] for index in correct])
+        except SQLAlchemyError as e:
+            print(f"Error applying flag submissions: {e}")
+            for index in correct:
+                results[index] = {"index": index, "status": "error", "error": "Database error", "retry": True}
+            return jsonify({"success": False, "results": results}), 503
+        
+        for index, attempt_id in zip(correct, attempt_ids):
+            if attempt_id is None:
+                results[index] = {"index": index, "status": "not_found", "error": "No attempt for this exercise", "retry": False}
+            else:
+                results[index] = {"index": index, "status": "completed", "attempt_id": attempt_id}
+    
+    success = all(result['status'] in ('completed', 'ignored') for result in results)
+    return jsonify({"success": success, "results": results})
+
 # @app.route('/assignment-login', methods=['GET', 'POST'])
 # def assignment_login():
 #     """Assignment login page using JavaScript approach"""
@@ -487,20 +1052,114 @@ def user_management():
 @admin_required
 def get_courses():
     """API endpoint to get courses"""
-    lms_client = app.config['lms_client']
+    lms_client = get_lms_client()
     
     print(lms_client)
-    courses = lms_client.courses.get_courses()
-    return jsonify(courses)
+    courses = lms_client.courses.read_courses()
+    return sourced_response(courses.data, courses)
+
+def sourced_response(data, sourced):
+    """
+    JSON response telling the client where the data came from
+    
+    Args:
+        data: Data to send
+        sourced: SourcedData the data was derived from
+    """
+    response = jsonify(data)
+    response.headers['X-Data-Source'] = sourced.source
+    if sourced.synced_at:
+        response.headers['X-Data-Synced-At'] = sourced.synced_at.isoformat() + 'Z'
+    return response
+
+@app.route('/metrics')
+@monitoring_access_required
+def metrics():
+    """Request, Canvas, proxy and database metrics in the Prometheus text format"""
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/canvas/health')
+@monitoring_access_required
+def get_canvas_health():
+    """API endpoint to get the circuit state of each Canvas endpoint family (503 while any is open)"""
+    if circuit_breaker is None:
+        return jsonify({'enabled': False, 'status': 'unknown', 'circuits': {}})
+    
+    circuits = circuit_breaker.snapshot()
+    healthy = all(circuit['state'] != OPEN for circuit in circuits.values())
+    return jsonify({
+        'enabled': True,
+        'status': 'ok' if healthy else 'degraded',
+        'failure_threshold': circuit_breaker.failure_threshold,
+        'reset_timeout': circuit_breaker.reset_timeout,
+        'circuits': circuits,
+        'stale_cache': stale_cache.stats() if stale_cache is not None else None
+    }), 200 if healthy else 503
+
+@app.route('/api/canvas/rate-limit')
+@login_required
+@admin_required
+def get_canvas_rate_limit():
+    """API endpoint to get the estimated Canvas budget of each token in use"""
+    return jsonify({
+        'low_water': rate_limiter.low_water,
+        'refill_rate': rate_limiter.refill_rate,
+        'tokens': rate_limiter.snapshot()
+    })
+
+@app.route('/api/canvas/mirror-status')
+@login_required
+@admin_required
+def get_canvas_mirror_status():
+    """API endpoint to get when each mirrored Canvas resource was last synced"""
+    if canvas_mirror is None:
+        return jsonify({'enabled': False})
+    
+    return jsonify({
+        'enabled': True,
+        'local_first': client_options.get('mirror') is not None,
+        'max_age': canvas_mirror.max_age,
+        'resources': [state.to_dict() for state in canvas_mirror.states()]
+    })
+
+@app.route('/api/canvas/cache-stats')
+@login_required
+@admin_required
+def get_canvas_cache_stats():
+    """API endpoint to get Canvas response cache statistics"""
+    if response_cache is None:
+        return jsonify({'enabled': False})
+    
+    return jsonify(dict(response_cache.stats(), enabled=True))
+
+@app.route('/api/canvas/coalescing-stats')
+@login_required
+@admin_required
+def get_canvas_coalescing_stats():
+    """API endpoint to get statistics of coalesced Canvas GET requests"""
+    if single_flight is None:
+        return jsonify({'enabled': False})
+    
+    return jsonify(dict(single_flight.stats(), enabled=True))
+
+@app.route('/api/proxy/cache-stats')
+@login_required
+@admin_required
+def get_proxy_cache_stats():
+    """API endpoint to get Juice Shop asset cache statistics"""
+    if proxy_cache is None:
+        return jsonify({'enabled': False})
+    
+    return jsonify(dict(proxy_cache.stats(), enabled=True))
 
 @app.route('/api/courses/<course_id>/exercises')
 @login_required
 @admin_required
 def get_exercises(course_id):
     """API endpoint to get exercises for a course"""
-    lms_client = app.config['lms_client']
-    exercises = lms_client.assignments.get_assignments(course_id)
-    return jsonify(exercises)
+    lms_client = get_lms_client()
+    exercises = lms_client.assignments.read_exercises(course_id)
+    return sourced_response(exercises.data, exercises)
 
 @app.route('/api/users')
 @login_required
@@ -567,6 +1226,9 @@ def update_user(user_id):
         user.is_admin = data['is_admin']
         
     if 'canvas_api_token' in data:
+        if data['canvas_api_token'] != user.canvas_api_token:
+            # Drop the cached client of the old token
+            client_registry.evict(api_config.get('base_url', ''), user.canvas_api_token)
         user.canvas_api_token = data['canvas_api_token']
         
     db.session.commit()
@@ -583,69 +1245,71 @@ def delete_user(user_id):
     # Prevent deleting self
     if user.id == current_user.id:
         return jsonify({'error': 'Cannot delete yourself'}), 400
+    
+    if user.canvas_api_token:
+        client_registry.evict(api_config.get('base_url', ''), user.canvas_api_token)
         
     db.session.delete(user)
     db.session.commit()
     
     return jsonify({'success': True})
 
-@app.route('/assignment', defaults={'path': ''})
-@app.route('/assignment/<path:path>')
+@app.route('/assignment', defaults={'path': ''}, methods=PROXY_METHODS)
+@app.route('/assignment/<path:path>', methods=PROXY_METHODS)
 def reverse_proxy(path):
     """
     Reverse proxy route that forwards requests to Juice Shop
     """
-    # Target Juice Shop URL
-    target_url = os.getenv('JUICE_SHOP_URL')
-    
-    # Construct the full URL by joining the target URL with the requested path
-    url = urljoin(target_url, path)
-    
-    # Get the request method (GET, POST, etc.)
-    method = request.method
-    
-    # Get the headers from the original request, but exclude some
-    # that would cause issues with the proxied request
-    excluded_headers = ['host', 'content-length', 'connection']
-    headers = {key: value for key, value in request.headers.items()
-               if key.lower() not in excluded_headers}
-    
-    # Forward the request to the target URL
     try:
-        if method == 'GET':
-            resp = requests.get(url, params=request.args, headers=headers, 
-                               cookies=request.cookies, stream=True)
-        elif method == 'POST':
-            resp = requests.post(url, data=request.get_data(), headers=headers, 
-                                cookies=request.cookies, stream=True)
-        elif method == 'PUT':
-            resp = requests.put(url, data=request.get_data(), headers=headers, 
-                               cookies=request.cookies, stream=True)
-        elif method == 'DELETE':
-            resp = requests.delete(url, headers=headers, cookies=request.cookies, 
-                                  stream=True)
-        elif method == 'OPTIONS':
-            resp = requests.options(url, headers=headers, cookies=request.cookies, 
-                                   stream=True)
-        else:
-            # For other methods, just return a method not allowed response
-            return Response(f"Method {method} not allowed", status=405)
-        
-        # Create a Flask Response object from the requests response
-        response = Response(resp.iter_content(chunk_size=10*1024), 
-                           status=resp.status_code)
-        
-        # Copy headers from the requests response to the Flask response
-        for key, value in resp.headers.items():
-            if key.lower() not in ['content-encoding', 'transfer-encoding', 'content-length']:
-                response.headers[key] = value
-                
-        return response
-        
+        return juice_shop_proxy.forward(request, path)
     except requests.exceptions.RequestException as e:
         # Handle any errors when connecting to the Juice Shop
-        return Response(f"Error connecting to Juice Shop: {str(e)}", status=500)
+        return Response(f"Error connecting to Juice Shop: {str(e)}", status=502)
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Apply pending database schema migrations"""
+    db.create_all()
+    applied = run_migrations()
+    if not applied:
+        print("Database schema is up to date")
+
+@app.cli.command('explain-queries')
+def explain_queries_command():
+    """Print the query plan of each exercise attempt helper"""
+    print_query_plans()
+
+@app.cli.command('sync-canvas')
+@click.option('--loop', is_flag=True, help='Keep syncing every mirror interval')
+def sync_canvas_command(loop):
+    """Sync the local Canvas mirror"""
+    if mirror_sync is None:
+        print("The Canvas mirror is disabled (api.mirror.enabled in config.json)")
+        return
+    
+    if loop:
+        mirror_sync.run()
+    else:
+        print(f"Canvas mirror synced: {mirror_sync.sync_once()}")
+
+@app.cli.command('rebuild-summaries')
+@click.option('--check', is_flag=True, help='Only report summaries that differ from exercise_attempts')
+def rebuild_summaries_command(check):
+    """Recompute the student exercise summaries from exercise_attempts"""
+    if check:
+        with db.engine.connect() as connection:
+            mismatches = find_summary_mismatches(connection)
+        for student_email, course_id, exercise_id in mismatches[:20]:
+            print(f"Mismatch: {student_email} course {course_id} exercise {exercise_id}")
+        print(f"{len(mismatches)} summaries differ from exercise_attempts")
+        return
+    
+    with db.engine.begin() as connection:
+        count = rebuild_exercise_summaries(connection)
+    print(f"Rebuilt {count} exercise summaries")
 
 if __name__ == '__main__':
     initialize_db(app)  # Initialize database with default admin user
+    if mirror_sync is not None and mirror_config.get('background', True):
+        mirror_sync.start()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,80 @@
+# benchmarks/compare.py - Compare two benchmark result files
+"""
+Compare the median latencies of two runs of benchmarks/run.py:
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+
+Exits with status 1 if any benchmark got slower by more than the threshold
+(in percent) and --fail-on-regression is given.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# Default slowdown, in percent, reported as a regression
+DEFAULT_THRESHOLD = 10.0
+
+Key = Tuple[str, str, str]
+
+
+def load_results(path: str) -> Dict[Key, Dict[str, Any]]:
+    """Load a result file, keyed by (scenario, benchmark, mode)"""
+    with open(path) as f:
+        report = json.load(f)
+    return {(result['scenario'], result['benchmark'], result['mode']): result for result in report['results']}
+
+
+def compare(baseline: Dict[Key, Dict[str, Any]], candidate: Dict[Key, Dict[str, Any]],
+            threshold: float) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Compare the results both runs have in common
+
+    Returns:
+        Rows with the baseline and candidate medians, the change in percent
+        and whether it is a regression, and the number of regressions
+    """
+    rows = []
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before = baseline[key]['latency_ms']['median']
+        after = candidate[key]['latency_ms']['median']
+        change = (after - before) / before * 100 if before else 0.0
+        regressed = change > threshold
+        regressions += regressed
+        rows.append({
+            'scenario': key[0],
+            'benchmark': key[1],
+            'mode': key[2],
+            'baseline_ms': before,
+            'candidate_ms': after,
+            'change_percent': round(change, 1),
+            'canvas_requests': (baseline[key]['canvas_requests_per_op'], candidate[key]['canvas_requests_per_op']),
+            'regression': regressed,
+        })
+    return rows, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline', help='Result file of the reference run')
+    parser.add_argument('candidate', help='Result file of the run to check')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Slowdown in percent reported as a regression (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on any regression')
+    args = parser.parse_args(argv)
+
+    rows, regressions = compare(load_results(args.baseline), load_results(args.candidate), args.threshold)
+    for row in rows:
+        before_requests, after_requests = row['canvas_requests']
+        marker = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['scenario']:<24} {row['benchmark']:<27} {row['mode']:<5} "
+              f"{row['baseline_ms']:>10.2f} -> {row['candidate_ms']:>10.2f} ms ({row['change_percent']:+6.1f}%)  "
+              f"canvas {before_requests:g} -> {after_requests:g} req/op{marker}")
+    print(f"{len(rows)} benchmarks compared, {regressions} regressions over {args.threshold:g}%")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
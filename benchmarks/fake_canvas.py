@@ -0,0 +1,308 @@
+# benchmarks/fake_canvas.py - Local stand-in for the Canvas endpoints the app calls
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlencode, urlparse
+
+# Path prefix of the fake API, like a real Canvas instance
+API_PREFIX = '/api/v1'
+
+# Canvas caps per_page at 100
+MAX_PER_PAGE = 100
+
+# Student enrolled in a subset of the courses, used for logins
+PROBE_EMAIL = 'bench.student@example.edu'
+PROBE_USER_ID = 1
+
+_ID_SEGMENT = re.compile(r'/(\d+|sis_login_id:[^/]+)(?=/|$)')
+_STUDENT_EMAIL = re.compile(r'student(\d+)\.c(\d+)@example\.edu')
+_USERNAME = re.compile(r'user(\d+)')
+
+
+class Dataset(NamedTuple):
+    """Shape of the data served by the fake Canvas"""
+    courses: int = 5
+    students_per_course: int = 50
+    assignments_per_course: int = 20
+    # The probe student is enrolled in every `probe_every`-th course
+    probe_every: int = 5
+    # Extra bytes of text added to every object, to vary response sizes
+    padding: int = 0
+    # Whether the token may look users up; without it the app checks each course roster
+    user_lookup: bool = True
+    # Whether login IDs are the students' emails; otherwise they are usernames like user42
+    email_login_ids: bool = True
+
+
+class FakeCanvas:
+    """
+    Threaded HTTP server answering the Canvas endpoints the app uses
+
+    Objects are generated on demand from the dataset, so large rosters cost
+    no memory. Every request waits `latency` seconds before it is answered,
+    list endpoints are paginated with Link headers, and requests are counted
+    per endpoint template.
+    """
+
+    def __init__(self, dataset: Dataset = Dataset(), latency: float = 0.0, max_per_page: int = MAX_PER_PAGE):
+        """
+        Initialize the fake Canvas
+
+        Args:
+            dataset: Shape of the data to serve
+            latency: Seconds added to every request
+            max_per_page: Largest page size honored
+        """
+        self.dataset = dataset
+        self.latency = latency
+        self.max_per_page = max_per_page
+        self.hits: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the API, to use as the app's api.base_url"""
+        return f"http://127.0.0.1:{self._server.server_port}{API_PREFIX}"
+
+    def start(self) -> 'FakeCanvas':
+        """Start serving on a free local port in a background thread"""
+        canvas = self
+
+        class Handler(_Handler):
+            fake = canvas
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='fake-canvas', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def count(self, path: str) -> None:
+        """Count a request under its endpoint template"""
+        with self._lock:
+            self.hits[_ID_SEGMENT.sub('/:id', path)] += 1
+
+    def reset_hits(self) -> Dict[str, int]:
+        """Reset the request counts, returning the previous ones"""
+        with self._lock:
+            hits, self.hits = dict(self.hits), Counter()
+        return hits
+
+    def total_hits(self) -> int:
+        """Get the number of requests counted since the last reset"""
+        with self._lock:
+            return sum(self.hits.values())
+
+    def course_ids(self) -> List[int]:
+        """Get the IDs of the courses in the dataset"""
+        return list(range(1, self.dataset.courses + 1))
+
+    def probe_course_ids(self) -> List[int]:
+        """Get the IDs of the courses the probe student is enrolled in"""
+        return [course_id for course_id in self.course_ids() if (course_id - 1) % self.dataset.probe_every == 0]
+
+    def published_assignment_ids(self) -> List[int]:
+        """Get the IDs of the published assignments of every course"""
+        return [assignment_id for assignment_id in range(1, self.dataset.assignments_per_course + 1)
+                if assignment_id % 4 != 0]
+
+    def student_email(self, course_id: int, index: int) -> str:
+        """Get the email of the index-th student of a course"""
+        if index == 0 and course_id in self.probe_course_ids():
+            return PROBE_EMAIL
+        return f"student{index}.c{course_id}@example.edu"
+
+    def course(self, course_id: int) -> Dict[str, Any]:
+        return {
+            'id': course_id,
+            'name': f"Course {course_id}",
+            'course_code': f"SEC{course_id:03d}",
+            'workflow_state': 'available',
+            'enrollments': [{'type': 'teacher', 'enrollment_state': 'active'}],
+            'updated_at': '2024-01-01T00:00:00Z',
+            'description': 'x' * self.dataset.padding,
+        }
+
+    def student_id(self, course_id: int, index: int) -> int:
+        """Get the user ID of the index-th student of a course"""
+        if index == 0 and course_id in self.probe_course_ids():
+            return PROBE_USER_ID
+        return course_id * 100000 + index
+
+    def find_user(self, email: str) -> Optional[Dict[str, Any]]:
+        """Get the user with an email, without enrollments"""
+        email = email.lower()
+        if email == PROBE_EMAIL:
+            course_id, index = self.probe_course_ids()[0], 0
+        else:
+            match = _STUDENT_EMAIL.fullmatch(email)
+            if match is None:
+                return None
+            index, course_id = int(match.group(1)), int(match.group(2))
+            if course_id not in self.course_ids() or index >= self.dataset.students_per_course:
+                return None
+        user = self.student(course_id, index)
+        del user['enrollments']
+        return user
+
+    def find_login(self, login_id: str) -> Optional[Dict[str, Any]]:
+        """Get the user with a login ID, without enrollments"""
+        login_id = login_id.lower()
+        if self.dataset.email_login_ids:
+            return self.find_user(login_id)
+        match = _USERNAME.fullmatch(login_id)
+        if match is None:
+            return None
+        user_id = int(match.group(1))
+        if user_id == PROBE_USER_ID:
+            return self.find_user(PROBE_EMAIL)
+        course_id, index = divmod(user_id, 100000)
+        if course_id not in self.course_ids() or index >= self.dataset.students_per_course:
+            return None
+        return self.find_user(self.student_email(course_id, index))
+
+    def user_enrollments(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get the active StudentEnrollments of a user"""
+        if user_id == PROBE_USER_ID:
+            return [self.student(course_id, 0)['enrollments'][0] for course_id in self.probe_course_ids()]
+        course_id, index = divmod(user_id, 100000)
+        if course_id not in self.course_ids() or index >= self.dataset.students_per_course:
+            return []
+        return self.student(course_id, index)['enrollments']
+
+    def student(self, course_id: int, index: int) -> Dict[str, Any]:
+        user_id = self.student_id(course_id, index)
+        email = self.student_email(course_id, index)
+        return {
+            'id': user_id,
+            'name': f"Student {user_id}",
+            'sortable_name': f"{user_id}, Student",
+            'email': email,
+            'login_id': email if self.dataset.email_login_ids else f"user{user_id}",
+            'enrollments': [{
+                'id': course_id * 100000 + index,
+                'course_id': course_id,
+                'user_id': user_id,
+                'type': 'StudentEnrollment',
+                'enrollment_state': 'active',
+                'updated_at': '2024-01-01T00:00:00Z',
+            }],
+            'bio': 'x' * self.dataset.padding,
+        }
+
+    def assignment(self, course_id: int, assignment_id: int) -> Dict[str, Any]:
+        return {
+            'id': assignment_id,
+            'course_id': course_id,
+            'name': f"Exercise {assignment_id}",
+            'description': 'x' * self.dataset.padding,
+            'points_possible': 10,
+            'due_at': None,
+            'published': assignment_id % 4 != 0,
+            'position': assignment_id,
+            'submission_types': ['external_tool'],
+            'updated_at': '2024-01-01T00:00:00Z',
+        }
+
+    def collection(self, path: str) -> Optional[Tuple[int, Any]]:
+        """
+        Get the size of a list endpoint and a function making its i-th item
+
+        Returns:
+            (total, item factory), or None if the path is unknown
+        """
+        if path == '/users/self/favorites/courses':
+            return self.dataset.courses, lambda i: self.course(i + 1)
+
+        match = re.fullmatch(r'/users/(\d+)/enrollments', path)
+        if match is not None:
+            enrollments = self.user_enrollments(int(match.group(1)))
+            return len(enrollments), enrollments.__getitem__
+
+        match = re.fullmatch(r'/courses/(\d+)/(users|students|assignments)', path)
+        if match is None:
+            return None
+        course_id = int(match.group(1))
+        if course_id not in self.course_ids():
+            return None
+        if match.group(2) == 'assignments':
+            return self.dataset.assignments_per_course, lambda i: self.assignment(course_id, i + 1)
+        return self.dataset.students_per_course, lambda i: self.student(course_id, i)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler bound to a FakeCanvas by FakeCanvas.start"""
+
+    fake: FakeCanvas = None
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        self.fake.count(path)
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+
+        query = parse_qs(url.query)
+        if path == '/users/self':
+            return self._send_json({'id': 0, 'name': 'Bench Teacher'})
+
+        if path.startswith('/users/sis_login_id:') or path == '/accounts/self/users' or (
+                path.startswith('/users/') and path.endswith('/enrollments')):
+            if not self.fake.dataset.user_lookup:
+                return self._send_json({'status': 'unauthorized'}, 403)
+            if path.startswith('/users/sis_login_id:'):
+                user = self.fake.find_login(unquote(path.split(':', 1)[1]))
+                if user is None:
+                    return self._send_json({'errors': [{'message': 'The specified resource does not exist.'}]}, 404)
+                return self._send_json(user)
+            if path == '/accounts/self/users':
+                # Matches login IDs and emails, but only returns emails when included
+                term = query.get('search_term', [''])[0]
+                user = self.fake.find_login(term) or self.fake.find_user(term)
+                if user is not None and 'email' not in query.get('include[]', []):
+                    del user['email']
+                return self._send_json([user] if user else [])
+
+        collection = self.fake.collection(path)
+        if collection is None:
+            return self._send_json({'errors': [{'message': 'The specified resource does not exist.'}]}, 404)
+
+        total, make_item = collection
+        per_page = min(int(query.get('per_page', ['10'])[0]), self.fake.max_per_page)
+        page = int(query.get('page', ['1'])[0])
+        start = (page - 1) * per_page
+        items = [make_item(i) for i in range(start, min(start + per_page, total))]
+
+        headers = {}
+        if start + per_page < total:
+            query['page'] = [str(page + 1)]
+            next_url = f"http://{self.headers['Host']}{url.path}?{urlencode(query, doseq=True)}"
+            headers['Link'] = f'<{next_url}>; rel="next"'
+        self._send_json(items, headers=headers)
+
+    def _send_json(self, data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
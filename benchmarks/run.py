@@ -0,0 +1,299 @@
+# benchmarks/run.py - End-to-end benchmarks of the student and progress routes against a fake Canvas
+"""
+Run the benchmarks and write the results as JSON:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --scenarios courses5-students50 --benchmarks assignment_login --iterations 20
+
+The app runs in-process (Flask test client) against benchmarks/fake_canvas.py
+and a throwaway SQLite database, so no Canvas instance is needed. Compare
+two result files with `python -m benchmarks.compare`.
+"""
+import argparse
+import importlib
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from benchmarks.fake_canvas import FakeCanvas, PROBE_EMAIL
+from benchmarks.scenarios import SCENARIOS, SEEDED_EXERCISES
+
+# Default benchmark settings
+DEFAULT_ITERATIONS = 10
+DEFAULT_LATENCY_MS = 10.0
+DEFAULT_OUTPUT = 'benchmark-results.json'
+
+# Administrator created in the benchmark database
+ADMIN_EMAIL = 'bench.admin@example.edu'
+ADMIN_PASSWORD = 'bench-password'
+
+# Modes: 'cold' clears the app's Canvas caches before every iteration,
+# 'warm' measures after one untimed warm-up call
+COLD = 'cold'
+WARM = 'warm'
+
+
+class Benchmark(NamedTuple):
+    """An operation measured end to end"""
+    run: Callable[['BenchmarkContext'], Any]
+    expected_status: int
+    modes: Tuple[str, ...]
+
+
+class BenchmarkContext:
+    """The app under test, the fake Canvas and the clients of one scenario"""
+
+    def __init__(self, app_module, canvas: FakeCanvas):
+        self.app_module = app_module
+        self.app = app_module.app
+        self.canvas = canvas
+        self.course_id = str(canvas.probe_course_ids()[0])
+        self.exercise_id = str(canvas.published_assignment_ids()[0])
+
+        self.admin = self.app.test_client()
+        response = self.admin.post('/login', data={'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+        if response.status_code != 302:
+            raise RuntimeError(f"Admin login failed with status {response.status_code}")
+
+        self.student = self.app.test_client()
+        with self.student.session_transaction() as session:
+            session['student_email'] = PROBE_EMAIL
+            session['current_course'] = self.course_id
+            session['current_exercise'] = self.exercise_id
+
+    def reset_caches(self) -> None:
+        """Forget everything the app cached from Canvas"""
+        options = self.app_module.client_options
+        options['enrollment_index'].clear()
+        options['exercise_catalog'].clear()
+        if options.get('response_cache') is not None:
+            options['response_cache'].clear()
+        self.app_module.client_registry.clear()
+
+
+def login(context: BenchmarkContext):
+    # A fresh client per login, so no student session exists yet
+    return context.app.test_client().post('/assignment-login', data={'email': PROBE_EMAIL})
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    'assignment_login': Benchmark(login, 302, (COLD, WARM)),
+    'student_courses': Benchmark(
+        lambda context: context.student.get('/api/student/courses'), 200, (COLD, WARM)),
+    'proxy_exercise': Benchmark(
+        lambda context: context.student.get(f"/assignment/{context.exercise_id}"), 302, (COLD, WARM)),
+    'student_exercise_progress': Benchmark(
+        lambda context: context.student.get('/api/student/exercise-progress'), 200, (WARM,)),
+    'course_progress': Benchmark(
+        lambda context: context.admin.get(f"/api/courses/{context.course_id}/progress?limit=100"), 200, (WARM,)),
+    'course_progress_summary': Benchmark(
+        lambda context: context.admin.get(f"/api/courses/{context.course_id}/progress/summary?limit=100"),
+        200, (WARM,)),
+}
+
+
+def load_app(canvas: FakeCanvas, workdir: str, api_overrides: Dict[str, Any]):
+    """
+    Import the app configured against the fake Canvas and a fresh SQLite database
+
+    The app reads its configuration at import time, so this must run before
+    anything else imports it.
+    """
+    config_path = os.path.join(workdir, 'config.json')
+    api_config = dict({'base_url': canvas.base_url, 'api_key': 'bench-token'}, **api_overrides)
+    with open(config_path, 'w') as f:
+        json.dump({'api': api_config}, f)
+
+    os.environ.update({
+        'LMS_CONFIG_PATH': config_path,
+        'DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'ADMIN_USERNAME': 'bench-admin',
+        'ADMIN_EMAIL': ADMIN_EMAIL,
+        'ADMIN_PASSWORD': ADMIN_PASSWORD,
+        'JUICE_SHOP_URL': 'http://127.0.0.1:9/',
+        'PROXY_CACHE_DIR': '',
+    })
+    app_module = importlib.import_module('app')
+    app_module.initialize_db(app_module.app)
+    return app_module
+
+
+def seed_progress(app_module, canvas: FakeCanvas, course_id: str) -> int:
+    """
+    Replace the exercise attempts with attempts of every student of the probe course
+
+    Returns:
+        Number of attempts inserted
+    """
+    from models.exercise import ExerciseAttempt, StudentExerciseSummary, rebuild_exercise_summaries
+    from models.user import db
+
+    started = datetime(2024, 1, 1)
+    exercise_ids = canvas.published_assignment_ids()[:SEEDED_EXERCISES]
+    rows = []
+    for index in range(canvas.dataset.students_per_course):
+        email = canvas.student_email(int(course_id), index)
+        for position, exercise_id in enumerate(exercise_ids):
+            started_at = started + timedelta(minutes=index * len(exercise_ids) + position)
+            completed = (index + position) % 2 == 0
+            rows.append({
+                'student_email': email,
+                'course_id': course_id,
+                'exercise_id': str(exercise_id),
+                'started_at': started_at,
+                'completed_at': started_at + timedelta(minutes=5 + position) if completed else None,
+                'score': float((index + position) % 10) if completed else None,
+                'attempts': 1,
+                'is_completed': completed,
+            })
+
+    with app_module.app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(StudentExerciseSummary.__table__.delete())
+            connection.execute(ExerciseAttempt.__table__.delete())
+            connection.execute(ExerciseAttempt.__table__.insert(), rows)
+            rebuild_exercise_summaries(connection)
+    return len(rows)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(context: BenchmarkContext, benchmark: Benchmark, mode: str, iterations: int) -> Dict[str, Any]:
+    """
+    Run one benchmark in one mode
+
+    Returns:
+        Latency statistics in milliseconds, Canvas requests per operation
+        and the number of operations that returned an unexpected status
+    """
+    if mode == WARM:
+        benchmark.run(context)
+
+    latencies = []
+    canvas_requests = []
+    errors = 0
+    for _ in range(iterations):
+        if mode == COLD:
+            context.reset_caches()
+        context.canvas.reset_hits()
+
+        started = time.perf_counter()
+        response = benchmark.run(context)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        canvas_requests.append(context.canvas.total_hits())
+        if response.status_code != benchmark.expected_status:
+            errors += 1
+
+    return {
+        'iterations': iterations,
+        'errors': errors,
+        'latency_ms': {
+            'min': round(min(latencies), 3),
+            'median': round(statistics.median(latencies), 3),
+            'mean': round(statistics.fmean(latencies), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'max': round(max(latencies), 3),
+        },
+        'canvas_requests_per_op': round(statistics.fmean(canvas_requests), 2),
+    }
+
+
+def git_revision() -> Optional[Dict[str, Any]]:
+    """Get the commit the benchmarks ran on, and whether the tree had local changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return {'commit': commit.strip(), 'dirty': bool(status.strip())}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS),
+                        help='Scenarios to run (default: all)')
+    parser.add_argument('--benchmarks', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS),
+                        help='Benchmarks to run (default: all)')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help=f"Timed operations per benchmark and mode (default: {DEFAULT_ITERATIONS})")
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_LATENCY_MS,
+                        help=f"Latency of every fake Canvas request (default: {DEFAULT_LATENCY_MS})")
+    parser.add_argument('--padding', type=int, default=0,
+                        help='Extra bytes added to every Canvas object (default: 0)')
+    parser.add_argument('--no-user-lookup', action='store_true',
+                        help='Refuse user lookups, so logins check every course roster')
+    parser.add_argument('--config', help='JSON file with settings merged into the api config section')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"Result file (default: {DEFAULT_OUTPUT})")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    api_overrides = {}
+    if args.config:
+        with open(args.config) as f:
+            api_overrides = json.load(f)
+
+    canvas = FakeCanvas(latency=args.latency_ms / 1000).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix='lms-bench-') as workdir:
+            app_module = load_app(canvas, workdir, api_overrides)
+
+            for scenario in args.scenarios:
+                canvas.dataset = SCENARIOS[scenario]._replace(padding=args.padding,
+                                                              user_lookup=not args.no_user_lookup)
+                context = BenchmarkContext(app_module, canvas)
+                context.reset_caches()
+                attempts = seed_progress(app_module, canvas, context.course_id)
+                print(f"{scenario}: {canvas.dataset.courses} courses, "
+                      f"{canvas.dataset.students_per_course} students per course, {attempts} attempts seeded")
+
+                for name in args.benchmarks:
+                    benchmark = BENCHMARKS[name]
+                    for mode in benchmark.modes:
+                        result = measure(context, benchmark, mode, args.iterations)
+                        results.append(dict({'scenario': scenario, 'benchmark': name, 'mode': mode}, **result))
+                        latency = result['latency_ms']
+                        print(f"  {name:<27} {mode:<5} median {latency['median']:>10.2f} ms  "
+                              f"p95 {latency['p95']:>10.2f} ms  "
+                              f"canvas {result['canvas_requests_per_op']:>8.1f} req/op  errors {result['errors']}")
+    finally:
+        canvas.stop()
+
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'latency_ms': args.latency_ms,
+            'padding': args.padding,
+            'user_lookup': not args.no_user_lookup,
+            'api_overrides': api_overrides,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,23 @@
+# benchmarks/scenarios.py - Data shapes the benchmarks run against
+from typing import Dict
+
+from benchmarks.fake_canvas import Dataset
+
+# Course counts and roster sizes of the standard scenarios
+COURSE_COUNTS = (5, 50, 200)
+STUDENT_COUNTS = (50, 2000)
+
+# Attempts seeded per student of the probe course, for the progress endpoints
+SEEDED_EXERCISES = 10
+
+
+def scenario_name(courses: int, students: int) -> str:
+    """Get the name of the scenario with a number of courses and students per course"""
+    return f"courses{courses}-students{students}"
+
+
+SCENARIOS: Dict[str, Dataset] = {
+    scenario_name(courses, students): Dataset(courses=courses, students_per_course=students)
+    for courses in COURSE_COUNTS
+    for students in STUDENT_COUNTS
+}
@@ -0,0 +1,325 @@
+# models/canvas_mirror.py - Local mirror of Canvas courses, assignments and rosters
+import threading
+from datetime import datetime, timedelta, timezone
+
+import requests
+from sqlalchemy import select
+
+from api.enrollment_index import EnrollmentIndex
+from api.mirror import CanvasMirror, mirrored
+from models.user import db
+
+# Default mirror settings
+DEFAULT_SYNC_INTERVAL = 300
+DEFAULT_MAX_AGE = 900
+
+class MirroredCourse(db.Model):
+    """Model mirroring a Canvas course the sync token teaches"""
+    __tablename__ = 'canvas_courses'
+
+    id = db.Column(db.String(50), primary_key=True)
+    data = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    synced_at = db.Column(db.DateTime, nullable=False)
+
+class MirroredAssignment(db.Model):
+    """Model mirroring a Canvas assignment"""
+    __tablename__ = 'canvas_assignments'
+
+    course_id = db.Column(db.String(50), primary_key=True)
+    id = db.Column(db.String(50), primary_key=True)
+    data = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    synced_at = db.Column(db.DateTime, nullable=False)
+
+class MirroredStudent(db.Model):
+    """Model mirroring a student of a course with their active StudentEnrollment"""
+    __tablename__ = 'canvas_course_students'
+
+    course_id = db.Column(db.String(50), primary_key=True)
+    id = db.Column(db.String(50), primary_key=True)
+    email = db.Column(db.String(120), nullable=True)
+    data = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    synced_at = db.Column(db.DateTime, nullable=False)
+
+class MirrorSyncState(db.Model):
+    """Model recording when each mirrored resource was last synced"""
+    __tablename__ = 'canvas_sync_state'
+
+    # 'courses:<token hash>', 'assignments:<course id>' or 'students:<course id>'
+    resource = db.Column(db.String(120), primary_key=True)
+    high_water_mark = db.Column(db.DateTime, nullable=True)
+    synced_at = db.Column(db.DateTime, nullable=False)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        """Convert sync state to dictionary"""
+        return {
+            'resource': self.resource,
+            'high_water_mark': self.high_water_mark.isoformat() if self.high_water_mark else None,
+            'synced_at': self.synced_at.isoformat(),
+            'item_count': self.item_count
+        }
+
+def parse_canvas_time(value):
+    """Parse a Canvas ISO 8601 timestamp into a naive UTC datetime (None if missing)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def sync_rows(model, resource, scope, rows, now, trust_updated_at=False):
+    """
+    Mirror one resource: write new and changed rows, delete vanished ones
+
+    A row is rewritten when it is new or its data changed. When the Canvas
+    updated_at covers every mirrored field, rows at or before the
+    resource's high-water mark are skipped without comparing their data.
+    Runs in the session transaction; the caller commits.
+
+    Args:
+        model: Mirror model to write
+        resource: Sync state key of the resource
+        scope: Column values shared by all rows of the resource (e.g. course_id)
+        rows: Dictionary of Canvas ID to column values (data, updated_at, ...)
+        now: Time of this sync
+        trust_updated_at: Whether updated_at changes whenever the data does
+
+    Returns:
+        Tuple[int, int]: Number of rows written and deleted
+    """
+    state = db.session.get(MirrorSyncState, resource)
+    high_water_mark = state.high_water_mark if state else None
+    stored = dict(db.session.query(model.id, model.data).filter_by(**scope))
+
+    written = 0
+    for item_id, values in rows.items():
+        updated_at = values.get('updated_at')
+        if item_id in stored:
+            if (trust_updated_at and updated_at is not None and high_water_mark is not None
+                    and updated_at <= high_water_mark):
+                continue
+            if stored[item_id] == values['data']:
+                continue
+        db.session.merge(model(id=item_id, synced_at=now, **scope, **values))
+        written += 1
+
+    gone = [item_id for item_id in stored if item_id not in rows]
+    if gone:
+        model.query.filter_by(**scope).filter(model.id.in_(gone)).delete(synchronize_session=False)
+
+    timestamps = [values['updated_at'] for values in rows.values() if values.get('updated_at')]
+    if high_water_mark is not None:
+        timestamps.append(high_water_mark)
+
+    if state is None:
+        state = MirrorSyncState(resource=resource)
+        db.session.add(state)
+    state.high_water_mark = max(timestamps) if timestamps else None
+    state.synced_at = now
+    state.item_count = len(rows)
+
+    return written, len(gone)
+
+class DatabaseMirror(CanvasMirror):
+    """Canvas mirror stored in the local database, kept up to date by MirrorSync"""
+
+    def __init__(self, app, base_url, max_age=DEFAULT_MAX_AGE):
+        """
+        Initialize the mirror
+
+        Args:
+            app: Flask application whose database holds the mirror
+            base_url: Base URL of the mirrored LMS
+            max_age: Seconds after a sync before mirrored data counts as a miss
+        """
+        self.app = app
+        self.base_url = base_url
+        self.max_age = max_age
+        self._engine = None
+
+    @property
+    def engine(self):
+        # Reads use the engine directly, so they also work from client
+        # worker threads that have no application context
+        if self._engine is None:
+            with self.app.app_context():
+                self._engine = db.engine
+        return self._engine
+
+    def _read(self, base_url, resource, statement):
+        """Run a read if the resource was synced recently enough, else return None"""
+        if base_url != self.base_url:
+            return None
+
+        with self.engine.connect() as connection:
+            synced_at = connection.execute(
+                select(MirrorSyncState.synced_at).where(MirrorSyncState.resource == resource)
+            ).scalar()
+            if synced_at is None or synced_at < datetime.utcnow() - timedelta(seconds=self.max_age):
+                return None
+            data = [row[0] for row in connection.execute(statement)]
+
+        return mirrored(data, synced_at)
+
+    def courses(self, base_url, token_key):
+        return self._read(base_url, f"courses:{token_key}",
+                          select(MirroredCourse.data).order_by(MirroredCourse.id))
+
+    def assignments(self, base_url, course_id):
+        result = self._read(base_url, f"assignments:{course_id}",
+                            select(MirroredAssignment.data).where(MirroredAssignment.course_id == str(course_id)))
+        if result is None:
+            return None
+        # Same order as the Canvas assignments list
+        return result._replace(data=sorted(
+            result.data, key=lambda assignment: (assignment.get('position') or 0, assignment.get('id') or 0)
+        ))
+
+    def roster(self, base_url, course_id):
+        return self._read(base_url, f"students:{course_id}",
+                          select(MirroredStudent.data).where(MirroredStudent.course_id == str(course_id)))
+
+    def states(self):
+        """
+        Get the sync state of every mirrored resource
+
+        Returns:
+            List[MirrorSyncState]: States ordered by resource
+        """
+        return MirrorSyncState.query.order_by(MirrorSyncState.resource).all()
+
+class MirrorSync:
+    """
+    Keeps the database mirror in step with Canvas
+
+    Each cycle lists the sync token's teacher courses, then each course's
+    assignments and student roster. Canvas list endpoints can't filter by
+    updated_at, so every list is read (revalidated with ETags when the
+    response cache is on), but only new or changed rows are written.
+    Assignments are pre-filtered by their high-water mark; courses embed
+    the token's enrollments and a student's updated_at only follows their
+    enrollments, so those rows are always compared. A resource whose fetch
+    fails keeps its previous contents and sync time.
+    """
+
+    def __init__(self, app, client, interval=DEFAULT_SYNC_INTERVAL):
+        """
+        Initialize the sync worker
+
+        Args:
+            app: Flask application whose database holds the mirror
+            client: LMSClient of the token whose courses are mirrored; it
+                must not read from the mirror itself
+            interval: Seconds between sync cycles
+        """
+        self.app = app
+        self.client = client
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sync_once(self):
+        """
+        Run one sync cycle
+
+        Returns:
+            Dict[str, int]: Counts of rows written and deleted, and courses that failed
+
+        Raises:
+            requests.exceptions.RequestException: If the course list cannot be fetched
+        """
+        stats = {'written': 0, 'deleted': 0, 'failed_courses': 0}
+
+        with self.app.app_context():
+            courses = self.client.courses.list_teacher_courses()
+            course_ids = [str(course['id']) for course in courses]
+            self._sync(stats, MirroredCourse, f"courses:{self.client.courses.token_key}", {}, {
+                str(course['id']): {'data': course, 'updated_at': parse_canvas_time(course.get('updated_at'))}
+                for course in courses
+            })
+            self._prune(course_ids)
+
+            for course_id in course_ids:
+                try:
+                    assignments = self.client.assignments.list_assignments(course_id)
+                    roster = self.client.courses.get_course_roster(course_id)
+                except requests.exceptions.RequestException as e:
+                    print(f"Error syncing course {course_id}: {e}")
+                    stats['failed_courses'] += 1
+                    continue
+
+                self._sync(stats, MirroredAssignment, f"assignments:{course_id}", {'course_id': course_id}, {
+                    str(assignment['id']): {
+                        'data': assignment,
+                        'updated_at': parse_canvas_time(assignment.get('updated_at'))
+                    }
+                    for assignment in assignments
+                }, trust_updated_at=True)
+                self._sync(stats, MirroredStudent, f"students:{course_id}", {'course_id': course_id}, {
+                    str(user['id']): {
+                        'email': user['email'].lower(),
+                        'data': user,
+                        'updated_at': max(filter(None, (
+                            parse_canvas_time(enrollment.get('updated_at'))
+                            for enrollment in user.get('enrollments', [])
+                        )), default=None)
+                    }
+                    for user in roster if active_student(user)
+                })
+
+        return stats
+
+    def _sync(self, stats, model, resource, scope, rows, trust_updated_at=False):
+        """Mirror one resource in its own transaction"""
+        try:
+            written, deleted = sync_rows(model, resource, scope, rows, datetime.utcnow(), trust_updated_at)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        stats['written'] += written
+        stats['deleted'] += deleted
+
+    def _prune(self, course_ids):
+        """Drop the mirrored data of courses the token no longer teaches"""
+        token_resource = f"courses:{self.client.courses.token_key}"
+        for model in (MirroredAssignment, MirroredStudent):
+            model.query.filter(model.course_id.notin_(course_ids)).delete(synchronize_session=False)
+        for state in MirrorSyncState.query.filter(MirrorSyncState.resource != token_resource):
+            kind, _, scope = state.resource.partition(':')
+            if kind == 'courses' or scope not in course_ids:
+                db.session.delete(state)
+        db.session.commit()
+
+    def run(self):
+        """Run sync cycles every `interval` seconds until stopped"""
+        while not self._stop.is_set():
+            try:
+                stats = self.sync_once()
+                print(f"Canvas mirror synced: {stats}")
+            except Exception as e:
+                # Keep the worker alive; the next cycle retries
+                print(f"Error syncing Canvas mirror: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start syncing in a background daemon thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='canvas-mirror-sync', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after its current cycle"""
+        self._stop.set()
+
+def active_student(user):
+    """Check if a roster user has an email and an active StudentEnrollment"""
+    return bool(user.get('email')) and bool(EnrollmentIndex.build([user]))
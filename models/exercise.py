@@ -1,7 +1,31 @@
 # models/exercise.py - Exercise tracking model
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import case, func, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from models.user import db
+from monitoring.metrics import timed_query
+
+# Number of (student, course, exercise) keys looked up per query in bulk operations
+BULK_LOOKUP_CHUNK_SIZE = 300
+
+# Default and maximum number of attempts per page of the paginated helpers
+ATTEMPT_PAGE_SIZE = 100
+MAX_ATTEMPT_PAGE_SIZE = 1000
+
+# Groupings supported by the course progress aggregation
+PROGRESS_GROUPINGS = {
+    'student': ('student_email',),
+    'exercise': ('exercise_id',),
+    'student_exercise': ('student_email', 'exercise_id'),
+}
+
+# Dialect-specific INSERT constructs supporting ON CONFLICT ... DO UPDATE
+UPSERT_INSERTS = {
+    'postgresql': postgresql_insert,
+    'sqlite': sqlite_insert,
+}
 
 class ExerciseAttempt(db.Model):
     """Model to track student exercise attempts"""
@@ -17,6 +41,23 @@ class ExerciseAttempt(db.Model):
     attempts = db.Column(db.Integer, default=1)
     is_completed = db.Column(db.Boolean, default=False)
     
+    # Indexes for the access paths of the helpers below; existing databases
+    # get them through models/migrations.py
+    __table_args__ = (
+        # Open attempt lookup and latest attempt of one exercise
+        db.Index('ix_exercise_attempts_lookup', 'student_email', 'course_id', 'exercise_id', 'started_at'),
+        # Student history, newest first, with or without a course filter
+        db.Index('ix_exercise_attempts_student_started', 'student_email', 'started_at', 'id'),
+        db.Index('ix_exercise_attempts_student_course_started', 'student_email', 'course_id', 'started_at', 'id'),
+        # Course progress
+        db.Index('ix_exercise_attempts_course_started', 'course_id', 'started_at', 'id'),
+        # At most one open attempt per student and exercise (target of the upsert)
+        db.Index('uq_exercise_attempts_open', 'student_email', 'course_id', 'exercise_id',
+                 unique=True,
+                 sqlite_where=is_completed == False,  # noqa: E712
+                 postgresql_where=is_completed == False),  # noqa: E712
+    )
+    
     def __init__(self, student_email, course_id, exercise_id):
         self.student_email = student_email
         self.course_id = course_id
@@ -35,7 +76,57 @@ class ExerciseAttempt(db.Model):
             'attempts': self.attempts,
             'is_completed': self.is_completed
         }
+
+class StudentExerciseSummary(db.Model):
+    """
+    Model summarizing the attempts of a student at an exercise
+    
+    Kept up to date in the same transaction as the attempt it summarizes,
+    so progress views read one row per student and exercise instead of
+    aggregating exercise_attempts. `flask rebuild-summaries` recomputes it.
+    """
+    __tablename__ = 'student_exercise_summaries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_email = db.Column(db.String(120), nullable=False)
+    course_id = db.Column(db.String(50), nullable=False)
+    exercise_id = db.Column(db.String(50), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    completions = db.Column(db.Integer, nullable=False, default=0)
+    best_score = db.Column(db.Float, nullable=True)
+    score_total = db.Column(db.Float, nullable=False, default=0)
+    first_started_at = db.Column(db.DateTime, nullable=True)
+    last_started_at = db.Column(db.DateTime, nullable=True)
+    first_completed_at = db.Column(db.DateTime, nullable=True)
+    last_completed_at = db.Column(db.DateTime, nullable=True)
+    fastest_completion_seconds = db.Column(db.Float, nullable=True)
+    
+    __table_args__ = (
+        # Course progress, ordered by student and exercise (target of the upsert)
+        db.Index('uq_student_exercise_summaries_key', 'course_id', 'student_email', 'exercise_id', unique=True),
+        # Progress of one student, with or without a course filter
+        db.Index('ix_student_exercise_summaries_student', 'student_email', 'course_id', 'exercise_id'),
+    )
+    
+    def to_dict(self):
+        """Convert summary to dictionary"""
+        return {
+            'student_email': self.student_email,
+            'course_id': self.course_id,
+            'exercise_id': self.exercise_id,
+            'attempts': self.attempts,
+            'completions': self.completions,
+            'is_completed': self.completions > 0,
+            'best_score': self.best_score,
+            'average_score': self.score_total / self.completions if self.completions else None,
+            'first_started_at': self.first_started_at.isoformat() if self.first_started_at else None,
+            'last_started_at': self.last_started_at.isoformat() if self.last_started_at else None,
+            'first_completed_at': self.first_completed_at.isoformat() if self.first_completed_at else None,
+            'last_completed_at': self.last_completed_at.isoformat() if self.last_completed_at else None,
+            'fastest_completion_seconds': self.fastest_completion_seconds
+        }
         
+@timed_query
 def log_exercise_attempt(student_email, course_id, exercise_id):
     """
     Log a student's attempt at an exercise
@@ -48,30 +139,128 @@ def log_exercise_attempt(student_email, course_id, exercise_id):
     Returns:
         ExerciseAttempt: The created or updated attempt record
     """
-    # Check if there's an existing attempt
-    attempt = ExerciseAttempt.query.filter_by(
-        student_email=student_email,
-        course_id=course_id,
-        exercise_id=exercise_id,
-        is_completed=False
-    ).first()
+    if supports_upsert():
+        return upsert_exercise_attempt(student_email, course_id, exercise_id)
+    
+    # Fallback for databases without ON CONFLICT: read, then write
+    attempt = open_attempt_query(student_email, course_id, exercise_id).first()
     
     if attempt:
         # Update existing attempt
         attempt.attempts += 1
-        db.session.commit()
-        return attempt
     else:
         # Create new attempt
-        new_attempt = ExerciseAttempt(
+        attempt = ExerciseAttempt(
             student_email=student_email,
             course_id=course_id,
             exercise_id=exercise_id
         )
-        db.session.add(new_attempt)
+        attempt.started_at = datetime.utcnow()
+        db.session.add(attempt)
+    
+    summary = StudentExerciseSummary.query.filter_by(
+        course_id=course_id,
+        student_email=student_email,
+        exercise_id=exercise_id
+    ).first()
+    if summary is None:
+        summary = StudentExerciseSummary(
+            student_email=student_email,
+            course_id=course_id,
+            exercise_id=exercise_id,
+            attempts=0,
+            completions=0,
+            score_total=0,
+            first_started_at=attempt.started_at
+        )
+        db.session.add(summary)
+    summary.attempts += 1
+    summary.last_started_at = max(summary.last_started_at or attempt.started_at, attempt.started_at)
+    
+    db.session.commit()
+    return attempt
+        
+def supports_upsert():
+    """Check if the database supports INSERT ... ON CONFLICT DO UPDATE ... RETURNING"""
+    dialect = db.session.get_bind().dialect
+    if dialect.name == 'sqlite':
+        # RETURNING needs SQLite 3.35
+        return (dialect.server_version_info or (0,)) >= (3, 35)
+    return dialect.name in UPSERT_INSERTS
+
+@timed_query
+def upsert_exercise_attempt(student_email, course_id, exercise_id):
+    """
+    Insert an open attempt, or increment the existing one, in a single statement
+    
+    Relies on the uq_exercise_attempts_open partial unique index, so
+    concurrent calls can't create duplicate open attempts.
+    
+    Args:
+        student_email: Email of the student
+        course_id: ID of the course
+        exercise_id: ID of the exercise
+        
+    Returns:
+        ExerciseAttempt: The created or updated attempt record
+    """
+    insert = UPSERT_INSERTS[db.session.get_bind().dialect.name]
+    statement = insert(ExerciseAttempt).values(
+        student_email=student_email,
+        course_id=course_id,
+        exercise_id=exercise_id,
+        started_at=datetime.utcnow(),
+        attempts=1,
+        is_completed=False
+    ).on_conflict_do_update(
+        index_elements=['student_email', 'course_id', 'exercise_id'],
+        index_where=ExerciseAttempt.is_completed == False,  # noqa: E712
+        set_={'attempts': ExerciseAttempt.attempts + 1}
+    ).returning(ExerciseAttempt)
+    
+    try:
+        attempt = db.session.scalars(statement, execution_options={'populate_existing': True}).one()
+        upsert_exercise_summary(attempt)
         db.session.commit()
-        return new_attempt
+    except Exception:
+        db.session.rollback()
+        raise
+    return attempt
+
+def upsert_exercise_summary(attempt):
+    """
+    Count one more attempt in the summary of a student at an exercise
+    
+    Runs in the caller's transaction; the caller commits.
+    
+    Args:
+        attempt: The attempt that was just created or incremented
+    """
+    insert = UPSERT_INSERTS[db.session.get_bind().dialect.name]
+    statement = insert(StudentExerciseSummary).values(
+        student_email=attempt.student_email,
+        course_id=attempt.course_id,
+        exercise_id=attempt.exercise_id,
+        attempts=1,
+        completions=0,
+        score_total=0,
+        first_started_at=attempt.started_at,
+        last_started_at=attempt.started_at
+    )
+    last_started_at = StudentExerciseSummary.last_started_at
+    statement = statement.on_conflict_do_update(
+        index_elements=['course_id', 'student_email', 'exercise_id'],
+        set_={
+            'attempts': StudentExerciseSummary.attempts + 1,
+            'last_started_at': case(
+                (last_started_at >= statement.excluded.last_started_at, last_started_at),
+                else_=statement.excluded.last_started_at
+            )
+        }
+    )
+    db.session.execute(statement)
         
+@timed_query
 def complete_exercise_attempt(student_email, course_id, exercise_id, score):
     """
     Mark an exercise attempt as completed with a score
@@ -86,34 +275,403 @@ def complete_exercise_attempt(student_email, course_id, exercise_id, score):
         ExerciseAttempt: The updated attempt record
     """
     # Find the most recent attempt
-    attempt = ExerciseAttempt.query.filter_by(
-        student_email=student_email,
-        course_id=course_id,
-        exercise_id=exercise_id
-    ).order_by(ExerciseAttempt.started_at.desc()).first()
+    attempt = latest_attempt_query(student_email, course_id, exercise_id).first()
     
     if attempt:
         attempt.completed_at = datetime.utcnow()
         attempt.score = score
         attempt.is_completed = True
-        db.session.commit()
+        try:
+            db.session.flush()
+            refresh_exercise_summaries([(student_email, course_id, exercise_id)])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
         
     return attempt
+
+@timed_query
+def complete_exercise_attempts(submissions):
+    """
+    Mark the latest attempt of many exercises as completed in one transaction
+    
+    The latest attempts are found with a few set-based queries and updated
+    with one bulk UPDATE. If the same exercise appears more than once, the
+    last submission's score wins.
+    
+    Args:
+        submissions: List of dicts with student_email, course_id, exercise_id and score
+        
+    Returns:
+        List[Optional[int]]: ID of the completed attempt for each submission,
+        or None if the student has no attempt at that exercise
+        
+    Raises:
+        sqlalchemy.exc.SQLAlchemyError: If the transaction fails (nothing is applied)
+    """
+    keys = [(s['student_email'], str(s['course_id']), str(s['exercise_id'])) for s in submissions]
+    unique_keys = list(dict.fromkeys(keys))
+    
+    # Latest attempt per key, looked up in chunks of keys
+    key_columns = tuple_(ExerciseAttempt.student_email, ExerciseAttempt.course_id, ExerciseAttempt.exercise_id)
+    latest = {}
+    for start in range(0, len(unique_keys), BULK_LOOKUP_CHUNK_SIZE):
+        chunk = unique_keys[start:start + BULK_LOOKUP_CHUNK_SIZE]
+        rows = db.session.query(
+            ExerciseAttempt.id,
+            ExerciseAttempt.student_email,
+            ExerciseAttempt.course_id,
+            ExerciseAttempt.exercise_id,
+            ExerciseAttempt.started_at
+        ).filter(key_columns.in_(chunk)).all()
+        
+        for attempt_id, student_email, course_id, exercise_id, started_at in rows:
+            key = (student_email, course_id, exercise_id)
+            if key not in latest or (started_at, attempt_id) > latest[key]:
+                latest[key] = (started_at, attempt_id)
+    
+    now = datetime.utcnow()
+    updates = {}
+    for key, submission in zip(keys, submissions):
+        if key in latest:
+            attempt_id = latest[key][1]
+            updates[attempt_id] = {
+                'id': attempt_id,
+                'completed_at': now,
+                'score': submission.get('score', 100),
+                'is_completed': True
+            }
+    
+    try:
+        if updates:
+            db.session.execute(update(ExerciseAttempt), list(updates.values()))
+            refresh_exercise_summaries([key for key in unique_keys if key in latest])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return [latest[key][1] if key in latest else None for key in keys]
+    
+@timed_query
+def get_student_exercise_attempts(student_email, course_id=None, limit=ATTEMPT_PAGE_SIZE, after=None):
+    """
+    Get a page of a student's exercise attempts, newest first
+    
+    Args:
+        student_email: Email of the student
+        course_id: Optional course ID to filter by
+        limit: Maximum number of attempts to return
+        after: Key of the last attempt of the previous page (see paginate_attempts)
+        
+    Returns:
+        Tuple[List[ExerciseAttempt], Optional[Tuple[datetime, int]]]: The
+        attempts and the key to pass as `after` for the next page (None on the last page)
+    """
+    return paginate_attempts(student_attempts_query(student_email, course_id), limit, after)
+
+@timed_query
+def get_course_attempts(course_id, limit=ATTEMPT_PAGE_SIZE, after=None):
+    """
+    Get a page of the exercise attempts in a course, newest first
+    
+    Args:
+        course_id: ID of the course
+        limit: Maximum number of attempts to return
+        after: Key of the last attempt of the previous page (see paginate_attempts)
+        
+    Returns:
+        Tuple[List[ExerciseAttempt], Optional[Tuple[datetime, int]]]: The
+        attempts and the key to pass as `after` for the next page (None on the last page)
+    """
+    return paginate_attempts(course_attempts_query(course_id), limit, after)
+
+def paginate_attempts(query, limit, after=None):
+    """
+    Get one page of an attempt query ordered by (started_at, id), newest first
+    
+    Pages continue from the (started_at, id) key of the previous page's
+    last attempt rather than an offset, so each page is one index range
+    scan however deep it is.
+    
+    Args:
+        query: Attempt query ordered by started_at and id, descending
+        limit: Maximum number of attempts to return
+        after: (started_at, id) of the last attempt of the previous page
+        
+    Returns:
+        Tuple[List[ExerciseAttempt], Optional[Tuple[datetime, int]]]: The
+        attempts and the key of the last one if more attempts follow
+    """
+    if after is not None:
+        query = attempts_after(query, after)
     
-def get_student_exercise_attempts(student_email, course_id=None):
+    # Fetch one extra attempt to know if there is a next page
+    attempts = query.limit(limit + 1).all()
+    if len(attempts) <= limit:
+        return attempts, None
+    
+    last = attempts[limit - 1]
+    return attempts[:limit], (last.started_at, last.id)
+
+@timed_query
+def get_student_exercise_summaries(student_email, course_id=None):
     """
-    Get all exercise attempts for a student
+    Get the progress of a student at each exercise
     
     Args:
         student_email: Email of the student
         course_id: Optional course ID to filter by
         
     Returns:
-        List[ExerciseAttempt]: List of attempt records
+        List[StudentExerciseSummary]: One summary per exercise attempted
+    """
+    return student_summaries_query(student_email, course_id).all()
+
+@timed_query
+def get_course_exercise_summaries(course_id, student_email=None):
+    """
+    Get the progress of every student at every exercise of a course
+    
+    Args:
+        course_id: ID of the course
+        student_email: Optional student to filter by
+        
+    Returns:
+        List[StudentExerciseSummary]: Summaries ordered by student and exercise
+    """
+    query = StudentExerciseSummary.query.filter_by(course_id=course_id)
+    
+    if student_email:
+        query = query.filter_by(student_email=student_email)
+        
+    return query.order_by(StudentExerciseSummary.student_email, StudentExerciseSummary.exercise_id).all()
+
+def completion_seconds_expression(dialect=None):
+    """SQL expression for the seconds between start and completion of an attempt"""
+    dialect = dialect or db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return (func.julianday(ExerciseAttempt.completed_at) - func.julianday(ExerciseAttempt.started_at)) * 86400
+    if dialect == 'postgresql':
+        return func.extract('epoch', ExerciseAttempt.completed_at - ExerciseAttempt.started_at)
+    return literal(None)
+
+@timed_query
+def get_course_progress_summary(course_id, group_by='student_exercise', student_email=None,
+                                exercise_id=None, limit=100, offset=0):
+    """
+    Aggregate the exercise progress of a course in the database
+    
+    Reads the student_exercise_summaries table, so the per student and
+    exercise view costs one index range scan of the rows returned.
+    
+    Args:
+        course_id: ID of the course
+        group_by: 'student', 'exercise' or 'student_exercise'
+        student_email: Optional student to filter by
+        exercise_id: Optional exercise to filter by
+        limit: Maximum number of groups to return
+        offset: Number of groups to skip
+        
+    Returns:
+        Tuple[List[str], List[tuple], bool]: Column names, one row per group
+        (ordered by the group columns) and whether more groups follow
+    """
+    query = course_progress_query(course_id, group_by, student_email, exercise_id)
+    
+    # Fetch one extra group to know if there is a next page
+    rows = query.offset(offset).limit(limit + 1).all()
+    columns = [column['name'] for column in query.column_descriptions]
+    return columns, [tuple(row) for row in rows[:limit]], len(rows) > limit
+
+def summary_aggregates(dialect=None):
+    """
+    Aggregates of exercise_attempts that make up a summary row
+    
+    Args:
+        dialect: Database dialect name (defaults to the session's)
+        
+    Returns:
+        Dict[str, ColumnElement]: Summary column name to its aggregate
+    """
+    completed = ExerciseAttempt.is_completed == True  # noqa: E712
+    return {
+        'attempts': func.sum(ExerciseAttempt.attempts),
+        'completions': func.sum(case((completed, 1), else_=0)),
+        'best_score': func.max(case((completed, ExerciseAttempt.score))),
+        'score_total': func.coalesce(func.sum(case((completed, ExerciseAttempt.score))), 0),
+        'first_started_at': func.min(ExerciseAttempt.started_at),
+        'last_started_at': func.max(ExerciseAttempt.started_at),
+        'first_completed_at': func.min(case((completed, ExerciseAttempt.completed_at))),
+        'last_completed_at': func.max(case((completed, ExerciseAttempt.completed_at))),
+        'fastest_completion_seconds': func.min(case((completed, completion_seconds_expression(dialect)))),
+    }
+
+def summary_select(dialect=None):
+    """Select computing one summary row per student, course and exercise from exercise_attempts"""
+    key_columns = (ExerciseAttempt.student_email, ExerciseAttempt.course_id, ExerciseAttempt.exercise_id)
+    aggregates = summary_aggregates(dialect)
+    columns = ['student_email', 'course_id', 'exercise_id', *aggregates]
+    return columns, select(*key_columns, *aggregates.values()).group_by(*key_columns)
+
+def refresh_exercise_summaries(keys):
     """
+    Recompute the summaries of some exercises from their attempts
+    
+    Runs in the caller's session transaction; the caller commits.
+    
+    Args:
+        keys: List of (student_email, course_id, exercise_id) tuples
+    """
+    table = StudentExerciseSummary.__table__
+    summary_keys = tuple_(table.c.student_email, table.c.course_id, table.c.exercise_id)
+    attempt_keys = tuple_(ExerciseAttempt.student_email, ExerciseAttempt.course_id, ExerciseAttempt.exercise_id)
+    columns, statement = summary_select()
+    
+    for start in range(0, len(keys), BULK_LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + BULK_LOOKUP_CHUNK_SIZE]
+        db.session.execute(table.delete().where(summary_keys.in_(chunk)))
+        db.session.execute(table.insert().from_select(columns, statement.where(attempt_keys.in_(chunk))))
+
+@timed_query
+def rebuild_exercise_summaries(connection):
+    """
+    Recompute the whole student_exercise_summaries table from exercise_attempts
+    
+    Args:
+        connection: Connection whose transaction the rebuild runs in
+        
+    Returns:
+        int: Number of summary rows written
+    """
+    table = StudentExerciseSummary.__table__
+    columns, statement = summary_select(connection.dialect.name)
+    
+    connection.execute(table.delete())
+    connection.execute(table.insert().from_select(columns, statement))
+    return connection.execute(select(func.count()).select_from(table)).scalar()
+
+@timed_query
+def find_summary_mismatches(connection):
+    """
+    Compare the stored summaries with ones recomputed from exercise_attempts
+    
+    Args:
+        connection: Connection to read with
+        
+    Returns:
+        List[Tuple[str, str, str]]: Keys whose stored summary is missing,
+        extra or different
+    """
+    table = StudentExerciseSummary.__table__
+    columns, statement = summary_select(connection.dialect.name)
+    
+    def by_key(rows):
+        return {tuple(row[:3]): tuple(row[3:]) for row in rows}
+    
+    def same(stored, expected):
+        # Timing columns may differ by float rounding between the two computations
+        return all(
+            a == b or (isinstance(a, float) and isinstance(b, float) and abs(a - b) < 0.01)
+            for a, b in zip(stored, expected)
+        )
+    
+    expected = by_key(connection.execute(statement))
+    stored = by_key(connection.execute(select(*(table.c[name] for name in columns))))
+    
+    return sorted(
+        key for key in expected.keys() | stored.keys()
+        if key not in expected or key not in stored or not same(stored[key], expected[key])
+    )
+
+# Queries used by the helpers above, also used to check their query plans
+def open_attempt_query(student_email, course_id, exercise_id):
+    """Query for the open (not completed) attempt of a student at an exercise"""
+    return ExerciseAttempt.query.filter_by(
+        student_email=student_email,
+        course_id=course_id,
+        exercise_id=exercise_id,
+        is_completed=False
+    )
+
+def latest_attempt_query(student_email, course_id, exercise_id):
+    """Query for the attempts of a student at an exercise, newest first"""
+    return ExerciseAttempt.query.filter_by(
+        student_email=student_email,
+        course_id=course_id,
+        exercise_id=exercise_id
+    ).order_by(ExerciseAttempt.started_at.desc())
+
+def student_attempts_query(student_email, course_id=None):
+    """Query for the attempts of a student, optionally in one course, newest first"""
     query = ExerciseAttempt.query.filter_by(student_email=student_email)
     
     if course_id:
         query = query.filter_by(course_id=course_id)
         
-    return query.order_by(ExerciseAttempt.started_at.desc()).all()
\ No newline at end of file
+    return query.order_by(ExerciseAttempt.started_at.desc(), ExerciseAttempt.id.desc())
+
+def course_attempts_query(course_id):
+    """Query for the attempts in a course, newest first"""
+    return ExerciseAttempt.query.filter_by(course_id=course_id).order_by(
+        ExerciseAttempt.started_at.desc(),
+        ExerciseAttempt.id.desc()
+    )
+
+def student_summaries_query(student_email, course_id=None):
+    """Query for the exercise summaries of a student, optionally in one course"""
+    query = StudentExerciseSummary.query.filter_by(student_email=student_email)
+    
+    if course_id:
+        query = query.filter_by(course_id=course_id)
+        
+    return query.order_by(StudentExerciseSummary.course_id, StudentExerciseSummary.exercise_id)
+
+def attempts_after(query, after):
+    """Restrict a newest-first attempt query to attempts older than the (started_at, id) key `after`"""
+    return query.filter(tuple_(ExerciseAttempt.started_at, ExerciseAttempt.id) < tuple_(*after))
+
+def course_progress_query(course_id, group_by='student_exercise', student_email=None, exercise_id=None):
+    """Query for the progress of a course grouped by student, exercise or both, ordered by the groups"""
+    summary = StudentExerciseSummary
+    group_columns = [getattr(summary, name) for name in PROGRESS_GROUPINGS[group_by]]
+    
+    if group_by == 'student_exercise':
+        # One summary row per group, nothing to aggregate
+        columns = [
+            summary.attempts,
+            summary.completions,
+            summary.best_score,
+            (summary.score_total / func.nullif(summary.completions, 0)).label('average_score'),
+            summary.first_started_at,
+            summary.last_started_at,
+            summary.first_completed_at,
+            summary.fastest_completion_seconds,
+        ]
+    else:
+        columns = [
+            func.sum(summary.attempts).label('attempts'),
+            func.sum(summary.completions).label('completions'),
+            func.max(summary.best_score).label('best_score'),
+            (func.sum(summary.score_total) / func.nullif(func.sum(summary.completions), 0)).label('average_score'),
+            func.min(summary.first_started_at).label('first_started_at'),
+            func.max(summary.last_started_at).label('last_started_at'),
+            func.min(summary.first_completed_at).label('first_completed_at'),
+            func.min(summary.fastest_completion_seconds).label('fastest_completion_seconds'),
+        ]
+        counted = 'exercises' if group_by == 'student' else 'students'
+        columns += [
+            func.count().label(f'{counted}_attempted'),
+            func.sum(case((summary.completions > 0, 1), else_=0)).label(f'{counted}_completed'),
+        ]
+    
+    query = db.session.query(*group_columns, *columns).filter(summary.course_id == course_id)
+    if student_email:
+        query = query.filter(summary.student_email == student_email)
+    if exercise_id:
+        query = query.filter(summary.exercise_id == exercise_id)
+    
+    if group_by != 'student_exercise':
+        query = query.group_by(*group_columns)
+    return query.order_by(*group_columns)
\ No newline at end of file
@@ -0,0 +1,181 @@
+# models/export.py - Streaming export of exercise attempts
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from sqlalchemy import and_, select
+
+from models.user import db
+from models.exercise import ExerciseAttempt, StudentExerciseSummary
+
+# Export formats and their content types
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Rows fetched from the database cursor at a time
+EXPORT_BATCH_SIZE = 1000
+
+# Approximate size of the chunks written to the response
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+ATTEMPT_COLUMNS = (
+    'id', 'student_email', 'course_id', 'exercise_id', 'started_at',
+    'completed_at', 'score', 'attempts', 'is_completed'
+)
+
+# Summary columns added with include=summary, exported as summary_<name>
+SUMMARY_COLUMNS = (
+    'attempts', 'completions', 'best_score', 'first_completed_at', 'fastest_completion_seconds'
+)
+
+# Roster columns added with include=roster, by the Canvas user field they come from
+ROSTER_COLUMNS = {
+    'student_name': 'name',
+    'canvas_user_id': 'id',
+    'sis_user_id': 'sis_user_id',
+}
+
+def export_columns(with_summary=False, with_roster=False):
+    """
+    Get the column names of an export
+
+    Args:
+        with_summary: Include the student's summary of the exercise
+        with_roster: Include the student's Canvas user fields
+
+    Returns:
+        List[str]: Column names, in row order
+    """
+    columns = list(ATTEMPT_COLUMNS)
+    if with_summary:
+        columns += [f"summary_{name}" for name in SUMMARY_COLUMNS]
+    if with_roster:
+        columns += list(ROSTER_COLUMNS)
+    return columns
+
+def export_query(course_id, with_summary=False):
+    """Select for the attempts of a course in start order, optionally joined with their summaries"""
+    columns = [getattr(ExerciseAttempt, name) for name in ATTEMPT_COLUMNS]
+    statement = select(*columns)
+
+    if with_summary:
+        summary = StudentExerciseSummary
+        statement = select(*columns, *(getattr(summary, name) for name in SUMMARY_COLUMNS)).outerjoin(
+            summary,
+            and_(
+                summary.course_id == ExerciseAttempt.course_id,
+                summary.student_email == ExerciseAttempt.student_email,
+                summary.exercise_id == ExerciseAttempt.exercise_id
+            )
+        )
+
+    return statement.where(ExerciseAttempt.course_id == course_id).order_by(
+        ExerciseAttempt.started_at,
+        ExerciseAttempt.id
+    )
+
+def iter_export_rows(course_id, with_summary=False, roster=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Stream the attempts of a course from the database
+
+    Rows are fetched `batch_size` at a time through a server-side cursor
+    where the driver supports one, so memory use doesn't grow with the
+    number of attempts.
+
+    Args:
+        course_id: ID of the course
+        with_summary: Include the student's summary of the exercise
+        roster: Optional dictionary of lowercased email to Canvas user
+        batch_size: Rows fetched from the cursor at a time
+
+    Yields:
+        tuple: One row per attempt, in the order of export_columns()
+    """
+    statement = export_query(course_id, with_summary).execution_options(yield_per=batch_size)
+
+    for row in db.session.execute(statement):
+        if roster is None:
+            yield tuple(row)
+            continue
+
+        user = roster.get(row.student_email.lower(), {})
+        yield tuple(row) + tuple(user.get(field) for field in ROSTER_COLUMNS.values())
+
+def _serialize(value):
+    """Convert a column value to a JSON/CSV friendly value"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def encode_ndjson(columns, rows):
+    """Encode rows as newline-delimited JSON objects, one line at a time"""
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(_serialize, row)))) + '\n'
+
+def encode_csv(columns, rows):
+    """Encode rows as CSV with a header line, one line at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield _take(buffer)
+
+    for row in rows:
+        writer.writerow(['' if value is None else _serialize(value) for value in row])
+        yield _take(buffer)
+
+def _take(buffer):
+    """Return and clear the contents of a StringIO"""
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
+
+def chunk_lines(lines, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """Group encoded lines into byte chunks of about `chunk_bytes`"""
+    chunk = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        chunk.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield b''.join(chunk)
+
+def gzip_chunks(chunks):
+    """Compress a stream of byte chunks into a gzip stream on the fly"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def stream_export(course_id, export_format='ndjson', with_summary=False, roster=None, compress=False):
+    """
+    Stream the attempts of a course as NDJSON or CSV
+
+    Args:
+        course_id: ID of the course
+        export_format: 'ndjson' or 'csv'
+        with_summary: Include the student's summary of the exercise
+        roster: Optional dictionary of lowercased email to Canvas user
+        compress: Gzip the output
+
+    Returns:
+        Iterator[bytes]: Chunks of the export
+    """
+    columns = export_columns(with_summary, roster is not None)
+    rows = iter_export_rows(course_id, with_summary, roster)
+    encode = encode_csv if export_format == 'csv' else encode_ndjson
+
+    chunks = chunk_lines(encode(columns, rows))
+    return gzip_chunks(chunks) if compress else chunks
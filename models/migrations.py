@@ -0,0 +1,100 @@
+# models/migrations.py - Versioned schema migrations for existing databases
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from models.user import db
+from models.exercise import ExerciseAttempt, StudentExerciseSummary, rebuild_exercise_summaries
+
+class SchemaMigration(db.Model):
+    """Model recording which schema migrations have been applied"""
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+def _create_indexes(connection, model, names):
+    """Create the named indexes of a model's table if they don't exist yet"""
+    for index in model.__table__.indexes:
+        if index.name in names:
+            index.create(bind=connection, checkfirst=True)
+
+def add_exercise_attempt_indexes(connection):
+    """Index exercise_attempts for the lookups in models/exercise.py"""
+    _create_indexes(connection, ExerciseAttempt, {
+        'ix_exercise_attempts_lookup',
+        'ix_exercise_attempts_student_started',
+        'ix_exercise_attempts_student_course_started',
+        'ix_exercise_attempts_course_started',
+    })
+
+def add_open_attempt_unique_index(connection):
+    """Merge duplicate open attempts, then allow only one open attempt per exercise"""
+    table = ExerciseAttempt.__table__
+    key = (table.c.student_email, table.c.course_id, table.c.exercise_id)
+
+    duplicates = connection.execute(
+        select(*key, func.min(table.c.id), func.sum(table.c.attempts))
+        .where(table.c.is_completed == False)  # noqa: E712
+        .group_by(*key)
+        .having(func.count() > 1)
+    ).fetchall()
+
+    # Keep the oldest open attempt and add the other attempts' counts to it
+    for student_email, course_id, exercise_id, keep_id, total_attempts in duplicates:
+        connection.execute(table.update().where(table.c.id == keep_id).values(attempts=total_attempts))
+        connection.execute(table.delete().where(
+            table.c.student_email == student_email,
+            table.c.course_id == course_id,
+            table.c.exercise_id == exercise_id,
+            table.c.is_completed == False,  # noqa: E712
+            table.c.id != keep_id
+        ))
+
+    _create_indexes(connection, ExerciseAttempt, {'uq_exercise_attempts_open'})
+
+def backfill_exercise_summaries(connection):
+    """Create the exercise summary table and fill it from the existing attempts"""
+    StudentExerciseSummary.__table__.create(bind=connection, checkfirst=True)
+    rebuild_exercise_summaries(connection)
+
+# Ordered list of (version, description, function taking a connection)
+MIGRATIONS = [
+    (1, 'Add indexes for exercise attempt queries', add_exercise_attempt_indexes),
+    (2, 'Allow only one open attempt per student and exercise', add_open_attempt_unique_index),
+    (3, 'Backfill the student exercise summaries', backfill_exercise_summaries),
+]
+
+def run_migrations():
+    """
+    Apply all migrations that haven't been applied yet
+
+    `db.create_all()` creates missing tables but never changes existing
+    ones, so schema changes to existing tables are applied here. Must be
+    called inside an application context, after `db.create_all()`.
+
+    Returns:
+        List[int]: Versions applied by this call
+    """
+    SchemaMigration.__table__.create(bind=db.engine, checkfirst=True)
+    applied = {migration.version for migration in SchemaMigration.query.all()}
+
+    newly_applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+
+        # Each migration and its bookkeeping row commit together
+        with db.engine.begin() as connection:
+            migrate(connection)
+            connection.execute(SchemaMigration.__table__.insert().values(
+                version=version,
+                description=description,
+                applied_at=datetime.utcnow()
+            ))
+
+        print(f"Applied migration {version}: {description}")
+        newly_applied.append(version)
+
+    return newly_applied
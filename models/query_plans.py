@@ -0,0 +1,74 @@
+# models/query_plans.py - Query plan check for the exercise attempt helpers
+from datetime import datetime
+
+from sqlalchemy import text
+
+from models.user import db
+from models.exercise import (
+    open_attempt_query,
+    latest_attempt_query,
+    student_attempts_query,
+    course_attempts_query,
+    attempts_after,
+    student_summaries_query,
+    course_progress_query
+)
+
+# Sample arguments; the plan doesn't depend on the actual values
+SAMPLE_EMAIL = 'student@example.com'
+SAMPLE_COURSE = '1'
+SAMPLE_EXERCISE = '1'
+SAMPLE_PAGE_KEY = (datetime(2024, 1, 1), 1)
+SAMPLE_PAGE_SIZE = 101
+
+def helper_queries():
+    """
+    Get the query of each helper in models/exercise.py
+
+    Returns:
+        Dict[str, Query]: Helper name to the query it runs
+    """
+    return {
+        'log_exercise_attempt': open_attempt_query(SAMPLE_EMAIL, SAMPLE_COURSE, SAMPLE_EXERCISE).limit(1),
+        'complete_exercise_attempt': latest_attempt_query(SAMPLE_EMAIL, SAMPLE_COURSE, SAMPLE_EXERCISE).limit(1),
+        'get_student_exercise_attempts': student_attempts_query(SAMPLE_EMAIL).limit(SAMPLE_PAGE_SIZE),
+        'get_student_exercise_attempts (course)': student_attempts_query(SAMPLE_EMAIL, SAMPLE_COURSE).limit(SAMPLE_PAGE_SIZE),
+        'get_student_exercise_attempts (next page)': attempts_after(
+            student_attempts_query(SAMPLE_EMAIL), SAMPLE_PAGE_KEY).limit(SAMPLE_PAGE_SIZE),
+        'get_course_attempts': course_attempts_query(SAMPLE_COURSE).limit(SAMPLE_PAGE_SIZE),
+        'get_course_attempts (next page)': attempts_after(
+            course_attempts_query(SAMPLE_COURSE), SAMPLE_PAGE_KEY).limit(SAMPLE_PAGE_SIZE),
+        'get_student_exercise_summaries': student_summaries_query(SAMPLE_EMAIL),
+        'get_course_progress_summary (student_exercise)': course_progress_query(SAMPLE_COURSE).limit(101),
+        'get_course_progress_summary (student)': course_progress_query(SAMPLE_COURSE, 'student').limit(101),
+    }
+
+def explain(query):
+    """
+    Get the database's query plan for a query
+
+    Uses EXPLAIN QUERY PLAN on SQLite and EXPLAIN elsewhere (PostgreSQL).
+
+    Args:
+        query: SQLAlchemy query
+
+    Returns:
+        List[str]: Lines of the query plan
+    """
+    dialect = db.engine.dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN' if dialect.name == 'sqlite' else 'EXPLAIN'
+
+    rows = db.session.execute(text(f"{prefix} {sql}")).fetchall()
+    if dialect.name == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+def print_query_plans():
+    """Print the query plan of each helper so index use can be checked"""
+    print(f"Database: {db.engine.dialect.name}")
+    for name, query in helper_queries().items():
+        print(f"\n{name}:")
+        for line in explain(query):
+            print(f"  {line}")
@@ -54,6 +54,10 @@ def initialize_db(app) -> None:
     with app.app_context():
         db.create_all()
         
+        # Bring existing tables up to date (indexes, constraints, ...)
+        from models.migrations import run_migrations
+        run_migrations()
+        
         # Check if any user exists
         if User.query.count() == 0:
             # Create default admin user
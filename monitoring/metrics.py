@@ -0,0 +1,251 @@
+# monitoring/metrics.py - In-process metrics exported in the Prometheus text format
+import bisect
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format label pairs as {name="value",...}, or an empty string without labels"""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value, writing whole numbers without a fraction"""
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class Metric:
+    """Base class of a metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize the metric
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """Get (name suffix, formatted labels, value) for every sample"""
+        return ()
+
+    def render(self) -> List[str]:
+        """Render the metric family as exposition lines"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: object, amount: float = 1) -> None:
+        """
+        Increase the count of a label set
+
+        Args:
+            *labels: Label values, in the order of labelnames
+            amount: Amount to add
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield "_total", _format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    """Distribution of observed values (e.g. latencies) in cumulative buckets per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+            buckets: Upper bounds of the buckets, in increasing order
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: object) -> None:
+        """
+        Record an observation
+
+        Args:
+            value: Observed value
+            *labels: Label values, in the order of labelnames
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, *labels: object) -> Callable[[Callable], Callable]:
+        """
+        Decorator recording the duration of each call of a function
+
+        Args:
+            *labels: Label values, in the order of labelnames
+
+        Returns:
+            Decorator
+        """
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, *labels)
+            return timed
+        return decorator
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield "_bucket", _format_labels(self.labelnames + ("le",), key + (bound,)), cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class Registry:
+    """Set of metric families rendered together"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric family
+
+        Args:
+            metric: Metric to add
+
+        Returns:
+            The metric, so it can be assigned where it is declared
+        """
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render all metric families in the Prometheus text format
+
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registry exported on /metrics
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "lms_http_requests", "Flask requests handled", ("method", "route", "status")))
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "lms_http_request_duration_seconds", "Time to build the response of a Flask route", ("method", "route")))
+
+CANVAS_REQUESTS = registry.register(Counter(
+    "lms_canvas_requests", "Canvas API calls by outcome (status code, error or circuit_open)",
+    ("method", "endpoint", "outcome")))
+CANVAS_REQUEST_SECONDS = registry.register(Histogram(
+    "lms_canvas_request_duration_seconds", "Canvas API call latency", ("method", "endpoint")))
+
+PROXY_REQUESTS = registry.register(Counter(
+    "lms_proxy_requests", "Requests forwarded to Juice Shop", ("method", "status", "cache")))
+PROXY_REQUEST_SECONDS = registry.register(Histogram(
+    "lms_proxy_request_duration_seconds", "Time until the upstream or cached response starts", ("method",)))
+PROXY_BYTES = registry.register(Counter(
+    "lms_proxy_response_bytes", "Response body bytes sent by the proxy", ("source",)))
+
+DB_QUERY_SECONDS = registry.register(Histogram(
+    "lms_db_query_duration_seconds", "Duration of the exercise database helpers", ("operation",)))
+
+
+def timed_query(function: Callable) -> Callable:
+    """Record the duration of a database helper under its function name"""
+    return DB_QUERY_SECONDS.time(function.__name__)(function)
+
+
+def observe_canvas_call(method: str, endpoint: str, outcome: str, seconds: Optional[float]) -> None:
+    """
+    Record one Canvas API call
+
+    Args:
+        method: HTTP method
+        endpoint: Endpoint template, e.g. /courses/:id/users
+        outcome: Status code, 'error' or 'circuit_open'
+        seconds: Latency, or None if no request was sent
+    """
+    CANVAS_REQUESTS.inc(method, endpoint, outcome)
+    if seconds is not None:
+        CANVAS_REQUEST_SECONDS.observe(seconds, method, endpoint)
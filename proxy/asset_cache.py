@@ -0,0 +1,398 @@
+# proxy/asset_cache.py - Shared cache for static assets served through the proxy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+# Default cache settings
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_OBJECT_BYTES = 8 * 1024 * 1024
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024
+
+# Response headers kept with a cached asset
+STORED_HEADERS = {
+    'content-type', 'content-encoding', 'content-length', 'cache-control', 'etag',
+    'last-modified', 'expires', 'vary', 'content-language', 'access-control-allow-origin'
+}
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Parse a Cache-Control header
+
+    Args:
+        value: Header value, e.g. "public, max-age=3600"
+
+    Returns:
+        Dictionary of lowercase directive to its argument (or None)
+    """
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers: Dict[str, str]) -> Optional[int]:
+    """
+    Get how long a response may be served without revalidation
+
+    Args:
+        headers: Response headers (lowercase names)
+
+    Returns:
+        Seconds the response stays fresh, or None if a shared cache must not store it
+    """
+    directives = parse_cache_control(headers.get('cache-control'))
+    if 'no-store' in directives or 'private' in directives:
+        return None
+
+    # Only responses that opt into caching are stored, so API answers
+    # that merely carry an ETag are never shared between students
+    max_age = directives.get('s-maxage') or directives.get('max-age')
+    if 'public' not in directives and max_age is None:
+        return None
+
+    if 'no-cache' in directives:
+        return 0
+
+    try:
+        return max(int(max_age), 0) if max_age is not None else 0
+    except ValueError:
+        return 0
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weakly compare an If-None-Match header with an ETag"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    def strip_weak(tag):
+        tag = tag.strip()
+        return tag[2:] if tag.startswith('W/') else tag
+
+    return strip_weak(etag) in {strip_weak(tag) for tag in if_none_match.split(',')}
+
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: Optional[str]) -> bool:
+    """Check if a resource was not modified since the date sent by the browser"""
+    if not if_modified_since or not last_modified:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+class CachedAsset:
+    """A cached upstream response"""
+
+    def __init__(self, status: int, headers: List[Tuple[str, str]], body: bytes, expires_at: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+        lowered = {name.lower(): value for name, value in headers}
+        self.etag = lowered.get('etag')
+        self.last_modified = lowered.get('last-modified')
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def is_not_modified_for(self, request_headers) -> bool:
+        """Check if the browser already has this version (answer 304)"""
+        if_none_match = request_headers.get('If-None-Match')
+        if if_none_match:
+            return etag_matches(if_none_match, self.etag)
+        return not_modified_since(request_headers.get('If-Modified-Since'), self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers to revalidate this asset with the upstream server"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def refresh(self, headers: Dict[str, str], ttl: int) -> None:
+        """Extend the lifetime after a 304, taking over updated validators"""
+        self.expires_at = time.time() + ttl
+        updated = {name.lower(): value for name, value in headers.items()}
+        self.headers = [
+            (name, updated.get(name.lower(), value)) for name, value in self.headers
+        ]
+        self.etag = updated.get('etag', self.etag)
+        self.last_modified = updated.get('last-modified', self.last_modified)
+
+
+class AssetCache:
+    """
+    Two-tier (memory, optional disk) size-bounded LRU cache of proxied assets
+
+    Only GET responses that upstream marks as cacheable (see
+    freshness_lifetime) are stored, keyed by URL and accepted encoding.
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 max_object_bytes: int = DEFAULT_MAX_OBJECT_BYTES,
+                 disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = DEFAULT_DISK_BYTES):
+        """
+        Initialize the cache
+
+        Args:
+            max_memory_bytes: Maximum total size of the assets kept in memory
+            max_object_bytes: Largest single asset that is cached
+            disk_dir: Directory of the on-disk tier (disabled if None)
+            max_disk_bytes: Maximum total size of the on-disk tier
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.max_object_bytes = max_object_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, CachedAsset]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'stale': 0, 'misses': 0, 'revalidated': 0, 'not_modified_sent': 0, 'stored': 0}
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(url: str, accept_encoding: Optional[str]) -> str:
+        """
+        Build the cache key of a request
+
+        Bodies are cached still encoded, so the accepted encodings are part of the key.
+        """
+        encodings = sorted(
+            token.split(';')[0].strip().lower()
+            for token in (accept_encoding or '').split(',') if token.strip()
+        )
+        return hashlib.sha256(f"{url}\n{','.join(encodings)}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_cacheable_request(request) -> bool:
+        """Check if a browser request may be answered from the shared cache"""
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if 'Authorization' in request.headers:
+            return False
+        return 'no-store' not in parse_cache_control(request.headers.get('Cache-Control'))
+
+    def is_storable(self, status: int, headers: Dict[str, str]) -> Optional[int]:
+        """
+        Check if an upstream response may be stored
+
+        Args:
+            status: Upstream status code
+            headers: Upstream response headers (lowercase names)
+
+        Returns:
+            Freshness lifetime in seconds, or None if the response must not be stored
+        """
+        if status != 200 or 'set-cookie' in headers:
+            return None
+
+        vary = {token.strip().lower() for token in headers.get('vary', '').split(',') if token.strip()}
+        if vary - {'accept-encoding'}:
+            return None
+
+        length = headers.get('content-length')
+        if length is not None and length.isdigit() and int(length) > self.max_object_bytes:
+            return None
+
+        return freshness_lifetime(headers)
+
+    def get(self, key: str) -> Optional[CachedAsset]:
+        """
+        Get a cached asset (fresh or stale), promoting it from disk to memory
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached asset, or None on a miss
+        """
+        with self._lock:
+            asset = self._memory.get(key)
+            if asset is not None:
+                self._memory.move_to_end(key)
+                self._stats['hits' if asset.is_fresh else 'stale'] += 1
+                return asset
+
+        asset = self._read_disk(key)
+        with self._lock:
+            if asset is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits' if asset.is_fresh else 'stale'] += 1
+            self._store_memory(key, asset)
+        return asset
+
+    def put(self, key: str, asset: CachedAsset) -> None:
+        """
+        Store an asset in memory and, if enabled, on disk
+
+        Args:
+            key: Cache key
+            asset: Asset to store
+        """
+        if asset.size > self.max_object_bytes:
+            return
+
+        with self._lock:
+            self._stats['stored'] += 1
+            self._store_memory(key, asset)
+        self._write_disk(key, asset)
+
+    def touch(self, key: str, asset: CachedAsset) -> None:
+        """
+        Keep an asset after a 304 revalidation, rewriting only its metadata on disk
+
+        The body didn't change, so it is neither rewritten nor counted as stored.
+
+        Args:
+            key: Cache key
+            asset: Refreshed asset
+        """
+        with self._lock:
+            self._store_memory(key, asset)
+            on_disk = key in self._disk
+            if on_disk:
+                self._disk.move_to_end(key)
+
+        if on_disk:
+            meta_path, body_path = self._paths(key)
+            try:
+                self._write_file(meta_path, 'w', self._metadata(asset))
+                # The disk LRU order is rebuilt from body modification times
+                os.utime(body_path)
+            except OSError as e:
+                print(f"Error updating proxy cache entry {key}: {e}")
+
+    def record(self, event: str) -> None:
+        """Count a cache event (revalidated, not_modified_sent)"""
+        with self._lock:
+            self._stats[event] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache statistics"""
+        with self._lock:
+            return dict(self._stats,
+                        memory_entries=len(self._memory), memory_bytes=self._memory_bytes,
+                        disk_entries=len(self._disk), disk_bytes=self._disk_bytes)
+
+    def _store_memory(self, key: str, asset: CachedAsset) -> None:
+        """Insert into the memory tier; the caller holds the lock"""
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old.size
+
+        self._memory[key] = asset
+        self._memory_bytes += asset.size
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        return os.path.join(self.disk_dir, f"{key}.json"), os.path.join(self.disk_dir, f"{key}.body")
+
+    def _load_disk_index(self) -> None:
+        """Rebuild the on-disk LRU order from file modification times"""
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.body'):
+                path = os.path.join(self.disk_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-len('.body')], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _read_disk(self, key: str) -> Optional[CachedAsset]:
+        """Load an asset from the disk tier"""
+        if not self.disk_dir:
+            return None
+
+        with self._lock:
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            os.utime(body_path)
+        except (OSError, ValueError):
+            return None
+
+        return CachedAsset(meta['status'], [tuple(header) for header in meta['headers']], body, meta['expires_at'])
+
+    @staticmethod
+    def _metadata(asset: CachedAsset) -> str:
+        """Serialize everything but the body of an asset"""
+        return json.dumps({'status': asset.status, 'headers': asset.headers, 'expires_at': asset.expires_at})
+
+    @staticmethod
+    def _write_file(path: str, mode: str, content) -> None:
+        """Replace a file atomically"""
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, mode) as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    def _write_disk(self, key: str, asset: CachedAsset) -> None:
+        """Write an asset to the disk tier and evict old files past the size bound"""
+        if not self.disk_dir or asset.size > self.max_disk_bytes:
+            return
+
+        meta_path, body_path = self._paths(key)
+        try:
+            self._write_file(body_path, 'wb', asset.body)
+            self._write_file(meta_path, 'w', self._metadata(asset))
+        except OSError as e:
+            print(f"Error writing proxy cache entry {key}: {e}")
+            return
+
+        evicted = []
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            self._disk[key] = asset.size
+            self._disk_bytes += asset.size
+            while self._disk_bytes > self.max_disk_bytes and self._disk:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            for path in self._paths(old_key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
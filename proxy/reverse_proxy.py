@@ -0,0 +1,306 @@
+# proxy/reverse_proxy.py - Streaming reverse proxy for Juice Shop
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from flask import Request, Response
+from requests.adapters import HTTPAdapter
+
+from monitoring.metrics import PROXY_BYTES, PROXY_REQUESTS, PROXY_REQUEST_SECONDS
+from proxy.asset_cache import AssetCache, CachedAsset, STORED_HEADERS, freshness_lifetime
+
+# Default proxy settings
+DEFAULT_POOL_SIZE = 50
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 60
+
+# Headers that only apply to a single connection and must not be forwarded (RFC 7230, 6.1)
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'trailers', 'transfer-encoding', 'upgrade'
+}
+
+
+def filter_headers(headers: Iterable[Tuple[str, str]], excluded: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    """
+    Remove hop-by-hop headers, including any listed in the Connection header
+
+    Args:
+        headers: (name, value) pairs
+        excluded: Extra header names to drop (lowercase)
+
+    Returns:
+        List of (name, value) pairs safe to forward
+    """
+    headers = list(headers)
+    dropped = set(HOP_BY_HOP_HEADERS) | set(excluded)
+    for name, value in headers:
+        if name.lower() == 'connection':
+            dropped.update(token.strip().lower() for token in value.split(','))
+
+    return [(name, value) for name, value in headers if name.lower() not in dropped]
+
+
+def mount_path(request: Request, path: str) -> str:
+    """
+    Get the path the proxy is mounted at, with a trailing slash
+
+    Args:
+        request: Incoming Flask request
+        path: Path relative to the target URL, as matched by the route
+
+    Returns:
+        The request path without the proxied part, e.g. /assignment/
+    """
+    mount = request.path[:len(request.path) - len(path)] if path else request.path
+    return request.script_root + mount.rstrip('/') + '/'
+
+
+class _RequestBody:
+    """File-like wrapper around the incoming body that tells requests its length"""
+
+    def __init__(self, stream, length: int, chunk_size: int):
+        self.stream = stream
+        self.len = length
+        self.chunk_size = chunk_size
+
+    def read(self, size: int = -1) -> bytes:
+        return self.stream.read(self.chunk_size if size is None or size < 0 else size)
+
+
+class ReverseProxy:
+    """Reverse proxy with a persistent upstream connection pool and streaming bodies"""
+
+    def __init__(self, target_url: str, pool_size: int = DEFAULT_POOL_SIZE,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 cache: Optional[AssetCache] = None):
+        """
+        Initialize the proxy
+
+        Args:
+            target_url: Base URL of the upstream server
+            pool_size: Maximum number of pooled upstream connections
+            chunk_size: Size of the chunks streamed in both directions
+            timeout: (connect, read) timeouts in seconds
+            cache: Shared cache for cacheable responses (disabled if None)
+        """
+        self.target_url = target_url or ''
+        target = urlsplit(self.target_url)
+        self._target_origin = (target.scheme, target.netloc)
+        self._target_path = target.path.rstrip('/') + '/'
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Cookies belong to the browser, never keep them on the shared session
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    def rewrite_location(self, location: str, mount: str) -> str:
+        """
+        Map a redirect target on the upstream server back under the proxy mount
+
+        Absolute URLs on the target server and root-relative paths below the
+        target path are rewritten; relative paths already resolve under the
+        mount, and other servers are left alone.
+
+        Args:
+            location: Location header sent by the upstream server
+            mount: Path the proxy is mounted at, with a trailing slash
+
+        Returns:
+            Location to send to the browser
+        """
+        parts = urlsplit(location)
+        if parts.netloc:
+            if (parts.scheme or self._target_origin[0], parts.netloc) != self._target_origin:
+                return location
+        elif parts.scheme or not parts.path.startswith('/'):
+            return location
+
+        path = parts.path if parts.path.endswith('/') else parts.path + '/'
+        if not path.startswith(self._target_path):
+            return location
+        return urlunsplit(('', '', mount + parts.path[len(self._target_path):], parts.query, parts.fragment))
+
+    def _request_body(self, request: Request) -> Optional[object]:
+        """Get a streaming body for the upstream request, or None if there is none"""
+        if request.content_length:
+            return _RequestBody(request.stream, request.content_length, self.chunk_size)
+
+        if request.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            # Unknown length: requests sends a generator with chunked encoding
+            return iter(lambda: request.stream.read(self.chunk_size), b'')
+
+        return None
+
+    def _stream(self, upstream: requests.Response) -> Iterator[bytes]:
+        """Stream the raw upstream body without decoding it"""
+        size = 0
+        try:
+            for chunk in upstream.raw.stream(self.chunk_size, decode_content=False):
+                size += len(chunk)
+                yield chunk
+        finally:
+            upstream.close()
+            PROXY_BYTES.inc('upstream', amount=size)
+
+    def forward(self, request: Request, path: str) -> Response:
+        """
+        Forward a request to the upstream server and stream the answer back
+
+        Cacheable assets are answered from the asset cache when possible.
+
+        Args:
+            request: Incoming Flask request
+            path: Path relative to the target URL
+
+        Returns:
+            Flask response streaming the upstream body
+
+        Raises:
+            requests.exceptions.RequestException: If the upstream cannot be reached
+        """
+        url = urljoin(self.target_url, path)
+        if request.query_string:
+            url = f"{url}?{request.query_string.decode('latin-1')}"
+
+        # The body length is set again from the streamed body
+        headers = dict(filter_headers(request.headers.items(), excluded=('host', 'content-length')))
+        headers['X-Forwarded-For'] = request.remote_addr or ''
+        headers['X-Forwarded-Proto'] = request.scheme
+        headers['X-Forwarded-Host'] = request.host
+
+        started = time.perf_counter()
+        try:
+            if self.cache is not None and self.cache.is_cacheable_request(request):
+                response = self._forward_cached(request, url, headers)
+            else:
+                upstream = self._send(request.method, url, headers, self._request_body(request))
+                response = self._stream_response(upstream)
+        except requests.exceptions.RequestException:
+            PROXY_REQUESTS.inc(request.method, 'error', 'NONE')
+            raise
+
+        # Keep upstream redirects inside the proxy
+        location = response.headers.get('Location')
+        if location:
+            response.headers['Location'] = self.rewrite_location(location, mount_path(request, path))
+
+        # Latency until the response starts; the body is still streaming
+        PROXY_REQUEST_SECONDS.observe(time.perf_counter() - started, request.method)
+        PROXY_REQUESTS.inc(request.method, response.status_code, response.headers.get('X-Cache', 'NONE'))
+        return response
+
+    def _send(self, method: str, url: str, headers: Dict[str, str], body: Optional[object] = None) -> requests.Response:
+        """Send a request upstream through the connection pool without reading the body"""
+        return self.session.request(
+            method, url,
+            headers=headers,
+            data=body,
+            stream=True,
+            allow_redirects=False,
+            timeout=self.timeout
+        )
+
+    def _stream_response(self, upstream: requests.Response, body: Optional[Iterator[bytes]] = None,
+                         cache_status: Optional[str] = None) -> Response:
+        """Build a Flask response streaming an upstream response"""
+        # The raw body is passed through, so Content-Encoding and Content-Length still apply
+        response_headers = filter_headers(upstream.raw.headers.items())
+        if cache_status:
+            response_headers.append(('X-Cache', cache_status))
+
+        response = Response(
+            body if body is not None else self._stream(upstream),
+            status=upstream.status_code,
+            headers=response_headers,
+            direct_passthrough=True
+        )
+        response.call_on_close(upstream.close)
+        return response
+
+    def _forward_cached(self, request: Request, url: str, headers: Dict[str, str]) -> Response:
+        """Answer a cacheable request from the asset cache, revalidating or filling it as needed"""
+        key = self.cache.make_key(url, request.headers.get('Accept-Encoding'))
+        asset = self.cache.get(key)
+
+        if asset is not None and asset.is_fresh:
+            return self._serve_cached(request, asset, 'HIT')
+
+        if asset is not None and asset.has_validators:
+            # Revalidate with our own validators, not the browser's
+            conditional = {
+                name: value for name, value in headers.items()
+                if name.lower() not in ('if-none-match', 'if-modified-since')
+            }
+            conditional.update(asset.conditional_headers())
+            upstream = self._send('GET', url, conditional)
+
+            if upstream.status_code == 304:
+                upstream.close()
+                updated = dict(filter_headers(upstream.headers.items()))
+                merged = {name.lower(): value for name, value in asset.headers}
+                merged.update({name.lower(): value for name, value in updated.items()})
+                asset.refresh(updated, freshness_lifetime(merged) or 0)
+                self.cache.touch(key, asset)
+                self.cache.record('revalidated')
+                return self._serve_cached(request, asset, 'REVALIDATED')
+
+            return self._store_response(key, upstream)
+
+        upstream = self._send(request.method, url, headers)
+        if request.method != 'GET':
+            return self._stream_response(upstream)
+        return self._store_response(key, upstream)
+
+    def _serve_cached(self, request: Request, asset: CachedAsset, cache_status: str) -> Response:
+        """Serve a cached asset, or 304 if the browser already has it"""
+        if asset.is_not_modified_for(request.headers):
+            self.cache.record('not_modified_sent')
+            headers = [
+                (name, value) for name, value in asset.headers
+                if name.lower() in ('etag', 'last-modified', 'cache-control', 'expires', 'vary')
+            ]
+            return Response(status=304, headers=headers + [('X-Cache', cache_status)])
+
+        PROXY_BYTES.inc('cache', amount=len(asset.body))
+        return Response(asset.body, status=asset.status, headers=asset.headers + [('X-Cache', cache_status)])
+
+    def _store_response(self, key: str, upstream: requests.Response) -> Response:
+        """Stream an upstream response to the browser, storing it in the cache if allowed"""
+        lowered = {name.lower(): value for name, value in upstream.headers.items()}
+        ttl = self.cache.is_storable(upstream.status_code, lowered)
+        if ttl is None:
+            return self._stream_response(upstream)
+
+        stored_headers = [
+            (name, value) for name, value in filter_headers(upstream.raw.headers.items())
+            if name.lower() in STORED_HEADERS
+        ]
+        max_size = self.cache.max_object_bytes
+
+        def stream_and_store():
+            chunks = []
+            size = 0
+            complete = False
+            try:
+                for chunk in self._stream(upstream):
+                    size += len(chunk)
+                    if size <= max_size:
+                        chunks.append(chunk)
+                    yield chunk
+                complete = True
+            finally:
+                # Only complete bodies are cached
+                if complete and size <= max_size:
+                    self.cache.put(key, CachedAsset(200, stored_headers, b''.join(chunks), time.time() + ttl))
+
+        return self._stream_response(upstream, stream_and_store(), 'MISS')
@@ -0,0 +1,37 @@
+# tests/conftest.py - Shared fixtures: the app against a throwaway SQLite database
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ADMIN_EMAIL = 'test.admin@example.edu'
+ADMIN_PASSWORD = 'test-password'
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """Import the app configured with an unreachable Canvas and a fresh database"""
+    workdir = tmp_path_factory.mktemp('app')
+    config_path = workdir / 'config.json'
+    config_path.write_text(json.dumps({'api': {'base_url': 'http://127.0.0.1:9/api/v1', 'api_key': 'test-token'}}))
+
+    os.environ.update({
+        'LMS_CONFIG_PATH': str(config_path),
+        'DATABASE_URI': f"sqlite:///{workdir / 'test.db'}",
+        'ADMIN_USERNAME': 'test-admin',
+        'ADMIN_EMAIL': ADMIN_EMAIL,
+        'ADMIN_PASSWORD': ADMIN_PASSWORD,
+        'JUICE_SHOP_URL': 'http://127.0.0.1:9/',
+        'PROXY_CACHE_DIR': '',
+    })
+    import app
+    app.initialize_db(app.app)
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,30 @@
+# tests/test_flag_submissions.py - Batch flag submission webhook
+from models.exercise import ExerciseAttempt, log_exercise_attempt
+
+
+def test_invalid_items_do_not_block_valid_ones(app_module, client):
+    with app_module.app.app_context():
+        log_exercise_attempt('alice@example.edu', '10', '1')
+        log_exercise_attempt('bob@example.edu', '10', '2')
+
+    response = client.post('/api/webhook/flag-submissions', json=[
+        {'student_email': 'alice@example.edu', 'course_id': '10', 'exercise_id': '1', 'is_correct': True, 'score': 80},
+        {'student_email': ['alice@example.edu'], 'course_id': '10', 'exercise_id': '1', 'is_correct': True},
+        {'student_email': 'bob@example.edu', 'course_id': '10', 'exercise_id': '2', 'is_correct': True, 'score': 'abc'},
+        {'student_email': 'bob@example.edu', 'course_id': {}, 'exercise_id': '2', 'is_correct': True},
+        {'student_email': 'bob@example.edu', 'course_id': 10, 'exercise_id': 2, 'is_correct': True, 'score': {}},
+        {'student_email': 'bob@example.edu', 'course_id': 10, 'exercise_id': 2, 'is_correct': True},
+    ])
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == [
+        'completed', 'invalid', 'invalid', 'invalid', 'invalid', 'completed'
+    ]
+    assert all(result['retry'] is False for result in results if result['status'] == 'invalid')
+
+    with app_module.app.app_context():
+        alice = ExerciseAttempt.query.filter_by(student_email='alice@example.edu').one()
+        bob = ExerciseAttempt.query.filter_by(student_email='bob@example.edu').one()
+        assert alice.is_completed and alice.score == 80
+        assert bob.is_completed and bob.score == 100
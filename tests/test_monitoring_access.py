@@ -0,0 +1,33 @@
+# tests/test_monitoring_access.py - Access to the metrics and Canvas health endpoints
+import pytest
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD
+
+MONITORING_PATHS = ['/metrics', '/api/canvas/health']
+
+
+@pytest.fixture
+def monitoring_token(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'MONITORING_TOKEN', 'scrape-secret')
+    return 'scrape-secret'
+
+
+@pytest.mark.parametrize('path', MONITORING_PATHS)
+def test_anonymous_requests_are_refused(client, path):
+    assert client.get(path).status_code == 401
+
+
+@pytest.mark.parametrize('path', MONITORING_PATHS)
+def test_admin_session_is_allowed(client, path):
+    client.post('/login', data={'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+    assert client.get(path).status_code in (200, 503)
+
+
+@pytest.mark.parametrize('path', MONITORING_PATHS)
+def test_bearer_token(client, monitoring_token, path):
+    assert client.get(path, headers={'Authorization': f"Bearer {monitoring_token}"}).status_code in (200, 503)
+    assert client.get(path, headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+
+def test_no_token_configured_refuses_empty_bearer(client):
+    assert client.get('/metrics', headers={'Authorization': 'Bearer '}).status_code == 401
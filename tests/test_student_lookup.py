@@ -0,0 +1,56 @@
+# tests/test_student_lookup.py - Student course lookup when the token may not look users up
+import pytest
+
+from api.enrollment_index import EnrollmentIndex
+from api.lms_client import LMSClient
+from benchmarks.fake_canvas import Dataset, FakeCanvas, PROBE_EMAIL
+
+LOOKUP_PATHS = {'/users/:id', '/accounts/self/users', '/users/:id/enrollments'}
+
+
+@pytest.fixture
+def canvas():
+    canvas = FakeCanvas(Dataset(courses=10, user_lookup=False)).start()
+    yield canvas
+    canvas.stop()
+
+
+def login(client, canvas):
+    canvas.reset_hits()
+    course_ids = [course['id'] for course in client.find_student_courses(PROBE_EMAIL)]
+    return course_ids, LOOKUP_PATHS & canvas.hits.keys()
+
+
+def test_refused_lookup_is_not_retried(canvas):
+    client = LMSClient(canvas.base_url, 'token', enrollment_index=EnrollmentIndex())
+
+    assert login(client, canvas) == (canvas.probe_course_ids(), {'/users/:id', '/accounts/self/users'})
+    assert login(client, canvas) == (canvas.probe_course_ids(), set())
+
+
+def test_refused_lookup_is_retried_without_ttl(canvas):
+    client = LMSClient(canvas.base_url, 'token', enrollment_index=EnrollmentIndex(), lookup_denied_ttl=0)
+
+    login(client, canvas)
+    assert login(client, canvas)[1] == {'/users/:id', '/accounts/self/users'}
+
+
+@pytest.fixture
+def username_canvas():
+    canvas = FakeCanvas(Dataset(courses=10, email_login_ids=False)).start()
+    yield canvas
+    canvas.stop()
+
+
+def test_student_found_when_login_id_is_not_email(username_canvas):
+    client = LMSClient(username_canvas.base_url, 'token', enrollment_index=EnrollmentIndex())
+
+    assert login(client, username_canvas) == (username_canvas.probe_course_ids(), LOOKUP_PATHS)
+
+
+def test_unresolved_email_falls_back_to_rosters(username_canvas):
+    client = LMSClient(username_canvas.base_url, 'token', enrollment_index=EnrollmentIndex())
+
+    username_canvas.reset_hits()
+    assert client.find_student_courses('nobody@example.edu') == []
+    assert '/courses/:id/users' in username_canvas.hits